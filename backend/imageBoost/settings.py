@@ -7,6 +7,8 @@ Generated by 'django-admin startproject' using Django 5.2.8.
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -55,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'images.middleware.MetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'imageBoost.urls'
@@ -80,10 +83,35 @@ WSGI_APPLICATION = 'imageBoost.wsgi.application'
 # -------------------------------
 # DATABASE (SQLite)
 # -------------------------------
+# Réglages appliqués à chaque nouvelle connexion (init_command) :
+# - WAL : les lectures (liste, détail) ne sont plus bloquées par une écriture
+#   (upload), et un commit n'écrit qu'à la fin du journal
+# - synchronous=NORMAL : pas de fsync à chaque commit en WAL (seul le dernier
+#   commit peut être perdu en cas de coupure de courant, la base reste cohérente)
+# - mmap_size : lectures par projection mémoire plutôt que par appels read()
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # 256 MB
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE};'
+            ),
+            # Attente maximale du verrou d'écriture (secondes) avant "database is locked"
+            'timeout': 20,
+            # Les transactions prennent le verrou d'écriture dès BEGIN : deux
+            # transactions concurrentes attendent le verrou (timeout) au lieu
+            # d'échouer immédiatement en voulant passer de lecture à écriture
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Connexions persistantes : réutilisées entre les requêtes d'un même
+        # thread (WSGI) pendant CONN_MAX_AGE secondes, vérifiées avant réutilisation
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -113,8 +141,162 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Niveaux de sous-dossiers sous originals/, webp/, thumbnails/ et variants/
+# (2 : "originals/ab/cd/<uuid>.jpg" ; 0 : dossiers plats). Les fichiers existants
+# sont déplacés par la commande `shard_media`
+MEDIA_SHARD_DEPTH = int(os.environ.get('MEDIA_SHARD_DEPTH', 2))
+
+# Servis par la vue media_serve. Les fichiers nommés par un UUID sont immuables
+# (cache d'un an) ; les autres sont mis en cache MEDIA_CACHE_MAX_AGE secondes
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# -------------------------------
+# ENCODEURS (options passées à Pillow, par format)
+# -------------------------------
+# AVIF : nécessite Pillow >= 11.2 ou le paquet optionnel `pillow-avif-plugin`.
+#   enabled : active le format AVIF
+#   lazy    : True = généré à la première demande d'un client qui l'accepte,
+#             False = généré à l'optimisation avec les autres variantes
+#   codec   : encodeur AV1 ("auto", "aom", "rav1e", "svt")
+#   speed   : effort d'encodage (0 = lent/compact, 10 = rapide)
+IMAGE_ENCODERS = {
+    'webp': {'quality': 85, 'method': 6},
+    'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+    'avif': {
+        'enabled': os.environ.get('IMAGE_AVIF_ENABLED', 'False') == 'True',
+        'lazy': True,
+        'codec': 'auto',
+        'quality': 50,
+        'speed': 6,
+    },
+}
+
+# -------------------------------
+# PLACEHOLDERS (affichés pendant le chargement)
+# -------------------------------
+# Placeholders générés à l'optimisation :
+#   'blurhash' : chaîne BlurHash d'environ 28 caractères (champ `blurhash`)
+#   'jpeg'     : data URI JPEG base64 d'environ 1 KB (champ `blur_placeholder`)
+# Les deux par défaut : les clients de l'API qui lisent `blur_placeholder`
+# le reçoivent toujours ; retirer 'jpeg' allège les images enregistrées
+IMAGE_PLACEHOLDERS = ['jpeg', 'blurhash']
+# Composantes BlurHash (horizontales, verticales) : plus = plus de détails, plus long
+BLURHASH_COMPONENTS = (4, 3)
+
+# -------------------------------
+# BUDGET MÉMOIRE DES GRANDES IMAGES
+# -------------------------------
+# Dimensions lues dans l'en-tête avant tout décodage.
+# Au-delà de IMAGE_MAX_PIXELS, l'upload est refusé (413) ; c'est aussi
+# Image.MAX_IMAGE_PIXELS (protection contre les bombes de décompression).
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 150_000_000))
+# Au-delà de ce budget, l'image est décodée à 1/2, 1/4 ou 1/8 de sa résolution
+# (RGB : 3 octets par pixel, soit ~120 MB pour 40 MP)
+IMAGE_DECODE_PIXEL_BUDGET = int(os.environ.get('IMAGE_DECODE_PIXEL_BUDGET', 40_000_000))
+# Grandes images : au plus IMAGE_MAX_LARGE_JOBS optimisées en même temps par
+# processus ; les suivantes reçoivent 503 avec Retry-After
+IMAGE_LARGE_PIXELS = 24_000_000
+IMAGE_MAX_LARGE_JOBS = int(os.environ.get('IMAGE_MAX_LARGE_JOBS', 2))
+IMAGE_ADMISSION_RETRY_AFTER = 5  # secondes
+
+# -------------------------------
+# IMAGES ANIMÉES (GIF, WebP animé)
+# -------------------------------
+# Converties en WebP animé, image par image (la miniature reste fixe).
+# Limites lues dans l'en-tête : au-delà, l'upload est refusé (413).
+# Une image de l'animation ne peut pas dépasser IMAGE_DECODE_PIXEL_BUDGET.
+IMAGE_ANIMATION_MAX_FRAMES = int(os.environ.get('IMAGE_ANIMATION_MAX_FRAMES', 1000))
+# Pixels de toutes les images réunies (largeur x hauteur x nombre d'images) :
+# borne la durée de l'encodage
+IMAGE_ANIMATION_MAX_PIXELS = int(os.environ.get('IMAGE_ANIMATION_MAX_PIXELS', 300_000_000))
+# Options du WebP animé selon le format d'origine, prioritaires sur celles de
+# IMAGE_ENCODERS['webp'] et du profil :
+#   GIF : sans perte (256 couleurs et aplats : plus petit qu'avec perte, et
+#         exact) ; `quality` est alors l'effort de compression
+#   WEBP : avec perte, allow_mixed laisse chaque image choisir le plus petit
+# method 4 : la méthode 6 triple la durée de l'encodage sans réduire la taille
+IMAGE_ANIMATION_WEBP_OPTIONS = {
+    'GIF': {'lossless': True, 'quality': 80, 'method': 4},
+    'WEBP': {'allow_mixed': True, 'method': 4},
+}
+
+# -------------------------------
+# PROFILS D'ENCODAGE (choisis à l'upload, champ `profile`)
+# -------------------------------
+# Chaque profil surcharge les réglages de IMAGE_ENCODERS, format par format.
+# target_ssim : la qualité WebP est cherchée par dichotomie entre quality_min
+# et quality_max : la plus basse dont le SSIM (luminance, sur une copie réduite)
+# atteint la cible. Plus lent, mais chaque image reçoit juste la qualité utile.
+# 'standard' (défaut) ne surcharge rien : IMAGE_ENCODERS tel quel (WebP
+# qualité 85, method 6), l'encodage des images d'avant les profils.
+IMAGE_ENCODING_PROFILES = {
+    'standard': {},
+    'fast': {
+        'webp': {'quality': 80, 'method': 2},
+        'jpeg': {'optimize': False},
+        'avif': {'speed': 8},
+    },
+    'balanced': {
+        'webp': {'quality': 82, 'method': 4},
+    },
+    'max-compression': {
+        'webp': {'method': 6},
+        'avif': {'speed': 4},
+        'target_ssim': 0.95,
+        'quality_min': 40,
+        'quality_max': 90,
+    },
+}
+IMAGE_DEFAULT_PROFILE = os.environ.get('IMAGE_DEFAULT_PROFILE', 'standard')
+
+# -------------------------------
+# VARIANTES RESPONSIVES (srcset)
+# -------------------------------
+# Largeurs générées à l'optimisation (seulement celles < largeur de l'original)
+IMAGE_VARIANT_WIDTHS = [320, 640, 1280, 1920]
+
+# -------------------------------
+# DÉRIVÉS À LA DEMANDE (/api/images/<id>/render)
+# -------------------------------
+# Cache disque des dérivés (hors MEDIA_ROOT), borné en octets avec éviction LRU
+RENDER_CACHE_DIR = BASE_DIR / 'cache' / 'derivatives'
+RENDER_CACHE_MAX_BYTES = int(os.environ.get('RENDER_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # 512 MB
+
+# Listes blanches : bornent le nombre de dérivés possibles par image
+RENDER_ALLOWED_WIDTHS = [64, 128, 200, 320, 480, 640, 960, 1280, 1920]
+RENDER_ALLOWED_HEIGHTS = [64, 128, 200, 320, 480, 640, 960, 1280, 1920]
+RENDER_ALLOWED_QUALITIES = [50, 65, 75, 85]
+RENDER_DEFAULT_QUALITY = 75
+
+# -------------------------------
+# CACHE DES RÉPONSES DE L'API (liste et détail)
+# -------------------------------
+# Cache disque : partagé par les workers gunicorn et les processus d'optimisation,
+# qui l'invalident (un cache en mémoire locale ne verrait pas leurs modifications)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'api',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Durée de vie d'une réponse en cache (secondes) ; l'invalidation est immédiate
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 600))
+
+# -------------------------------
+# MÉTRIQUES (/metrics, format Prometheus)
+# -------------------------------
+# Chaque processus (workers gunicorn, pools d'encodage) y écrit un instantané
+# de ses compteurs ; /metrics additionne tous les fichiers. Le répertoire doit
+# être partagé par les workers d'une même machine (les processus terminés sont
+# détectés par leur PID, leurs valeurs sont cumulées dans base.json)
+METRICS_DIR = os.environ.get('METRICS_DIR', BASE_DIR / 'tmp' / 'metrics')
+# Intervalle minimal entre deux écritures d'un instantané (secondes)
+METRICS_FLUSH_INTERVAL = 1.0
+
 # -------------------------------
 # REST Framework
 # -------------------------------
@@ -129,6 +311,14 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Pagination par curseur de la liste des images (`?limit=`)
+IMAGE_LIST_PAGE_SIZE = 50
+IMAGE_LIST_MAX_PAGE_SIZE = 200
+
+# Suppression groupée (/api/images/delete/) : nombre maximum d'images
+# supprimées par requête (liste d'IDs ou filtre)
+IMAGE_BULK_DELETE_MAX = 1000
+
 # -------------------------------
 # CORS (React frontend)
 # -------------------------------
@@ -139,6 +329,64 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# En-tête du protocole d'upload fragmenté (position du morceau)
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset')
+# En-têtes lisibles par le frontend : position de l'upload, délai avant de réessayer (503)
+CORS_EXPOSE_HEADERS = ['Upload-Offset', 'Retry-After']
+
 # Upload limits
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
+
+# Gestionnaires d'upload : calculent l'empreinte SHA-256 pendant la réception
+FILE_UPLOAD_HANDLERS = [
+    'images.uploadhandlers.HashingMemoryFileUploadHandler',
+    'images.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+
+# Upload groupé (/api/images/upload/batch/) : nombre maximum de fichiers par
+# requête et nombre d'images optimisées simultanément
+UPLOAD_BATCH_MAX_FILES = 50
+UPLOAD_BATCH_WORKERS = int(os.environ.get('UPLOAD_BATCH_WORKERS', min(4, os.cpu_count() or 1)))
+
+# -------------------------------
+# UPLOAD FRAGMENTÉ ET REPRENABLE
+# -------------------------------
+# Les gros fichiers sont envoyés par morceaux (/api/images/uploads/) écrits
+# directement sur disque : les limites mémoire ci-dessus ne s'appliquent pas
+UPLOAD_SESSION_DIR = BASE_DIR / 'tmp' / 'uploads'
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 200 * 1024 * 1024))  # 200 MB
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # Taille de morceau conseillée aux clients
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # Sessions sans activité supprimées après 24 h
+
+# -------------------------------
+# OPTIMISATION EN ARRIÈRE-PLAN
+# -------------------------------
+# False (défaut) : l'image est optimisée pendant la requête d'upload
+# True : l'upload crée un job en base, traité par `python manage.py process_images`
+IMAGE_OPTIMIZATION_ASYNC = os.environ.get('IMAGE_OPTIMIZATION_ASYNC', 'False') == 'True'
+
+# Nombre de processus d'encodage utilisés par `process_images`
+IMAGE_WORKER_PROCESSES = int(os.environ.get('IMAGE_WORKER_PROCESSES', os.cpu_count() or 1))
+
+# Un job en cours renouvelle son bail (heartbeat_at) toutes les
+# IMAGE_JOB_HEARTBEAT_INTERVAL secondes. Sans renouvellement pendant
+# IMAGE_JOB_STALE_AFTER secondes, son worker est considéré mort et le job est
+# remis en attente : un encodage long mais vivant n'est jamais relancé en double.
+# IMAGE_JOB_STALE_AFTER doit rester bien supérieur à l'intervalle (plusieurs
+# renouvellements manqués). `process_images` ne réserve un job que pour un
+# processus libre : un job réservé démarre aussitôt, sans attente dans le pool
+IMAGE_JOB_HEARTBEAT_INTERVAL = 30  # secondes
+IMAGE_JOB_STALE_AFTER = int(os.environ.get('IMAGE_JOB_STALE_AFTER', 600))
+
+# -------------------------------
+# VUES ASYNCHRONES (ASGI : uvicorn imageBoost.asgi:application)
+# -------------------------------
+# True : upload, liste, détail et suppression sont servis par des vues `async def`
+# (images/async_views.py) ; l'encodage est confié à un pool de processus partagé.
+# À n'activer que derrière un serveur ASGI : sous WSGI, chaque vue asynchrone
+# est exécutée dans sa propre boucle d'événements
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS', 'False') == 'True'
+
+# Nombre de processus du pool d'encodage des vues asynchrones (par processus ASGI)
+ASYNC_OPTIMIZE_WORKERS = int(os.environ.get('ASYNC_OPTIMIZE_WORKERS', os.cpu_count() or 1))
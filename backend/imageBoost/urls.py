@@ -15,16 +15,22 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from images.views import media_serve, prometheus_metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/images/', include('images.urls')),
+    path('metrics', prometheus_metrics, name='metrics'),
+    # Media files, in development and in production (Range, ETag, immutable caching)
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$', media_serve, name='media'),
 ]
 
-# Serve media files in development
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import OptimizedImage
+from .models import ImageVariant, OptimizedImage, OptimizationJob
+
+
+class ImageVariantInline(admin.TabularInline):
+    model = ImageVariant
+    extra = 0
+    readonly_fields = ['file', 'width', 'height', 'format', 'byte_size']
 
 
 @admin.register(OptimizedImage)
@@ -7,5 +13,12 @@ class OptimizedImageAdmin(admin.ModelAdmin):
     list_display = ['original_name', 'original_size', 'width', 'height', 'format', 'created_at']
     list_filter = ['format', 'created_at']
     search_fields = ['original_name']
-    readonly_fields = ['created_at', 'updated_at', 'original_size']
+    readonly_fields = ['created_at', 'updated_at', 'original_size', 'content_hash']
+    inlines = [ImageVariantInline]
+
 
+@admin.register(OptimizationJob)
+class OptimizationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'image', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
@@ -0,0 +1,205 @@
+"""
+Module de contrôle d'admission des images.
+
+Ce module contient :
+- L'inspection d'une image depuis son en-tête (Image.open sans load :
+  dimensions, mode et format, sans rien décoder)
+- Les limites des animations (GIF, WebP) : nombre d'images et pixels de
+  toutes les images réunies, lus dans l'en-tête
+- Le budget de pixels : au-delà de IMAGE_DECODE_PIXEL_BUDGET, l'image est
+  décodée à résolution réduite (facteur entier)
+- Le plafond du nombre de grandes images optimisées en même temps par
+  processus : au-delà, l'upload est refusé (503 + Retry-After)
+
+La mémoire d'une optimisation est proportionnelle au nombre de pixels
+décodés : avec le budget et le plafond, la mémoire crête d'un worker est
+bornée quels que soient les fichiers reçus.
+"""
+
+import contextlib
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from PIL import Image
+
+from .animation import frame_count
+
+
+# Facteurs de réduction possibles (décodage "draft" JPEG ou Image.reduce)
+REDUCTION_FACTORS = (1, 2, 4, 8)
+
+_large_jobs = None
+_large_jobs_guard = threading.Lock()
+
+
+class ImageTooLarge(Exception):
+    """
+    L'image dépasse IMAGE_MAX_PIXELS (ou les limites des animations) :
+    elle n'est jamais décodée.
+    """
+
+
+class ServerBusy(Exception):
+    """
+    Trop de grandes images sont en cours d'optimisation dans ce processus.
+
+    Attributes:
+        retry_after: Délai conseillé avant de réessayer (secondes)
+    """
+
+    def __init__(self, retry_after):
+        super().__init__('Too many large images are being processed')
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """
+    Informations lues dans l'en-tête d'une image.
+    """
+
+    width: int
+    height: int
+    mode: str
+    format: str
+    frames: int = 1
+
+    @property
+    def pixels(self):
+        return self.width * self.height
+
+    @property
+    def is_animated(self):
+        return self.frames > 1
+
+    @property
+    def is_large(self):
+        """Image soumise au plafond d'optimisations simultanées."""
+        return self.pixels >= settings.IMAGE_LARGE_PIXELS
+
+
+def inspect_image(source):
+    """
+    Lit dimensions, mode, format et nombre d'images depuis l'en-tête, sans
+    décoder les pixels.
+
+    La position du fichier est remise au début : il peut être relu ensuite.
+
+    Args:
+        source: Fichier ouvert (uploadé ou stocké)
+
+    Returns:
+        ImageInfo: Informations de l'en-tête
+
+    Raises:
+        ImageTooLarge: Si l'image dépasse IMAGE_MAX_PIXELS, ou si l'animation
+            dépasse IMAGE_ANIMATION_MAX_FRAMES ou IMAGE_ANIMATION_MAX_PIXELS
+        PIL.UnidentifiedImageError: Si le fichier n'est pas une image reconnue
+    """
+    source.seek(0)
+    try:
+        with Image.open(source) as img:
+            info = ImageInfo(
+                img.width, img.height, img.mode, img.format or 'JPEG', frame_count(img)
+            )
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
+    finally:
+        source.seek(0)
+
+    if info.pixels > settings.IMAGE_MAX_PIXELS:
+        raise ImageTooLarge(
+            f'Image too large: {info.width}x{info.height} '
+            f'({info.pixels} pixels, max {settings.IMAGE_MAX_PIXELS})'
+        )
+    if info.is_animated:
+        check_animation(info)
+    return info
+
+
+def check_animation(info):
+    """
+    Vérifie les limites d'une animation avant tout décodage.
+
+    Les images d'une animation sont décodées une à une à leur taille réelle
+    (pas de décodage réduit) : une image plus grande que
+    IMAGE_DECODE_PIXEL_BUDGET est refusée, comme une animation trop longue
+    ou trop coûteuse à encoder (toutes images réunies).
+
+    Args:
+        info: ImageInfo d'une image animée
+
+    Raises:
+        ImageTooLarge: Si une limite est dépassée
+    """
+    total = info.pixels * info.frames
+    if info.frames > settings.IMAGE_ANIMATION_MAX_FRAMES:
+        raise ImageTooLarge(
+            f'Animation too long: {info.frames} frames '
+            f'(max {settings.IMAGE_ANIMATION_MAX_FRAMES})'
+        )
+    if info.pixels > settings.IMAGE_DECODE_PIXEL_BUDGET:
+        raise ImageTooLarge(
+            f'Animation frames too large: {info.width}x{info.height} '
+            f'(max {settings.IMAGE_DECODE_PIXEL_BUDGET} pixels per frame)'
+        )
+    if total > settings.IMAGE_ANIMATION_MAX_PIXELS:
+        raise ImageTooLarge(
+            f'Animation too large: {info.frames} frames of {info.width}x{info.height} '
+            f'({total} pixels, max {settings.IMAGE_ANIMATION_MAX_PIXELS})'
+        )
+
+
+def budget_factor(size):
+    """
+    Facteur de réduction entier pour qu'une image tienne dans le budget de pixels.
+
+    Args:
+        size: Tuple (largeur, hauteur) de l'image
+
+    Returns:
+        int: 1 (décodage complet), 2, 4 ou 8
+    """
+    pixels = size[0] * size[1]
+    for factor in REDUCTION_FACTORS:
+        if pixels / (factor * factor) <= settings.IMAGE_DECODE_PIXEL_BUDGET:
+            return factor
+    return REDUCTION_FACTORS[-1]
+
+
+def _large_jobs_semaphore():
+    """Sémaphore du processus, créé au premier usage (IMAGE_MAX_LARGE_JOBS)."""
+    global _large_jobs
+    with _large_jobs_guard:
+        if _large_jobs is None:
+            _large_jobs = threading.BoundedSemaphore(max(settings.IMAGE_MAX_LARGE_JOBS, 1))
+        return _large_jobs
+
+
+@contextlib.contextmanager
+def admit(info):
+    """
+    Réserve une place pour optimiser une image (grandes images seulement).
+
+    N'attend jamais : s'il n'y a plus de place, le client est invité à
+    réessayer plus tard plutôt que de laisser les requêtes s'empiler en
+    mémoire.
+
+    Args:
+        info: ImageInfo de l'image à optimiser
+
+    Raises:
+        ServerBusy: Si IMAGE_MAX_LARGE_JOBS grandes images sont déjà en cours
+    """
+    if not info.is_large:
+        yield
+        return
+
+    semaphore = _large_jobs_semaphore()
+    if not semaphore.acquire(blocking=False):
+        raise ServerBusy(settings.IMAGE_ADMISSION_RETRY_AFTER)
+    try:
+        yield
+    finally:
+        semaphore.release()
@@ -0,0 +1,117 @@
+"""
+Module des images animées (GIF, WebP animé).
+
+Ce module contient :
+- La détection d'une animation depuis l'en-tête (nombre d'images)
+- Le relevé de la chronologie (durée de chaque image, nombre de boucles)
+- L'encodage en WebP animé (sans perte pour les GIF, voir
+  IMAGE_ANIMATION_WEBP_OPTIONS)
+
+Les images de l'animation ne sont jamais chargées ensemble : le relevé
+les parcourt une à une (ImageSequence), puis l'encodeur WebP animé de
+Pillow les décode et les ajoute une à une (seek). La mémoire dépend de la
+taille d'une image, pas de leur nombre : seules la liste des durées (un
+entier par image) et le fichier encodé grandissent avec l'animation.
+"""
+
+from io import BytesIO
+
+from django.conf import settings
+from PIL import ImageSequence
+
+from .encoders import encoder_options
+
+
+# En dessous de cette durée (ms), les navigateurs affichent une image de GIF
+# pendant DEFAULT_FRAME_DURATION : même règle ici, le WebP s'anime à la même vitesse
+MIN_FRAME_DURATION = 20
+DEFAULT_FRAME_DURATION = 100
+
+
+def frame_count(img):
+    """
+    Nombre d'images d'une image ouverte (1 pour une image fixe).
+
+    Pour un GIF, les blocs sont parcourus sans décoder les pixels.
+    """
+    return getattr(img, 'n_frames', 1)
+
+
+def is_animated(img):
+    """Indique si une image ouverte contient plusieurs images."""
+    return frame_count(img) > 1
+
+
+def frame_timeline(img):
+    """
+    Relève la durée de chaque image et le nombre de boucles d'une animation.
+
+    Une seule image est chargée à la fois ; la position est remise sur la
+    première image.
+
+    Args:
+        img: Image Pillow animée ouverte
+
+    Returns:
+        tuple: (durées en millisecondes, nombre de boucles (0 = infini))
+    """
+    durations = []
+    for frame in ImageSequence.Iterator(img):
+        if img.format == 'WEBP':
+            # WebP : la durée d'une image n'est connue qu'après son décodage
+            frame.load()
+        duration = frame.info.get('duration') or 0
+        durations.append(duration if duration >= MIN_FRAME_DURATION else DEFAULT_FRAME_DURATION)
+    img.seek(0)
+
+    # GIF sans extension NETSCAPE : l'animation n'est jouée qu'une fois
+    loop = img.info.get('loop', 1)
+    return durations, loop
+
+
+def animation_options(source_format, profile=None, quality=None):
+    """
+    Options de Image.save() du WebP animé.
+
+    Celles du WebP fixe (IMAGE_ENCODERS['webp'], le profil, la qualité
+    imposée), complétées ou remplacées par IMAGE_ANIMATION_WEBP_OPTIONS
+    pour le format d'origine.
+
+    Args:
+        source_format: Format Pillow de l'original ("GIF" ou "WEBP")
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        quality: Qualité imposée (recherche SSIM), sinon celle du profil
+
+    Returns:
+        dict: Options à passer à Image.save()
+    """
+    options = encoder_options('webp', profile, quality)
+    options.update(settings.IMAGE_ANIMATION_WEBP_OPTIONS.get(source_format, {}))
+    return options
+
+
+def is_lossless(source_format):
+    """Indique si les animations de ce format sont encodées sans perte (pas de qualité à chercher)."""
+    return bool(settings.IMAGE_ANIMATION_WEBP_OPTIONS.get(source_format, {}).get('lossless'))
+
+
+def encode_animated_webp(img, durations, loop, profile=None, quality=None):
+    """
+    Encode une animation en WebP animé, image par image.
+
+    La transparence des images est conservée.
+
+    Args:
+        img: Image Pillow animée ouverte (lue par seek, image par image)
+        durations: Durée de chaque image en millisecondes (frame_timeline)
+        loop: Nombre de boucles (0 = infini)
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        quality: Qualité imposée (recherche SSIM), sinon celle du profil
+
+    Returns:
+        bytes: Contenu du fichier WebP animé
+    """
+    options = animation_options(img.format, profile, quality)
+    buffer = BytesIO()
+    img.save(buffer, format='WEBP', save_all=True, duration=durations, loop=loop, **options)
+    return buffer.getvalue()
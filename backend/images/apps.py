@@ -5,3 +5,13 @@ class ImagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'images'
 
+    def ready(self):
+        from django.conf import settings
+        from PIL import Image
+
+        # Plafond de Pillow contre les bombes de décompression
+        # (avertissement au-delà, erreur au-delà du double)
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+
+        # Connecte les signaux d'invalidation du cache des réponses
+        from . import caching  # noqa: F401
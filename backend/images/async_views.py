@@ -0,0 +1,236 @@
+"""
+Module de vues asynchrones (ASGI) pour l'API des images.
+
+Versions `async def` de l'upload, de la liste, du détail et de la
+suppression, activées par API_ASYNC_VIEWS (voir images/urls.py) :
+
+- L'ORM est appelé par ses API asynchrones (aget, asave, adelete, async for)
+- L'encodage (CPU) est confié au pool de processus partagé
+  (tasks.optimization_pool) : la boucle d'événements reste libre pendant
+  qu'une image est optimisée
+- Les opérations sur fichiers sans équivalent asynchrone (lecture du corps
+  multipart, inspection de l'en-tête, déduplication) passent par
+  sync_to_async ; la suppression des fichiers a lieu après le commit, en
+  arrière-plan (OptimizedImage.delete)
+
+Un seul processus uvicorn sert ainsi de nombreux uploads lents en parallèle
+sans qu'une poignée d'encodages ne bloque les autres requêtes.
+
+Les réponses (statuts, erreurs, données) sont identiques à celles des vues
+synchrones de images/views.py : validation et données partagées viennent de
+images/uploads.py et images/pagination.py.
+"""
+
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from PIL import UnidentifiedImageError
+
+from . import metrics
+from .admission import ImageTooLarge, ServerBusy, admit, inspect_image
+from .caching import acached_response
+from .models import OptimizedImage, OptimizationJob
+from .pagination import akeyset_page, list_payload, list_queryset, parse_list_params
+from .serializers import OptimizedImageSerializer
+from .storage import clone_image, compute_content_hash, find_duplicate
+from .tasks import discard_optimization_pool, optimization_pool, optimize_image_by_id
+from .uploads import queued_payload, validate_upload
+
+
+async def _serialized(request, image_id):
+    """Données d'une image relue avec ses variantes (sérialisation sans accès à la base)."""
+    image = await OptimizedImage.objects.prefetch_related('variants').aget(pk=image_id)
+    return OptimizedImageSerializer(image, context={'request': request}).data
+
+
+async def _optimize_in_pool(image_id):
+    """
+    Optimise une image dans le pool de processus partagé.
+
+    Returns:
+        str: Message d'erreur, ou '' en cas de succès
+    """
+    pool = optimization_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, optimize_image_by_id, image_id)
+    except BrokenProcessPool:
+        # Un processus du pool a été tué (ex: manque de mémoire) : pool recréé au prochain upload
+        discard_optimization_pool(pool)
+        return 'Optimization worker crashed'
+
+
+@csrf_exempt
+@require_POST
+async def image_upload(request):
+    """
+    Vue asynchrone pour l'upload et l'optimisation d'une image.
+
+    Même processus que ImageUploadView : validation, inspection de
+    l'en-tête, déduplication, création de l'instance, puis optimisation
+    dans le pool de processus (ou mise en file d'attente en mode
+    IMAGE_OPTIMIZATION_ASYNC).
+
+    Exemptée de CSRF comme les vues DRF (pas d'authentification par session).
+
+    Args:
+        request: Requête HTTP multipart (champ `image`, champ optionnel `profile`)
+
+    Returns:
+        JsonResponse: Données de l'image (201), job à suivre (202), ou erreur
+        (400, 413, 500, 503 avec Retry-After)
+    """
+    # ========== VALIDATION ==========
+
+    # Le corps est déjà reçu par le serveur ASGI : son découpage (écriture des
+    # fichiers temporaires, empreinte SHA-256) est fait hors de la boucle
+    with metrics.timed('parse'):
+        files = await sync_to_async(lambda: request.FILES)()
+
+    try:
+        uploaded_file, encoding_profile = validate_upload(files, request.POST.get('profile'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    try:
+        info = await sync_to_async(inspect_image)(uploaded_file)
+    except ImageTooLarge as e:
+        metrics.inc('imageboost_errors_total', stage='validation')
+        return JsonResponse({'error': str(e)}, status=413)
+    except (UnidentifiedImageError, OSError):
+        metrics.inc('imageboost_errors_total', stage='validation')
+        return JsonResponse({'error': 'Invalid image file'}, status=400)
+
+    # ========== DÉDUPLICATION PAR EMPREINTE DE CONTENU ==========
+
+    with metrics.timed('hash'):
+        content_hash = compute_content_hash(uploaded_file)
+
+    duplicate = await sync_to_async(find_duplicate)(content_hash, encoding_profile)
+    if duplicate:
+        clone = await sync_to_async(clone_image)(duplicate, original_name=uploaded_file.name)
+        metrics.inc('imageboost_uploads_total', outcome='duplicate')
+        return JsonResponse(await _serialized(request, clone.pk), status=201)
+
+    if settings.IMAGE_OPTIMIZATION_ASYNC:
+        return await _create_and_optimize(request, uploaded_file, content_hash, encoding_profile)
+
+    # ========== CONTRÔLE D'ADMISSION ==========
+
+    # Réservation non bloquante : elle peut être prise dans la boucle d'événements
+    try:
+        with admit(info):
+            return await _create_and_optimize(request, uploaded_file, content_hash, encoding_profile)
+    except ServerBusy as e:
+        metrics.inc('imageboost_errors_total', stage='admission')
+        response = JsonResponse({'error': str(e), 'retry_after': e.retry_after}, status=503)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+
+
+async def _create_and_optimize(request, uploaded_file, content_hash, encoding_profile):
+    """
+    Crée l'instance d'un nouveau contenu puis l'optimise (ou la met en file d'attente).
+
+    Returns:
+        JsonResponse: Données de l'image (201), job à suivre (202) ou erreur (500)
+    """
+    optimized_image = OptimizedImage(
+        original_name=uploaded_file.name,
+        original_file=uploaded_file,
+        original_size=uploaded_file.size,
+        content_hash=content_hash,
+        encoding_profile=encoding_profile,
+    )
+
+    # Écrit l'original dans le stockage et insère la ligne (hors de la boucle)
+    with metrics.timed('store_original'):
+        await optimized_image.asave()
+
+    if settings.IMAGE_OPTIMIZATION_ASYNC:
+        job = await OptimizationJob.objects.acreate(image=optimized_image)
+        metrics.inc('imageboost_uploads_total', outcome='queued')
+        return JsonResponse(queued_payload(request, optimized_image, job), status=202)
+
+    # ========== OPTIMISATION DANS LE POOL DE PROCESSUS ==========
+
+    error = await _optimize_in_pool(optimized_image.pk)
+    if error:
+        # Fichiers non partagés supprimés après le commit (OptimizedImage.delete)
+        await optimized_image.adelete()
+        metrics.inc('imageboost_uploads_total', outcome='failed')
+        return JsonResponse({'error': f'Error optimizing image: {error}'}, status=500)
+
+    metrics.inc('imageboost_uploads_total', outcome='created')
+    return JsonResponse(await _serialized(request, optimized_image.pk), status=201)
+
+
+@require_GET
+async def image_list(request):
+    """
+    Vue asynchrone de la liste des images (pagination par curseur, champs, cache).
+
+    Mêmes paramètres et même réponse que la vue synchrone `image_list`.
+
+    Args:
+        request: Requête HTTP (cursor, limit, fields)
+
+    Returns:
+        JsonResponse: {"results": [...], "next": URL ou null}, 304 ou erreur 400
+    """
+    async def build():
+        try:
+            limit, fields = parse_list_params(request.GET)
+            page, next_cursor = await akeyset_page(list_queryset(fields), request.GET.get('cursor'), limit)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return list_payload(request, page, fields, next_cursor), 200
+
+    return await acached_response(request, build)
+
+
+@require_GET
+async def image_detail(request, pk):
+    """
+    Vue asynchrone des détails d'une image (avec cache et 304).
+
+    Args:
+        request: Requête HTTP
+        pk: Primary key (ID) de l'image
+
+    Returns:
+        JsonResponse: Données de l'image, 304 ou erreur 404
+    """
+    async def build():
+        try:
+            return await _serialized(request, pk), 200
+        except OptimizedImage.DoesNotExist:
+            return {'error': 'Image not found'}, 404
+
+    return await acached_response(request, build, image_id=pk)
+
+
+@csrf_exempt
+@require_http_methods(['DELETE'])
+async def image_delete(request, pk):
+    """
+    Vue asynchrone de suppression d'une image et de ses fichiers non partagés.
+
+    Args:
+        request: Requête HTTP
+        pk: Primary key (ID) de l'image
+
+    Returns:
+        HttpResponse: 204 No Content, ou erreur JSON 404
+    """
+    try:
+        image = await OptimizedImage.objects.aget(pk=pk)
+    except OptimizedImage.DoesNotExist:
+        return JsonResponse({'error': 'Image not found'}, status=404)
+
+    await image.adelete()
+    return HttpResponse(status=204)
@@ -0,0 +1,333 @@
+"""
+Module de benchmark du pipeline d'optimisation.
+
+Ce module contient :
+- La génération d'un corpus synthétique déterministe (tailles, modes, formats)
+- La mesure d'un cas dans un processus dédié : durée de chaque étape du
+  pipeline et de l'appel complet, mémoire crête (RSS et tracemalloc)
+- La comparaison de deux résultats pour détecter les régressions
+
+Utilisé par la commande `benchmark`. La fonction exécutée dans les processus
+enfants (run_case) importe Django à l'intérieur : les processus sont démarrés
+en mode "spawn" et initialisés par tasks.init_worker.
+"""
+
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+
+from PIL import Image, ImageDraw, ImageFilter
+
+
+# Tailles du corpus : nom -> (largeur, hauteur)
+SIZES = {
+    '0.3mp': (640, 480),
+    '2mp': (1632, 1224),
+    '12mp': (4000, 3000),
+    '24mp': (6000, 4000),
+    '40mp': (7728, 5152),
+}
+
+# Modes acceptés par chaque format d'enregistrement
+FORMAT_MODES = {
+    'JPEG': ('RGB', 'L', 'CMYK'),
+    'PNG': ('RGB', 'RGBA', 'P', 'L'),
+    'GIF': ('P', 'L'),
+    'WEBP': ('RGB', 'RGBA'),
+}
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# Graine fixe : le corpus est identique d'une exécution et d'une machine à l'autre
+SEED = 20240601
+
+# En dessous de cet écart absolu, une différence de durée est considérée comme du bruit
+MIN_REGRESSION_MS = 5.0
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    """
+    Un cas du corpus : une image synthétique de taille, mode et format donnés.
+    """
+
+    size: str
+    mode: str
+    format: str
+
+    @property
+    def name(self):
+        return f"{self.size}-{self.mode.lower()}-{self.format.lower()}"
+
+    @property
+    def dimensions(self):
+        return SIZES[self.size]
+
+    def filename(self):
+        return f"{self.name}.{EXTENSIONS[self.format]}"
+
+
+def default_cases(quick=False):
+    """
+    Liste des cas du corpus standard.
+
+    - Balayage des tailles (0.3 à 40 MP) sur le cas le plus courant : photo JPEG RGB
+    - Toutes les combinaisons mode × format valides à 2 MP
+    - Un grand PNG avec transparence (12 MP)
+
+    Args:
+        quick: Ne garder que les cas de 2 MP ou moins (vérification rapide)
+
+    Returns:
+        list: BenchCase triés du plus petit au plus grand
+    """
+    cases = [BenchCase(size, 'RGB', 'JPEG') for size in SIZES]
+    cases += [
+        BenchCase('2mp', mode, fmt)
+        for fmt, modes in FORMAT_MODES.items()
+        for mode in modes
+        if (mode, fmt) != ('RGB', 'JPEG')
+    ]
+    cases.append(BenchCase('12mp', 'RGBA', 'PNG'))
+
+    if quick:
+        cases = [case for case in cases if case.size in ('0.3mp', '2mp')]
+    return sorted(cases, key=lambda case: (SIZES[case.size][0] * SIZES[case.size][1], case.name))
+
+
+# ========== CORPUS SYNTHÉTIQUE ==========
+
+def _synthetic_rgb(width, height, seed):
+    """
+    Dessine une image RGB déterministe ressemblant à une photo.
+
+    Dégradés lisses, formes floues et grain : l'encodeur rencontre à la fois
+    des zones uniformes et des détails fins, comme sur une vraie photo.
+    Tout est dessiné avec Pillow à partir d'une graine fixe.
+    """
+    rng = random.Random(seed)
+
+    # Fond : un dégradé différent par canal
+    linear = Image.linear_gradient('L').resize((width, height))
+    radial = Image.radial_gradient('L').resize((width, height))
+    img = Image.merge('RGB', (linear, radial, linear.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+    # Formes colorées, adoucies par un flou
+    shapes = Image.new('RGB', (width, height))
+    draw = ImageDraw.Draw(shapes)
+    for _ in range(60):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(max(width, height) // 40 + 1, max(width, height) // 6 + 2)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+    shapes = shapes.filter(ImageFilter.GaussianBlur(max(width, height) / 300))
+    img = Image.blend(img, shapes, 0.6)
+
+    # Grain : bruit déterministe en tuile (évite de générer 40 MP de bruit)
+    tile = Image.frombytes('L', (256, 256), rng.randbytes(256 * 256))
+    grain = Image.new('L', (width, height))
+    for x in range(0, width, 256):
+        for y in range(0, height, 256):
+            grain.paste(tile, (x, y))
+    return Image.blend(img, Image.merge('RGB', (grain, grain, grain)), 0.08)
+
+
+def build_case_image(case):
+    """
+    Construit l'image d'un cas dans le mode demandé.
+
+    Args:
+        case: BenchCase
+
+    Returns:
+        PIL.Image: Image prête à être enregistrée au format du cas
+    """
+    width, height = case.dimensions
+    img = _synthetic_rgb(width, height, SEED)
+
+    if case.mode == 'RGBA':
+        # Transparence en dégradé : canal alpha réellement utilisé
+        alpha = Image.radial_gradient('L').resize((width, height))
+        img.putalpha(alpha)
+        return img
+    if case.mode == 'P':
+        return img.quantize(colors=256)
+    return img.convert(case.mode)
+
+
+def ensure_corpus(cases, directory):
+    """
+    Génère les fichiers du corpus absents du répertoire.
+
+    Les fichiers sont conservés entre deux exécutions : seuls les cas
+    nouveaux sont générés.
+
+    Args:
+        cases: Liste de BenchCase
+        directory: Répertoire du corpus
+
+    Returns:
+        dict: Nom du cas -> chemin du fichier
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for case in cases:
+        path = os.path.join(directory, case.filename())
+        if not os.path.exists(path):
+            img = build_case_image(case)
+            options = {'quality': 90} if case.format in ('JPEG', 'WEBP') else {}
+            tmp_path = f"{path}.tmp"
+            img.save(tmp_path, format=case.format, **options)
+            os.replace(tmp_path, path)
+        paths[case.name] = path
+    return paths
+
+
+# ========== MESURE ==========
+
+def _proc_status_mb(key):
+    """Lit une valeur mémoire de /proc/self/status (Linux) en MB, ou None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(f'{key}:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb():
+    """
+    RSS crête du processus en MB.
+
+    Sous Linux, VmHWM est préféré à ru_maxrss : ru_maxrss est conservé à
+    travers execve et refléterait la mémoire du processus parent.
+    """
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en Ko ailleurs
+    if sys.platform == 'darwin':
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def _reset_peak_rss():
+    """Remet le compteur de RSS crête à la RSS actuelle (Linux, sinon sans effet)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def run_case(path, repeat, profile=None):
+    """
+    Mesure un cas (exécuté dans un processus dédié, une tâche par processus).
+
+    Le pipeline (build_variants : décodages et encodages de toutes les
+    variantes, sans écriture dans le stockage ni en base) est exécuté
+    `repeat` fois ; la médiane de chaque durée est retenue. La mémoire
+    crête du processus (RSS) et celle des allocations Python
+    (tracemalloc) sont relevées sur l'ensemble des exécutions.
+
+    Args:
+        path: Chemin du fichier du cas
+        repeat: Nombre d'exécutions
+        profile: Profil d'encodage (None = IMAGE_DEFAULT_PROFILE)
+
+    Returns:
+        dict: Durées médianes par étape (ms), durée totale, mémoire crête
+    """
+    import tracemalloc
+    from .utils import build_variants
+
+    # Mémoire à vide (Django et Pillow chargés), puis crête mesurée à partir d'ici
+    rss_before = _proc_status_mb('VmRSS') or _peak_rss_mb()
+    _reset_peak_rss()
+    runs = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        with open(path, 'rb') as source:
+            start = time.perf_counter()
+            result = build_variants(source, profile)
+            total = (time.perf_counter() - start) * 1000
+        runs.append(dict(result.timings, total=total))
+    tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    stages = sorted(set().union(*runs))
+    return {
+        'timings_ms': {
+            stage: round(statistics.median(run[stage] for run in runs if stage in run), 1)
+            for stage in stages
+        },
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'baseline_rss_mb': round(rss_before, 1),
+        'tracemalloc_peak_mb': round(tracemalloc_peak / 1024 / 1024, 1),
+        'quality': result.quality,
+        'output_bytes': {
+            'webp': len(result.webp),
+            'thumbnail': len(result.thumbnail),
+        },
+    }
+
+
+def environment():
+    """Description de la machine et des versions, enregistrée avec les résultats."""
+    import PIL
+    return {
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+# ========== COMPARAISON ==========
+
+def compare(baseline, current, threshold_pct):
+    """
+    Compare deux résultats de benchmark cas par cas et étape par étape.
+
+    Une étape est en régression si elle est plus lente de plus de
+    `threshold_pct` % et d'au moins MIN_REGRESSION_MS (les étapes de
+    quelques millisecondes sont trop bruitées pour un pourcentage seul).
+    La mémoire crête (RSS) est comparée avec le même seuil.
+
+    Args:
+        baseline: Résultats de référence (JSON chargé)
+        current: Nouveaux résultats
+        threshold_pct: Seuil de régression en pourcentage
+
+    Returns:
+        list: Lignes (cas, métrique, référence, actuel, écart %, régression)
+    """
+    rows = []
+    factor = 1 + threshold_pct / 100
+    for name, result in current['cases'].items():
+        reference = baseline['cases'].get(name)
+        if reference is None:
+            continue
+
+        for stage, value in result['timings_ms'].items():
+            before = reference['timings_ms'].get(stage)
+            if not before:
+                continue
+            regression = value > before * factor and value - before >= MIN_REGRESSION_MS
+            rows.append((name, stage, before, value, (value / before - 1) * 100, regression))
+
+        before = reference.get('peak_rss_mb')
+        value = result.get('peak_rss_mb')
+        if before and value:
+            rows.append((name, 'peak_rss_mb', before, value, (value / before - 1) * 100, value > before * factor))
+    return rows
@@ -0,0 +1,257 @@
+"""
+Module de cache des réponses de l'API (liste et détail des images).
+
+Ce module contient :
+- Le cache des données sérialisées, avec le cache Django (CACHES)
+- Les en-têtes de validation (ETag, Last-Modified) et les réponses 304
+- Les mêmes fonctions pour les vues asynchrones (API async du cache)
+- L'invalidation par générations, déclenchée par signaux (regroupés lors
+  des suppressions de QuerySet) et par les opérations groupées
+  (bulk_create, bulk_update) qui n'en émettent pas
+
+Une réponse est rangée sous une clé contenant une génération : un jeton
+remplacé à chaque modification. Invalider ne supprime rien, les anciennes
+entrées ne sont simplement plus lues (et expirent après API_CACHE_TIMEOUT) :
+
+- Génération de la liste : change à chaque modification d'une image
+  (toutes les pages peuvent contenir l'image modifiée)
+- Génération d'une image : change seulement quand cette image est modifiée
+  (détail), ou quand toutes les images sont invalidées (époque, renouvelée
+  aussi quand plus de EPOCH_INVALIDATION_THRESHOLD images changent ensemble)
+
+L'URL absolue complète fait partie de la clé : curseur, limite, champs
+demandés, et hôte (les URLs des fichiers sont absolues).
+"""
+
+import contextlib
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from . import metrics
+from .models import OptimizedImage
+
+
+LIST_GENERATION_KEY = 'images:generation'
+EPOCH_KEY = 'images:epoch'
+
+# Au-delà de ce nombre d'images invalidées ensemble, l'époque est renouvelée :
+# une écriture dans le cache au lieu d'une par image
+EPOCH_INVALIDATION_THRESHOLD = 100
+
+_batch = threading.local()
+
+
+def _image_generation_key(image_id):
+    return f'images:generation:{image_id}'
+
+
+def _new_generation():
+    """Nouveau jeton de génération et sa date (Last-Modified)."""
+    return uuid.uuid4().hex, time.time()
+
+
+# ========== INVALIDATION ==========
+
+def invalidate_images(image_ids=None):
+    """
+    Invalide les réponses en cache des images indiquées (et toutes les listes).
+
+    À appeler après les opérations qui n'émettent pas de signaux
+    (bulk_create, bulk_update, QuerySet.update). Dans une transaction,
+    l'invalidation a lieu après le commit : une requête concurrente ne peut
+    pas mettre en cache l'ancien état sous la nouvelle génération.
+
+    Args:
+        image_ids: IDs des images modifiées (None = toutes les images)
+    """
+    image_ids = list(image_ids) if image_ids is not None else None
+    transaction.on_commit(lambda: _bump(image_ids))
+
+
+def _bump(image_ids):
+    generation = _new_generation()
+    keys = {LIST_GENERATION_KEY: generation}
+    if image_ids is None or len(image_ids) > EPOCH_INVALIDATION_THRESHOLD:
+        keys[EPOCH_KEY] = generation
+    else:
+        keys.update((_image_generation_key(image_id), generation) for image_id in image_ids)
+    cache.set_many(keys, timeout=None)
+
+
+@contextlib.contextmanager
+def batched_invalidation():
+    """
+    Regroupe les invalidations émises par les signaux en une seule.
+
+    Une suppression de QuerySet émet un signal post_delete par image :
+    dans ce bloc, les IDs sont collectés puis invalidés ensemble à la sortie.
+    """
+    if getattr(_batch, 'image_ids', None) is not None:
+        # Bloc imbriqué : le bloc extérieur invalidera
+        yield
+        return
+
+    _batch.image_ids = set()
+    try:
+        yield
+    finally:
+        image_ids, _batch.image_ids = _batch.image_ids, None
+        if image_ids:
+            invalidate_images(image_ids)
+
+
+@receiver(post_save, sender=OptimizedImage, dispatch_uid='images_cache_saved')
+@receiver(post_delete, sender=OptimizedImage, dispatch_uid='images_cache_deleted')
+def _invalidate_on_change(sender, instance, **kwargs):
+    """Upload, ré-optimisation, suppression : invalide l'image et les listes."""
+    image_ids = getattr(_batch, 'image_ids', None)
+    if image_ids is not None:
+        image_ids.add(instance.pk)
+    else:
+        invalidate_images([instance.pk])
+
+
+# ========== RÉPONSES EN CACHE ==========
+
+def _generation_keys(image_id):
+    if image_id is None:
+        return [LIST_GENERATION_KEY]
+    return [EPOCH_KEY, _image_generation_key(image_id)]
+
+
+def _missing_generations(keys, stored):
+    """
+    Générations absentes (cache vidé ou jamais invalidé) : elles sont créées,
+    l'entrée est alors simplement recalculée.
+    """
+    return {key: _new_generation() for key in keys if key not in stored}
+
+
+def _combine(keys, stored):
+    """Génération courante : (jeton, date de dernière modification)."""
+    generations = [stored[key] for key in keys]
+    token = ':'.join(token for token, _ in generations)
+    return token, max(modified for _, modified in generations)
+
+
+def _current_generation(image_id):
+    keys = _generation_keys(image_id)
+    stored = cache.get_many(keys)
+    missing = _missing_generations(keys, stored)
+    if missing:
+        cache.set_many(missing, timeout=None)
+        stored.update(missing)
+    return _combine(keys, stored)
+
+
+async def _acurrent_generation(image_id):
+    keys = _generation_keys(image_id)
+    stored = await cache.aget_many(keys)
+    missing = _missing_generations(keys, stored)
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        stored.update(missing)
+    return _combine(keys, stored)
+
+
+def _response_key(request, token):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'images:response:{token}:{url}'
+
+
+def _entry(data, modified):
+    # Données de la réponse seulement : le rendu (JSON, API navigable) reste négocié
+    return {'data': data, 'etag': _etag(data), 'last_modified': int(modified)}
+
+
+def _etag(data):
+    content = json.dumps(data, sort_keys=True, default=str).encode()
+    return quote_etag(hashlib.md5(content).hexdigest())
+
+
+def _finalize(request, entry, hit, make_response):
+    """Réponse 304 ou complète, avec les en-têtes de validation."""
+    metrics.inc('imageboost_api_cache_total', result='hit' if hit else 'miss')
+
+    response = get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified']
+    )
+    if response is None:
+        response = make_response(entry['data'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    # Le client peut garder la réponse mais doit la revalider (304 si inchangée)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+def cached_response(request, build, image_id=None):
+    """
+    Sert une réponse de l'API depuis le cache, ou la calcule et la met en cache.
+
+    Seules les réponses 200 sont mises en cache. Si le client possède déjà
+    la version courante (If-None-Match, If-Modified-Since), la réponse est
+    un 304 sans corps.
+
+    Args:
+        request: Requête DRF (GET)
+        build: Fonction sans argument qui calcule la Response
+        image_id: ID de l'image (détail) ou None (liste)
+
+    Returns:
+        Response: Réponse avec ETag, Last-Modified et l'en-tête X-Cache (HIT ou MISS)
+    """
+    token, modified = _current_generation(image_id)
+    key = _response_key(request, token)
+
+    entry = cache.get(key)
+    hit = entry is not None
+    if not hit:
+        response = build()
+        if response.status_code != 200:
+            return response
+        entry = _entry(response.data, modified)
+        cache.set(key, entry, settings.API_CACHE_TIMEOUT)
+    return _finalize(request, entry, hit, Response)
+
+
+async def acached_response(request, build, image_id=None):
+    """
+    Version asynchrone de cached_response (vues asynchrones).
+
+    Les entrées sont partagées avec les vues synchrones (mêmes clés).
+
+    Args:
+        request: Requête Django (GET)
+        build: Coroutine sans argument qui retourne (données, statut HTTP)
+        image_id: ID de l'image (détail) ou None (liste)
+
+    Returns:
+        JsonResponse: Réponse avec ETag, Last-Modified et X-Cache
+    """
+    token, modified = await _acurrent_generation(image_id)
+    key = _response_key(request, token)
+
+    entry = await cache.aget(key)
+    hit = entry is not None
+    if not hit:
+        data, status_code = await build()
+        if status_code != 200:
+            return JsonResponse(data, status=status_code)
+        entry = _entry(data, modified)
+        await cache.aset(key, entry, settings.API_CACHE_TIMEOUT)
+    return _finalize(request, entry, hit, JsonResponse)
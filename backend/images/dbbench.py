@@ -0,0 +1,266 @@
+"""
+Module de benchmark de la base de données (SQLite).
+
+Ce module contient :
+- La création d'une base temporaire (alias de connexion ajouté à la volée),
+  avec ou sans les réglages de DATABASES['default'] (PRAGMA, index)
+- Le remplissage par lots avec des lignes réalistes (placeholder ~1 KB,
+  dates de création non monotones)
+- Les mesures : ouverture de connexion, pages de la liste (première page,
+  page profonde, filtre par format), insertions unitaires, et charge mixte
+  (écritures et lectures concurrentes dans des threads)
+
+Utilisé par la commande `bench_db`. La base de l'application n'est jamais
+lue ni modifiée : les tables sont créées directement dans la base
+temporaire (schema_editor), sans passer par les migrations.
+"""
+
+import contextlib
+import os
+import random
+import statistics
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+from .models import ImageVariant, OptimizedImage
+from .pagination import encode_cursor, keyset_page, list_queryset
+
+
+FORMATS = ('JPEG', 'JPEG', 'JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Taille d'une page de la liste (valeur par défaut de l'API)
+PAGE_SIZE = 20
+
+# Graine fixe : les mêmes lignes d'une exécution à l'autre
+SEED = 20240601
+
+
+@contextlib.contextmanager
+def temporary_database(directory, name, tuned):
+    """
+    Ajoute un alias de connexion vers une base SQLite temporaire.
+
+    Args:
+        directory: Répertoire de la base temporaire
+        name: Nom de la configuration (utilisé dans l'alias et le fichier)
+        tuned: True pour reprendre les OPTIONS de la base par défaut (PRAGMA,
+            timeout, transaction_mode), False pour les réglages par défaut de SQLite
+
+    Yields:
+        str: Alias de la connexion
+    """
+    alias = f'dbbench_{name}'
+    default = connections.settings[DEFAULT_DB_ALIAS]
+    connections.settings[alias] = {
+        **default,
+        'NAME': os.path.join(directory, f'{name}.sqlite3'),
+        'OPTIONS': dict(default['OPTIONS']) if tuned else {},
+        'CONN_MAX_AGE': default['CONN_MAX_AGE'] if tuned else 0,
+    }
+    try:
+        yield alias
+    finally:
+        connections[alias].close()
+        del connections.settings[alias]
+
+
+def create_schema(alias, indexed):
+    """
+    Crée les tables des images et des variantes dans la base temporaire.
+
+    Args:
+        alias: Alias de la connexion
+        indexed: False pour supprimer les index de OptimizedImage.Meta.indexes
+    """
+    with connections[alias].schema_editor() as editor:
+        editor.create_model(OptimizedImage)
+        editor.create_model(ImageVariant)
+
+    # Les index sont créés à la sortie du premier bloc (SQL différé)
+    if not indexed:
+        with connections[alias].schema_editor() as editor:
+            for index in OptimizedImage._meta.indexes:
+                editor.remove_index(OptimizedImage, index)
+
+
+def _row(rng, number):
+    stem = f'{rng.getrandbits(128):032x}'
+    size = rng.randint(50_000, 8_000_000)
+    webp_size = size // rng.randint(3, 10)
+    return OptimizedImage(
+        original_name=f'photo-{number}.jpg',
+        original_file=f'originals/{stem[:2]}/{stem[2:4]}/{stem}.jpg',
+        original_size=size,
+        content_hash=f'{rng.getrandbits(256):064x}',
+        webp_file=f'webp/{stem[:2]}/{stem[2:4]}/{stem}.webp',
+        thumbnail=f'thumbnails/{stem[:2]}/{stem[2:4]}/thumb_{stem}.jpg',
+        webp_size=webp_size,
+        thumbnail_size=rng.randint(4_000, 20_000),
+        size_reduction=round((1 - webp_size / size) * 100, 2),
+        blur_placeholder='data:image/jpeg;base64,' + 'A' * 1000,
+        blurhash='LEHV6nWB2yk8pyo0adR*.7kCMdnj',
+        width=rng.randint(640, 6000),
+        height=rng.randint(480, 4000),
+        format=rng.choice(FORMATS),
+    )
+
+
+def populate(alias, rows, batch_size=5000):
+    """
+    Insère `rows` images par lots, puis étale leurs dates de création.
+
+    Les dates ne suivent pas l'ordre des IDs (comme après un import) : la
+    base ne peut pas trier la liste en parcourant simplement la clé primaire.
+
+    Yields:
+        int: Nombre de lignes insérées jusqu'ici
+    """
+    rng = random.Random(SEED)
+    images = OptimizedImage.objects.using(alias)
+    for start in range(0, rows, batch_size):
+        count = min(batch_size, rows - start)
+        images.bulk_create([_row(rng, start + i) for i in range(count)])
+        yield start + count
+
+    # auto_now_add a fixé la même date pour tout le lot : une date par ligne
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {OptimizedImage._meta.db_table} "
+            "SET created_at = datetime('2024-01-01', '+' || ((id * 7919) %% %s) || ' minutes')",
+            [rows],
+        )
+
+
+def _timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summary(samples):
+    """Médiane et 95e centile (ms)."""
+    if len(samples) < 2:
+        return {'p50': round(samples[0], 2) if samples else None, 'p95': None}
+    return {
+        'p50': round(statistics.median(samples), 2),
+        'p95': round(statistics.quantiles(samples, n=20)[18], 2),
+    }
+
+
+def _plan(queryset):
+    """Plan d'exécution résumé : index utilisé, tri en mémoire (TEMP B-TREE) ou non."""
+    return ' | '.join(line.strip() for line in queryset.explain().splitlines())
+
+
+def measure(alias, repeat=50, inserts=200, writers=4, readers=4, writes_per_thread=50):
+    """
+    Mesure les latences de la base temporaire (déjà remplie).
+
+    Args:
+        alias: Alias de la connexion
+        repeat: Nombre de mesures par lecture
+        inserts: Nombre d'insertions unitaires mesurées (une transaction chacune)
+        writers: Threads d'écriture de la charge mixte
+        readers: Threads de lecture de la charge mixte (première page en boucle)
+        writes_per_thread: Insertions par thread d'écriture
+
+    Returns:
+        dict: Latences (p50, p95 en ms), débit de la charge mixte, plans d'exécution
+    """
+    connection = connections[alias]
+    images = list_queryset(None).using(alias)
+    rows = OptimizedImage.objects.using(alias).count()
+
+    def connect():
+        connection.close()
+        connection.ensure_connection()
+
+    # Curseur au milieu de la liste : la page profonde a le même coût que la première
+    middle = images.order_by('-created_at', '-id')[rows // 2]
+    deep_cursor = encode_cursor(middle)
+    by_format = images.filter(format='PNG').order_by('-created_at', '-id')
+
+    results = {
+        'rows': rows,
+        'connect': _summary(_timed(connect, repeat)),
+        'list_first_page': _summary(_timed(lambda: keyset_page(images, None, PAGE_SIZE), repeat)),
+        'list_deep_page': _summary(_timed(lambda: keyset_page(images, deep_cursor, PAGE_SIZE), repeat)),
+        'list_by_format': _summary(_timed(lambda: list(by_format[:PAGE_SIZE]), repeat)),
+        'plans': {
+            'list': _plan(images.order_by('-created_at', '-id')[:PAGE_SIZE + 1]),
+            'by_format': _plan(by_format[:PAGE_SIZE]),
+        },
+    }
+
+    rng = random.Random(SEED + 1)
+    writes = OptimizedImage.objects.using(alias)
+    results['insert'] = _summary(
+        _timed(lambda: writes.bulk_create([_row(rng, 0)]), inserts)
+    )
+    results['mixed'] = _mixed_workload(alias, writers, readers, writes_per_thread)
+    return results
+
+
+def _mixed_workload(alias, writers, readers, writes_per_thread):
+    """
+    Écritures et lectures concurrentes (une connexion par thread, comme les
+    threads d'un serveur WSGI).
+
+    Returns:
+        dict: Latences des écritures et des lectures, débit d'écriture, erreurs de verrou
+    """
+    write_samples, read_samples, errors = [], [], []
+    done = threading.Event()
+
+    def writer(seed):
+        rng = random.Random(seed)
+        images = OptimizedImage.objects.using(alias)
+        try:
+            for _ in range(writes_per_thread):
+                start = time.perf_counter()
+                try:
+                    images.bulk_create([_row(rng, 0)])
+                except OperationalError as e:
+                    errors.append(str(e))
+                    continue
+                write_samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections[alias].close()
+
+    def reader():
+        images = list_queryset(None).using(alias)
+        try:
+            while not done.is_set():
+                start = time.perf_counter()
+                try:
+                    keyset_page(images, None, PAGE_SIZE)
+                except OperationalError as e:
+                    errors.append(str(e))
+                    continue
+                read_samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections[alias].close()
+
+    write_threads = [threading.Thread(target=writer, args=(SEED + i,)) for i in range(writers)]
+    read_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    start = time.perf_counter()
+    for thread in write_threads + read_threads:
+        thread.start()
+    for thread in write_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in read_threads:
+        thread.join()
+
+    return {
+        'write': _summary(write_samples),
+        'read': _summary(read_samples),
+        'writes_per_second': round(len(write_samples) / elapsed, 1),
+        'lock_errors': len(errors),
+    }
@@ -0,0 +1,312 @@
+"""
+Module de génération de dérivés à la demande.
+
+Ce module contient :
+- La validation des paramètres de rendu (liste blanche de tailles et qualités)
+- La génération d'un dérivé redimensionné/transcodé depuis l'original
+- Un cache disque borné en octets avec éviction LRU, qui regroupe les
+  requêtes concurrentes pour un même dérivé (un seul encodage)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .admission import admit, inspect_image
+from .encoders import FORMATS
+from .locks import KeyedLock
+from .utils import decode_reduced, shrink_to_fit
+
+
+# Modes de redimensionnement acceptés
+#   contain : tient dans la boîte w×h, ratio préservé (jamais agrandi)
+#   cover   : remplit la boîte w×h, ratio préservé, recadré au centre
+#   fill    : étiré exactement à w×h
+FITS = ('contain', 'cover', 'fill')
+
+# Formats de sortie acceptés (paramètre `fmt`, voir encoders.FORMATS)
+RENDER_FORMATS = ('webp', 'jpeg', 'png')
+
+
+@dataclass(frozen=True)
+class RenderParams:
+    """
+    Paramètres validés d'un rendu (`?w=&h=&fit=&fmt=&q=`).
+    """
+
+    width: int
+    height: int
+    fit: str
+    fmt: str
+    quality: int
+
+    @property
+    def content_type(self):
+        return FORMATS[self.fmt][1]
+
+    def cache_key(self, original_name):
+        """
+        Clé de cache d'un dérivé.
+
+        La clé dépend du nom du fichier original et non de l'ID : les
+        doublons (même fichier) partagent ainsi leurs dérivés.
+        """
+        raw = f"{original_name}|{self.width}|{self.height}|{self.fit}|{self.fmt}|{self.quality}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _parse_choice(params, name, allowed, default):
+    """Lit un paramètre entier et vérifie qu'il est dans la liste blanche."""
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if value not in allowed:
+        raise ValueError(f"'{name}' must be one of: {', '.join(map(str, allowed))}")
+    return value
+
+
+def parse_render_params(params):
+    """
+    Valide les paramètres de requête d'un rendu.
+
+    Seules les tailles et qualités de la liste blanche sont acceptées :
+    le nombre de dérivés possibles par image reste ainsi borné.
+
+    Args:
+        params: QueryDict de la requête (request.query_params)
+
+    Returns:
+        RenderParams: Paramètres validés
+
+    Raises:
+        ValueError: Si un paramètre est absent, invalide ou hors liste blanche
+    """
+    width = _parse_choice(params, 'w', settings.RENDER_ALLOWED_WIDTHS, 0)
+    height = _parse_choice(params, 'h', settings.RENDER_ALLOWED_HEIGHTS, 0)
+    if not width and not height:
+        raise ValueError("At least one of 'w' or 'h' is required")
+
+    fit = params.get('fit') or 'contain'
+    if fit not in FITS:
+        raise ValueError(f"'fit' must be one of: {', '.join(FITS)}")
+    if fit != 'contain' and not (width and height):
+        raise ValueError(f"fit={fit} requires both 'w' and 'h'")
+
+    fmt = (params.get('fmt') or 'webp').lower()
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"'fmt' must be one of: {', '.join(RENDER_FORMATS)}")
+
+    quality = _parse_choice(
+        params, 'q', settings.RENDER_ALLOWED_QUALITIES, settings.RENDER_DEFAULT_QUALITY
+    )
+
+    return RenderParams(width=width, height=height, fit=fit, fmt=fmt, quality=quality)
+
+
+def render_derivative(source, params):
+    """
+    Génère un dérivé depuis l'image originale.
+
+    L'original est décodé à résolution réduite quand la cible est beaucoup
+    plus petite (décodage "draft" pour les JPEG), et jamais au-delà du
+    budget de pixels. Comme à l'upload, une grande image réserve une place
+    (admit) pendant le décodage et l'encodage.
+
+    Args:
+        source: Fichier ouvert de l'image originale
+        params: RenderParams validés
+
+    Returns:
+        bytes: Contenu encodé du dérivé
+
+    Raises:
+        ServerBusy: Si IMAGE_MAX_LARGE_JOBS grandes images sont déjà en cours
+        ImageTooLarge: Si l'original dépasse les limites de inspect_image
+    """
+    info = inspect_image(source)
+    with admit(info):
+        return _render(source, params, info.width, info.height)
+
+
+def _render(source, params, src_width, src_height):
+    # Boîte de décodage : taille que l'image aura à l'échelle de la cible
+    width = params.width or src_width
+    height = params.height or src_height
+    if params.fit == 'contain':
+        scale = min(width / src_width, height / src_height)
+    else:
+        scale = max(width / src_width, height / src_height)
+    box = (max(1, round(src_width * scale)), max(1, round(src_height * scale)))
+
+    img, _ = decode_reduced(source, box)
+
+    if params.fit == 'contain':
+        img = shrink_to_fit(img, (width, height))
+    elif params.fit == 'cover':
+        img = ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
+    else:
+        img = img.resize((width, height), Image.Resampling.LANCZOS)
+
+    pil_format = FORMATS[params.fmt][0]
+    buffer = BytesIO()
+    if pil_format == 'PNG':
+        img.save(buffer, format='PNG', optimize=True)
+    else:
+        img.save(buffer, format=pil_format, quality=params.quality)
+    return buffer.getvalue()
+
+
+class DerivativeCache:
+    """
+    Cache disque des dérivés, borné en octets, avec éviction LRU.
+
+    Les fichiers sont écrits dans un fichier temporaire puis renommés
+    (os.replace) : un lecteur ne voit jamais un fichier partiel. La date de
+    modification sert de date de dernier accès pour l'éviction.
+
+    Les requêtes concurrentes d'un même processus pour un même dérivé sont
+    regroupées par un verrou par clé : un seul thread encode, les autres
+    attendent puis lisent le fichier. Entre processus, un encodage en double
+    reste possible mais sans risque grâce au renommage atomique.
+    """
+
+    # Intervalle minimal entre deux mises à jour de la date d'accès d'un fichier
+    TOUCH_INTERVAL = 60
+
+    # Après une éviction, le cache redescend à cette fraction du budget
+    LOW_WATERMARK = 0.9
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._locks = KeyedLock()
+        self._guard = threading.Lock()
+        self._total_bytes = None
+
+    def _path(self, key, extension):
+        # Un sous-dossier par préfixe de clé pour éviter un répertoire géant
+        return os.path.join(self.directory, key[:2], f"{key}.{extension}")
+
+    def _touch(self, path):
+        """Marque un fichier comme récemment utilisé (LRU)."""
+        try:
+            if time.time() - os.stat(path).st_mtime > self.TOUCH_INTERVAL:
+                os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def get_or_create(self, key, extension, producer):
+        """
+        Retourne le chemin d'un dérivé, en le générant s'il est absent.
+
+        Args:
+            key: Clé de cache (RenderParams.cache_key)
+            extension: Extension du fichier
+            producer: Fonction sans argument retournant les octets du dérivé
+
+        Returns:
+            tuple: (chemin du fichier, True si trouvé en cache)
+        """
+        path = self._path(key, extension)
+        if os.path.exists(path):
+            self._touch(path)
+            return path, True
+
+        with self._locks.hold(key):
+            # Un autre thread a pu générer le dérivé pendant l'attente
+            if os.path.exists(path):
+                return path, True
+
+            data = producer()
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        self._account(len(data))
+        return path, False
+
+    def _scan(self):
+        """Liste les fichiers du cache : [(date d'accès, taille, chemin)]."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _account(self, added_bytes):
+        """Met à jour la taille totale et déclenche l'éviction si le budget est dépassé."""
+        with self._guard:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += added_bytes
+            over_budget = self._total_bytes > self.max_bytes
+
+        if over_budget:
+            self.evict()
+
+    def evict(self):
+        """
+        Supprime les dérivés les moins récemment utilisés jusqu'à repasser
+        sous LOW_WATERMARK × budget.
+
+        La taille est recalculée depuis le disque : elle reste juste même si
+        plusieurs processus partagent le cache.
+
+        Returns:
+            int: Nombre de fichiers supprimés
+        """
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.LOW_WATERMARK
+        removed = 0
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        with self._guard:
+            self._total_bytes = total
+        return removed
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Retourne le cache de dérivés du processus (créé à la première utilisation)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DerivativeCache(settings.RENDER_CACHE_DIR, settings.RENDER_CACHE_MAX_BYTES)
+        return _cache
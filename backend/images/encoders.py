@@ -0,0 +1,201 @@
+"""
+Module de configuration des encodeurs et de négociation de format.
+
+Ce module contient :
+- L'encodage d'une image selon les réglages par format (IMAGE_ENCODERS)
+- Les profils d'encodage choisis à l'upload (IMAGE_ENCODING_PROFILES)
+- La détection du support AVIF (natif ou via pillow-avif-plugin)
+- Le choix du format servi selon l'en-tête HTTP `Accept`
+"""
+
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+
+try:
+    # Dépendance optionnelle : enregistre l'encodeur AVIF dans Pillow
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pillow_avif = None
+
+
+# Format logique -> (format Pillow, type MIME, extension)
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', 'avif'),
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+    'png': ('PNG', 'image/png', 'png'),
+}
+
+# Clés de IMAGE_ENCODERS qui ne sont pas des options de Image.save()
+_CONTROL_KEYS = ('enabled', 'lazy')
+
+def encoder_settings(fmt):
+    """
+    Retourne la configuration d'un format (IMAGE_ENCODERS).
+
+    Args:
+        fmt: Format logique ("avif", "webp" ou "jpeg")
+
+    Returns:
+        dict: Configuration du format (vide si non configuré)
+    """
+    return settings.IMAGE_ENCODERS.get(fmt, {})
+
+
+def resolve_profile(name):
+    """
+    Valide un nom de profil d'encodage.
+
+    Args:
+        name: Nom demandé (vide ou None = IMAGE_DEFAULT_PROFILE)
+
+    Returns:
+        str: Nom du profil
+
+    Raises:
+        ValueError: Si le profil n'existe pas dans IMAGE_ENCODING_PROFILES
+    """
+    name = name or settings.IMAGE_DEFAULT_PROFILE
+    if name not in settings.IMAGE_ENCODING_PROFILES:
+        raise ValueError(
+            f"Unknown encoding profile '{name}'. "
+            f"Allowed: {', '.join(settings.IMAGE_ENCODING_PROFILES)}"
+        )
+    return name
+
+
+def profile_settings(name):
+    """
+    Retourne la configuration d'un profil (IMAGE_ENCODING_PROFILES).
+
+    Args:
+        name: Nom du profil (vide ou None = profil par défaut)
+
+    Returns:
+        dict: Réglages par format et paramètres de recherche de qualité
+    """
+    return settings.IMAGE_ENCODING_PROFILES[resolve_profile(name)]
+
+
+def encoder_options(fmt, profile=None, quality=None):
+    """
+    Options de Image.save() d'un format : IMAGE_ENCODERS, surchargé par le profil.
+
+    Args:
+        fmt: Format logique ("avif", "webp" ou "jpeg")
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        quality: Qualité imposée (résultat d'une recherche), prioritaire
+
+    Returns:
+        dict: Options à passer à Image.save()
+    """
+    options = {
+        key: value for key, value in encoder_settings(fmt).items()
+        if key not in _CONTROL_KEYS
+    }
+    options.update(profile_settings(profile).get(fmt, {}))
+    if quality is not None:
+        options['quality'] = quality
+    return options
+
+
+def quality_target(profile):
+    """
+    Paramètres de recherche de qualité d'un profil, ou None s'il a une qualité fixe.
+
+    Args:
+        profile: Nom du profil d'encodage
+
+    Returns:
+        tuple: (SSIM cible, qualité minimale, qualité maximale) ou None
+    """
+    config = profile_settings(profile)
+    if not config.get('target_ssim'):
+        return None
+    return config['target_ssim'], config.get('quality_min', 30), config.get('quality_max', 95)
+
+
+def avif_available():
+    """Indique si Pillow sait encoder en AVIF dans cet environnement."""
+    return 'AVIF' in Image.SAVE
+
+
+def avif_enabled():
+    """Indique si l'AVIF est activé dans la configuration et disponible."""
+    return bool(encoder_settings('avif').get('enabled')) and avif_available()
+
+
+def avif_eager():
+    """Indique si l'AVIF doit être généré à l'optimisation (et non à la demande)."""
+    return avif_enabled() and not encoder_settings('avif').get('lazy', True)
+
+
+def encode(img, fmt, profile=None, quality=None):
+    """
+    Encode une image avec les réglages configurés pour ce format et ce profil.
+
+    Args:
+        img: Image RGB à encoder
+        fmt: Format logique ("avif", "webp" ou "jpeg")
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        quality: Qualité imposée (résultat d'une recherche de qualité)
+
+    Returns:
+        bytes: Contenu du fichier encodé
+    """
+    options = encoder_options(fmt, profile, quality)
+    buffer = BytesIO()
+    img.save(buffer, format=FORMATS[fmt][0], **options)
+    return buffer.getvalue()
+
+
+def _parse_accept(accept_header):
+    """
+    Analyse un en-tête Accept en dictionnaire {type MIME: q}.
+
+    Args:
+        accept_header: Valeur brute de l'en-tête (ex: "image/avif,image/webp,*/*;q=0.8")
+
+    Returns:
+        dict: Qualité (q) associée à chaque type
+    """
+    accepted = {}
+    for part in accept_header.split(','):
+        pieces = [piece.strip() for piece in part.split(';')]
+        media_type = pieces[0].lower()
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[media_type] = quality
+    return accepted
+
+
+def negotiate_format(accept_header):
+    """
+    Choisit le meilleur format servi selon l'en-tête Accept du client.
+
+    L'ordre de préférence est AVIF, puis WebP, puis JPEG (accepté par tous
+    les navigateurs). Un type n'est retenu que s'il est cité explicitement :
+    `*/*` seul ne garantit pas qu'un client décode l'AVIF ou le WebP.
+
+    Args:
+        accept_header: Valeur de l'en-tête HTTP Accept (peut être vide)
+
+    Returns:
+        str: Format logique ("avif", "webp" ou "jpeg")
+    """
+    accepted = _parse_accept(accept_header or '')
+
+    if avif_enabled() and accepted.get('image/avif', 0) > 0:
+        return 'avif'
+    if accepted.get('image/webp', 0) > 0:
+        return 'webp'
+    return 'jpeg'
@@ -0,0 +1,50 @@
+"""
+Module de verrous par clé.
+
+Permet de regrouper les requêtes concurrentes d'un même processus qui
+veulent produire le même fichier (dérivé, variante AVIF à la demande) :
+un seul thread fait le travail, les autres attendent son résultat.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class KeyedLock:
+    """
+    Ensemble de verrous indexés par une clé (chaîne).
+
+    Les verrous sont créés à la demande. Chaque entrée compte les threads
+    qui détiennent ou attendent son verrou ; elle n'est oubliée que lorsque
+    ce compte retombe à zéro, le dictionnaire ne grossit donc pas avec le
+    nombre de clés vues, et deux threads ne peuvent jamais obtenir deux
+    verrous différents pour la même clé.
+    """
+
+    def __init__(self):
+        # clé -> [verrou, nombre de threads qui le détiennent ou l'attendent]
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def hold(self, key):
+        """
+        Acquiert le verrou associé à `key` pendant le bloc `with`.
+
+        Args:
+            key: Clé identifiant la ressource à produire
+        """
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
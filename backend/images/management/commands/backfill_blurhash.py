@@ -0,0 +1,49 @@
+"""
+Commande de gestion : rattrapage des BlurHash.
+
+Usage :
+    python manage.py backfill_blurhash                    # lots de 500 images
+    python manage.py backfill_blurhash --batch-size 2000
+
+Calcule le BlurHash des images optimisées avant son introduction, à partir
+de leur miniature (aucun original n'est décodé).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from images.models import OptimizedImage
+from images.placeholders import backfill_blurhash
+
+
+class Command(BaseCommand):
+    """
+    Calcule et enregistre le BlurHash des images qui n'en ont pas, par lots.
+    """
+
+    help = "Calcule le BlurHash des images existantes depuis leur miniature"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre d'images lues et mises à jour par lot",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        components = tuple(settings.BLURHASH_COMPONENTS)
+        total = 0
+        missing_total = 0
+
+        for updated, missing in backfill_blurhash(OptimizedImage, components, batch_size):
+            total += updated
+            missing_total += len(missing)
+            for name in missing:
+                self.stderr.write(f"Miniature illisible : {name}")
+            self.stdout.write(f"{total} images mises à jour")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Terminé : {total} images mises à jour, {missing_total} miniatures illisibles"
+        ))
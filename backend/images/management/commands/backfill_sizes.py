@@ -0,0 +1,49 @@
+"""
+Commande de gestion : rattrapage des tailles de fichiers.
+
+Usage :
+    python manage.py backfill_sizes                    # lots de 500 images
+    python manage.py backfill_sizes --batch-size 2000
+
+Renseigne webp_size, thumbnail_size et size_reduction des images dont la
+taille WebP n'est pas encore enregistrée (la migration 0007 le fait une
+fois ; la commande permet de relancer le rattrapage, par exemple après une
+restauration de fichiers).
+"""
+
+from django.core.management.base import BaseCommand
+
+from images.models import OptimizedImage
+from images.storage import backfill_file_sizes
+
+
+class Command(BaseCommand):
+    """
+    Lit la taille des fichiers dans le stockage et l'enregistre en base, par lots.
+    """
+
+    help = "Enregistre en base la taille des fichiers WebP et des miniatures"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre d'images lues et mises à jour par lot",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        total = 0
+        missing_total = 0
+
+        for updated, missing in backfill_file_sizes(OptimizedImage, batch_size):
+            total += updated
+            missing_total += len(missing)
+            for name in missing:
+                self.stderr.write(f"Fichier introuvable : {name}")
+            self.stdout.write(f"{total} images mises à jour")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Terminé : {total} images mises à jour, {missing_total} fichiers introuvables"
+        ))
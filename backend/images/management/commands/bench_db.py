@@ -0,0 +1,120 @@
+"""
+Commande de gestion : benchmark de la base de données (SQLite).
+
+Usage :
+    python manage.py bench_db                          # 100 000 lignes, réglages courants
+    python manage.py bench_db --baseline               # compare aux réglages par défaut de SQLite
+    python manage.py bench_db --rows 20000 --output db.json
+
+Les mesures sont faites sur une base temporaire remplie pour l'occasion
+(alias de connexion ajouté à la volée) : la base de l'application n'est ni
+lue ni modifiée. Avec --baseline, la même mesure est faite sur une base sans
+PRAGMA, sans index (OptimizedImage.Meta.indexes) et sans connexion persistante.
+"""
+
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from images import metrics
+from images.dbbench import create_schema, measure, populate, temporary_database
+
+
+# Configurations mesurées : nom -> (OPTIONS de DATABASES['default'], index du modèle)
+CONFIGURATIONS = {
+    'tuned': (True, True),
+    'baseline': (False, False),
+}
+
+
+class Command(BaseCommand):
+    """
+    Mesure les latences de lecture et d'écriture de la base sur une table volumineuse.
+    """
+
+    help = "Mesure les latences de la liste et des insertions sur une base SQLite temporaire"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100_000,
+            help="Nombre d'images insérées avant les mesures",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help="Nombre de mesures par lecture",
+        )
+        parser.add_argument(
+            '--inserts',
+            type=int,
+            default=200,
+            help="Nombre d'insertions unitaires mesurées",
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help="Threads d'écriture et de lecture de la charge mixte (chacun)",
+        )
+        parser.add_argument(
+            '--baseline',
+            action='store_true',
+            help="Mesurer aussi une base sans PRAGMA ni index, pour comparaison",
+        )
+        parser.add_argument(
+            '--output',
+            help="Fichier JSON où écrire les résultats",
+        )
+
+    def handle(self, *args, **options):
+        # Mesures de banc d'essai : hors des métriques du service
+        metrics.disable()
+
+        names = list(CONFIGURATIONS) if options['baseline'] else ['tuned']
+        results = {}
+
+        with tempfile.TemporaryDirectory(prefix='bench-db-') as directory:
+            for name in names:
+                tuned, indexed = CONFIGURATIONS[name]
+                with temporary_database(directory, name, tuned) as alias:
+                    create_schema(alias, indexed)
+                    self.stdout.write(f"[{name}] Remplissage ({options['rows']} lignes)...")
+                    for inserted in populate(alias, max(options['rows'], 1)):
+                        if inserted % 50_000 == 0:
+                            self.stdout.write(f"[{name}] {inserted} lignes")
+                    results[name] = measure(
+                        alias,
+                        repeat=max(options['repeat'], 2),
+                        inserts=max(options['inserts'], 2),
+                        writers=options['threads'],
+                        readers=options['threads'],
+                    )
+                self._report(name, results[name])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['output']}")
+        self.stdout.write(self.style.SUCCESS("Terminé"))
+
+    def _report(self, name, result):
+        self.stdout.write(f"[{name}] {result['rows']} lignes  (p50 / p95, ms)")
+        for metric in ('connect', 'list_first_page', 'list_deep_page', 'list_by_format', 'insert'):
+            self._line(metric, result[metric])
+        mixed = result['mixed']
+        self._line('mixed_write', mixed['write'])
+        self._line('mixed_read', mixed['read'])
+        self.stdout.write(
+            f"  {'mixed':<18} {mixed['writes_per_second']:>9.1f} écritures/s  "
+            f"{mixed['lock_errors']} erreur(s) de verrou"
+        )
+        for query, plan in result['plans'].items():
+            self.stdout.write(f"  plan {query:<13} {plan}")
+
+    def _line(self, metric, summary):
+        p95 = f"{summary['p95']:>9.2f}" if summary['p95'] is not None else f"{'-':>9}"
+        self.stdout.write(f"  {metric:<18} {summary['p50']:>9.2f} {p95}")
@@ -0,0 +1,178 @@
+"""
+Commande de gestion : benchmark du pipeline d'optimisation.
+
+Usage :
+    python manage.py benchmark                              # corpus complet -> bench.json
+    python manage.py benchmark --quick --repeat 1          # cas de 2 MP ou moins
+    python manage.py benchmark --case png --output png.json
+    python manage.py benchmark --profile fast --output fast.json
+    python manage.py benchmark --compare baseline.json     # mesure puis compare
+    python manage.py benchmark --compare baseline.json --against bench.json
+
+Chaque cas est mesuré dans un processus neuf : la mémoire crête (RSS) d'un
+cas n'est pas faussée par les cas précédents. Avec --compare, la commande
+échoue (code de sortie non nul) si une étape régresse au-delà du seuil.
+"""
+
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from images import metrics
+from images.benchmark import compare, default_cases, ensure_corpus, environment, run_case
+from images.tasks import init_worker
+
+
+class Command(BaseCommand):
+    """
+    Mesure le pipeline sur un corpus synthétique déterministe et compare à une référence.
+    """
+
+    help = "Mesure les performances du pipeline d'optimisation d'images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='bench.json',
+            help="Fichier JSON où écrire les résultats",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help="Nombre d'exécutions par cas (la médiane est retenue)",
+        )
+        parser.add_argument(
+            '--quick',
+            action='store_true',
+            help="Seulement les cas de 2 MP ou moins",
+        )
+        parser.add_argument(
+            '--case',
+            action='append',
+            default=[],
+            help="Ne garder que les cas dont le nom contient ce texte (ex: 40mp, png). Répétable",
+        )
+        parser.add_argument(
+            '--profile',
+            default=settings.IMAGE_DEFAULT_PROFILE,
+            choices=list(settings.IMAGE_ENCODING_PROFILES),
+            help="Profil d'encodage mesuré (IMAGE_ENCODING_PROFILES)",
+        )
+        parser.add_argument(
+            '--corpus-dir',
+            default=str(settings.BASE_DIR / 'tmp' / 'bench-corpus'),
+            help="Répertoire du corpus généré (réutilisé entre deux exécutions)",
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='BASELINE',
+            help="Fichier JSON de référence à comparer aux résultats",
+        )
+        parser.add_argument(
+            '--against',
+            metavar='RESULTS',
+            help="Compare ce fichier de résultats au lieu de lancer une mesure",
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=10.0,
+            help="Seuil de régression en pourcentage (défaut : 10)",
+        )
+
+    def handle(self, *args, **options):
+        # Mesures de banc d'essai : hors des métriques du service (pool compris)
+        metrics.disable()
+
+        if options['against']:
+            if not options['compare']:
+                raise CommandError("--against nécessite --compare")
+            current = self._load(options['against'])
+        else:
+            current = self._measure(options)
+            with open(options['output'], 'w') as f:
+                json.dump(current, f, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['output']}")
+
+        if options['compare']:
+            self._compare(self._load(options['compare']), current, options['threshold'])
+
+    def _load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Impossible de lire {path} : {e}")
+
+    # ========== MESURE ==========
+
+    def _measure(self, options):
+        cases = default_cases(quick=options['quick'])
+        if options['case']:
+            cases = [case for case in cases if any(text in case.name for text in options['case'])]
+        if not cases:
+            raise CommandError("Aucun cas ne correspond aux filtres")
+
+        self.stdout.write(f"Préparation du corpus ({len(cases)} cas)...")
+        paths = ensure_corpus(cases, options['corpus_dir'])
+
+        results = {
+            'environment': environment(),
+            'repeat': options['repeat'],
+            'profile': options['profile'],
+            'cases': {},
+        }
+
+        # Un processus neuf par cas : la RSS crête est propre à chaque cas
+        executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            max_tasks_per_child=1,
+        )
+        try:
+            for case in cases:
+                width, height = case.dimensions
+                measured = executor.submit(
+                    run_case, paths[case.name], max(options['repeat'], 1), options['profile']
+                ).result()
+                results['cases'][case.name] = {
+                    'width': width,
+                    'height': height,
+                    'mode': case.mode,
+                    'format': case.format,
+                    **measured,
+                }
+                timings = measured['timings_ms']
+                self.stdout.write(
+                    f"{case.name:<20} total {timings['total']:>9.1f} ms  "
+                    f"decode {timings['decode']:>8.1f} ms  webp {timings['webp']:>8.1f} ms  "
+                    f"RSS {measured['peak_rss_mb']:>7.1f} MB  "
+                    f"q{measured['quality']} {measured['output_bytes']['webp'] / 1024:>8.1f} KB"
+                )
+        finally:
+            executor.shutdown(wait=True)
+        return results
+
+    # ========== COMPARAISON ==========
+
+    def _compare(self, baseline, current, threshold):
+        rows = compare(baseline, current, threshold)
+        if not rows:
+            raise CommandError("Aucun cas commun entre les deux résultats")
+
+        regressions = [row for row in rows if row[5]]
+        for name, metric, before, value, delta, regression in rows:
+            if regression or abs(delta) >= threshold:
+                marker = 'RÉGRESSION' if regression else 'amélioration' if delta < 0 else ''
+                self.stdout.write(
+                    f"{name:<20} {metric:<24} {before:>10.1f} -> {value:>10.1f} ({delta:+.1f} %) {marker}"
+                )
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} régression(s) au-delà de {threshold} %")
+        self.stdout.write(self.style.SUCCESS(f"Aucune régression au-delà de {threshold} %"))
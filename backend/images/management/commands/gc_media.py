@@ -0,0 +1,74 @@
+"""
+Commande de gestion : suppression des fichiers orphelins.
+
+Usage :
+    python manage.py gc_media --dry-run             # liste les orphelins sans rien supprimer
+    python manage.py gc_media                       # supprime les orphelins de plus d'une heure
+    python manage.py gc_media --min-age 86400 --chunk-size 50000
+
+Un fichier est orphelin quand aucun enregistrement (image ou variante) ne
+le référence : suppression interrompue, fichiers conservés par
+`shard_media --keep-old`, restauration partielle. Seuls les dossiers écrits
+par l'application (originals, webp, thumbnails, variants) sont parcourus.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from images.storage import collect_orphaned_files
+
+
+class Command(BaseCommand):
+    """
+    Parcourt MEDIA_ROOT par paquets et supprime (ou liste) les fichiers non référencés.
+    """
+
+    help = "Supprime les fichiers média qu'aucun enregistrement ne référence"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Lister les orphelins sans les supprimer",
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help="Âge minimum en secondes d'un fichier supprimable (protège les uploads en cours)",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help="Nombre de fichiers comparés à la base par paquet",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        scanned = {}
+        orphans = {}
+        freed = 0
+
+        try:
+            for directory, count, found in collect_orphaned_files(
+                min_age=max(options['min_age'], 0),
+                chunk_size=max(options['chunk_size'], 1),
+                delete=not dry_run,
+            ):
+                scanned[directory] = scanned.get(directory, 0) + count
+                orphans[directory] = orphans.get(directory, 0) + len(found)
+                freed += sum(size for _, size in found)
+                if dry_run or options['verbosity'] > 1:
+                    for name, size in found:
+                        self.stdout.write(f"{name} ({size} octets)")
+                self.stdout.write(
+                    f"{directory} : {scanned[directory]} fichiers parcourus, {orphans[directory]} orphelins"
+                )
+        except NotImplementedError:
+            raise CommandError("gc_media ne gère que le stockage sur disque (FileSystemStorage)")
+
+        action = "à supprimer" if dry_run else "supprimés"
+        self.stdout.write(self.style.SUCCESS(
+            f"Terminé : {sum(scanned.values())} fichiers parcourus, {sum(orphans.values())} orphelins {action} "
+            f"({freed / 1024 / 1024:.1f} MB)"
+        ))
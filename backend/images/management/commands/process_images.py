@@ -0,0 +1,124 @@
+"""
+Commande de gestion : worker de la file d'attente d'optimisation.
+
+Usage :
+    python manage.py process_images               # tourne en continu
+    python manage.py process_images --once        # vide la file puis s'arrête
+    python manage.py process_images --workers 4   # taille du pool de processus
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from images.tasks import claim_jobs, init_worker, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    """
+    Consomme les jobs OptimizationJob avec un pool de processus.
+
+    Le processus principal réserve les jobs en base et les distribue au pool,
+    un job par processus libre ; chaque processus enfant exécute
+    optimize_image sur sa propre connexion.
+    """
+
+    help = "Traite la file d'attente des optimisations d'images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.IMAGE_WORKER_PROCESSES,
+            help="Nombre de processus d'encodage (0 = traitement dans le processus courant)",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="S'arrête dès que la file d'attente est vide",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help="Délai en secondes entre deux vérifications quand la file est vide",
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=settings.IMAGE_JOB_STALE_AFTER,
+            help="Remet en attente les jobs 'processing' sans signe de vie depuis ce délai (secondes)",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 0)
+
+        # Ferme les connexions avant de créer le pool. Les processus sont
+        # démarrés en mode "spawn" sur toutes les plateformes : aucun enfant
+        # n'hérite ainsi d'une connexion SQLite ouverte par le parent
+        connections.close_all()
+
+        executor = None
+        if workers:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+            )
+
+        if workers:
+            self.stdout.write(f"Worker démarré ({workers} processus)")
+        else:
+            self.stdout.write("Worker démarré (traitement dans le processus courant)")
+
+        # Futures des jobs en cours dans le pool
+        running = set()
+
+        try:
+            while True:
+                requeued = requeue_stale_jobs(options['stale_after'])
+                if requeued:
+                    self.stdout.write(f"{requeued} job(s) bloqué(s) remis en attente")
+
+                if not executor:
+                    job_ids = claim_jobs(1)
+                    if not job_ids:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+                    self._report(run_job(job_ids[0]))
+                    continue
+
+                # Un job n'est réservé que pour un processus libre : il démarre
+                # (et renouvelle son bail) aussitôt, sans attendre dans le pool
+                idle = workers - len(running)
+                for job_id in claim_jobs(idle) if idle else []:
+                    running.add(executor.submit(run_job, job_id))
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.discard(future)
+                    self._report(future.result())
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt demandé")
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+    def _report(self, result):
+        job_id, job_status, error = result
+        if error:
+            self.stderr.write(f"Job {job_id} : {job_status} ({error})")
+        else:
+            self.stdout.write(f"Job {job_id} : {job_status}")
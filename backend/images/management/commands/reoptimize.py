@@ -0,0 +1,308 @@
+"""
+Commande de gestion : ré-optimisation de la bibliothèque.
+
+Usage :
+    python manage.py reoptimize                          # toutes les images
+    python manage.py reoptimize --format PNG --format GIF
+    python manage.py reoptimize --since 2025-01-01 --until 2025-06-30
+    python manage.py reoptimize --missing-variants      # variantes absentes seulement
+    python manage.py reoptimize --dry-run               # compte sans rien modifier
+    python manage.py reoptimize --restart               # ignore le point de reprise
+
+À lancer après un changement des réglages d'encodage (IMAGE_ENCODERS,
+IMAGE_VARIANT_WIDTHS...). Les images sont lues par ID croissant et par
+lots ; après chaque lot, le dernier ID traité est enregistré dans un
+fichier de reprise : une exécution interrompue reprend là où elle s'était
+arrêtée si elle est relancée avec les mêmes filtres.
+
+Les doublons (même empreinte de contenu, même profil) ne sont encodés
+qu'une fois : la première image du groupe rencontrée est ré-optimisée,
+les autres sont repointées sur ses nouveaux fichiers (reoptimize_image).
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as dt_time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from images import metrics
+from images.models import OptimizedImage
+from images.tasks import init_worker, reoptimize_image
+from images.utils import ladder_widths
+
+
+def _parse_date(value, end_of_day=False):
+    """Convertit une date AAAA-MM-JJ en datetime (début ou fin de journée, fuseau courant)."""
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Date invalide : {value} (format attendu : AAAA-MM-JJ)")
+    moment = datetime.combine(day, dt_time.max if end_of_day else dt_time.min)
+    return timezone.make_aware(moment)
+
+
+class Command(BaseCommand):
+    """
+    Régénère WebP, miniatures, placeholders et variantes avec un pool de processus.
+    """
+
+    help = "Ré-optimise les images existantes (après un changement des réglages d'encodage)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.IMAGE_WORKER_PROCESSES,
+            help="Nombre de processus d'encodage (0 = traitement dans le processus courant)",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help="Nombre d'images lues et traitées par lot (un point de reprise par lot)",
+        )
+        parser.add_argument(
+            '--format',
+            action='append',
+            dest='formats',
+            default=[],
+            help="Format de l'original à traiter (JPEG, PNG...). Répétable",
+        )
+        parser.add_argument(
+            '--since',
+            help="Images créées à partir de cette date (AAAA-MM-JJ)",
+        )
+        parser.add_argument(
+            '--until',
+            help="Images créées jusqu'à cette date incluse (AAAA-MM-JJ)",
+        )
+        parser.add_argument(
+            '--missing-variants',
+            action='store_true',
+            help="Seulement les images sans WebP ou avec des variantes responsives manquantes",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Affiche le nombre d'images concernées sans rien modifier",
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=str(settings.BASE_DIR / 'tmp' / 'reoptimize.json'),
+            help="Fichier de reprise",
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help="Ignore le fichier de reprise et recommence depuis le début",
+        )
+
+    # ========== SÉLECTION DES IMAGES ==========
+
+    def _filters(self, options):
+        """Filtres normalisés (enregistrés dans le point de reprise)."""
+        return {
+            'formats': sorted(fmt.upper() for fmt in options['formats']),
+            'since': options['since'],
+            'until': options['until'],
+            'missing_variants': options['missing_variants'],
+        }
+
+    def _queryset(self, filters):
+        images = OptimizedImage.objects.all()
+        if filters['formats']:
+            images = images.filter(format__in=filters['formats'])
+        if filters['since']:
+            images = images.filter(created_at__gte=_parse_date(filters['since']))
+        if filters['until']:
+            images = images.filter(created_at__lte=_parse_date(filters['until'], end_of_day=True))
+        if filters['missing_variants']:
+            images = images.annotate(
+                webp_variants=Count('variants', filter=Q(variants__format='WEBP'))
+            )
+        return images
+
+    @staticmethod
+    def _needs_variants(row):
+        """Indique si une image a une version WebP ou des variantes manquantes."""
+        width, frame_count, webp_file, webp_variants = row[-4:]
+        if not webp_file:
+            return True
+        # Une animation n'a jamais de variantes responsives (build_animated_variants)
+        expected = len(ladder_widths(width)) if width and frame_count <= 1 else 0
+        return webp_variants < expected
+
+    def _chunks(self, images, last_id, filters, chunk_size):
+        """
+        Parcourt les images par ID croissant, par lots de `chunk_size`.
+
+        Chaque lot est lu par une requête bornée (id > dernier ID vu) entièrement
+        consommée avant le traitement : aucun curseur ne reste ouvert pendant
+        que les workers écrivent. Avec SQLite, un curseur ouvert (iterator())
+        garde un verrou de lecture qui bloque les écritures des autres processus.
+        Seuls l'ID et les colonnes utiles au filtrage sont lus.
+
+        Yields:
+            list: Lignes (id, original_size, content_hash, encoding_profile, ...) d'un lot
+        """
+        fields = ['id', 'original_size', 'content_hash', 'encoding_profile']
+        if filters['missing_variants']:
+            fields += ['width', 'frame_count', 'webp_file', 'webp_variants']
+
+        while True:
+            rows = list(
+                images.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list(*fields)[:chunk_size]
+            )
+            if not rows:
+                return
+            last_id = rows[-1][0]
+
+            if filters['missing_variants']:
+                rows = [row for row in rows if self._needs_variants(row)]
+            if rows:
+                yield rows
+
+    # ========== POINT DE REPRISE ==========
+
+    def _load_checkpoint(self, path, filters, restart):
+        if restart or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('filters') != filters:
+            self.stdout.write("Point de reprise ignoré (filtres différents)")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, path, checkpoint):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _representatives(chunk, seen):
+        """
+        IDs à ré-encoder dans un lot : une image par contenu et par profil.
+
+        Les doublons d'une image déjà ré-encodée pendant cette exécution
+        (`seen`, complété ici) sont ignorés : reoptimize_image les a
+        repointés sur les nouveaux fichiers.
+        """
+        ids = []
+        for image_id, _, content_hash, encoding_profile, *_ in chunk:
+            if content_hash:
+                key = (content_hash, encoding_profile)
+                if key in seen:
+                    continue
+                seen.add(key)
+            ids.append(image_id)
+        return ids
+
+    # ========== EXÉCUTION ==========
+
+    def handle(self, *args, **options):
+        # Traitement ponctuel : hors des métriques du service (pool compris)
+        metrics.disable()
+
+        filters = self._filters(options)
+        chunk_size = max(options['chunk_size'], 1)
+        workers = max(options['workers'], 0)
+        path = options['checkpoint']
+
+        images = self._queryset(filters)
+
+        if options['dry_run']:
+            count = 0
+            encodes = 0
+            total_bytes = 0
+            seen = set()
+            for chunk in self._chunks(images, 0, filters, chunk_size):
+                count += len(chunk)
+                encodes += len(self._representatives(chunk, seen))
+                total_bytes += sum(row[1] for row in chunk)
+            self.stdout.write(
+                f"{count} image(s) à ré-optimiser, {encodes} encodage(s) "
+                f"({total_bytes / 1024 / 1024:.1f} MB d'originaux)"
+            )
+            return
+
+        checkpoint = self._load_checkpoint(path, filters, options['restart'])
+        if checkpoint:
+            self.stdout.write(
+                f"Reprise après l'image {checkpoint['last_id']} "
+                f"({checkpoint['processed']} déjà traitée(s))"
+            )
+        else:
+            checkpoint = {'filters': filters, 'last_id': 0, 'processed': 0, 'failed': 0}
+
+        # Même précaution que process_images : aucun processus enfant
+        # n'hérite d'une connexion ouverte par le parent
+        connections.close_all()
+
+        executor = None
+        if workers:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+            )
+
+        start = time.perf_counter()
+        done = 0
+        done_bytes = 0
+        # Contenus déjà ré-encodés pendant cette exécution : (empreinte, profil)
+        seen = set()
+
+        try:
+            for chunk in self._chunks(images, checkpoint['last_id'], filters, chunk_size):
+                ids = [row[0] for row in chunk]
+                representatives = self._representatives(chunk, seen)
+                if executor:
+                    results = executor.map(reoptimize_image, representatives)
+                else:
+                    results = map(reoptimize_image, representatives)
+
+                for image_id, original_size, error in results:
+                    done += 1
+                    done_bytes += original_size
+                    if error:
+                        checkpoint['failed'] += 1
+                        self.stderr.write(f"Image {image_id} : échec ({error})")
+
+                # Le lot entier est terminé : la reprise se fera après son dernier ID
+                checkpoint['last_id'] = ids[-1]
+                checkpoint['processed'] += len(ids)
+                self._save_checkpoint(path, checkpoint)
+
+                elapsed = max(time.perf_counter() - start, 1e-9)
+                self.stdout.write(
+                    f"{checkpoint['processed']} image(s) traitée(s) - "
+                    f"{done / elapsed:.1f} images/s, "
+                    f"{done_bytes / 1024 / 1024 / elapsed:.1f} MB/s"
+                )
+        except KeyboardInterrupt:
+            self.stdout.write(f"Interrompu : relancez la commande pour reprendre après l'image {checkpoint['last_id']}")
+            return
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+        # Exécution complète : le point de reprise n'a plus d'utilité
+        if os.path.exists(path):
+            os.remove(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Terminé : {checkpoint['processed']} image(s), {checkpoint['failed']} échec(s)"
+        ))
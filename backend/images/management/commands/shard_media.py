@@ -0,0 +1,63 @@
+"""
+Commande de gestion : répartition des fichiers existants en sous-dossiers.
+
+Usage :
+    python manage.py shard_media                    # lots de 500 enregistrements
+    python manage.py shard_media --batch-size 2000
+    python manage.py shard_media --keep-old         # anciens noms conservés
+    python manage.py shard_media --release-grace 60 # délai avant la suppression des anciens noms
+
+Les nouveaux fichiers sont écrits directement dans les dossiers répartis
+("originals/ab/cd/<uuid>.jpg", MEDIA_SHARD_DEPTH). Cette commande déplace
+les fichiers écrits avant (dossiers plats) et met à jour les
+enregistrements, par lots, pendant que le service reste en ligne.
+"""
+
+from django.core.management.base import BaseCommand
+
+from images.storage import SHARD_RELEASE_GRACE, shard_stored_files
+
+
+class Command(BaseCommand):
+    """
+    Déplace les fichiers existants vers les dossiers répartis, par lots.
+    """
+
+    help = "Range les fichiers existants dans les sous-dossiers de MEDIA_SHARD_DEPTH"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Nombre d'enregistrements lus et mis à jour par lot",
+        )
+        parser.add_argument(
+            '--keep-old',
+            action='store_true',
+            help="Conserver les fichiers sous leur ancien nom (pour les URLs déjà distribuées)",
+        )
+        parser.add_argument(
+            '--release-grace',
+            type=float,
+            default=SHARD_RELEASE_GRACE,
+            help="Délai en secondes avant de supprimer les anciens noms d'un lot (requêtes en cours)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        totals = {}
+        missing_total = 0
+
+        for field, moved, missing in shard_stored_files(
+            batch_size, options['keep_old'], max(options['release_grace'], 0)
+        ):
+            totals[field] = totals.get(field, 0) + moved
+            missing_total += len(missing)
+            for name in missing:
+                self.stderr.write(f"Fichier introuvable : {name}")
+            self.stdout.write(f"{field} : {totals[field]} fichiers déplacés")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Terminé : {sum(totals.values())} fichiers déplacés, {missing_total} fichiers introuvables"
+        ))
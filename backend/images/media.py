@@ -0,0 +1,179 @@
+"""
+Module de service des fichiers média (MEDIA_ROOT).
+
+Ce module contient :
+- La résolution sûre d'un chemin demandé dans MEDIA_ROOT
+- L'ETag fort d'un fichier, tiré de son identité sur disque (taille, date
+  de modification, inode) : aucun octet n'est lu
+- L'analyse de l'en-tête Range (une seule plage d'octets)
+- Un lecteur limité à une plage, compatible avec l'envoi zéro-copie
+  (sendfile) des serveurs WSGI comme gunicorn
+- Le Cache-Control : les fichiers nommés par un UUID ne changent jamais
+  de contenu, ils sont servis comme immuables
+
+Utilisé par la vue `media_serve` (toutes les URLs MEDIA_URL, en
+développement comme en production).
+"""
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+
+
+# Formats récents absents de certaines tables mimetypes
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
+# UUID dans le nom de fichier : originaux et versions dérivées (jamais réécrits)
+UUID_NAME = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """La plage demandée commence après la fin du fichier."""
+
+
+def resolve_media_path(name):
+    """
+    Chemin absolu d'un fichier de MEDIA_ROOT.
+
+    Args:
+        name: Chemin relatif demandé (partie de l'URL après MEDIA_URL)
+
+    Returns:
+        str: Chemin absolu, ou None si le chemin sort de MEDIA_ROOT ou n'est pas un fichier
+    """
+    try:
+        path = safe_join(str(settings.MEDIA_ROOT), name)
+    except (SuspiciousFileOperation, ValueError):
+        # Chemin sortant de MEDIA_ROOT (../), caractère nul
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def content_etag(stat):
+    """
+    ETag fort d'un fichier, calculé depuis os.stat sans lire son contenu.
+
+    Taille, date de modification (à la nanoseconde) et inode : toute
+    réécriture ou tout remplacement du fichier change l'ETag. Les fichiers
+    du stockage ne sont jamais réécrits (un nouveau contenu reçoit un
+    nouveau nom), l'ETag d'un nom reste donc stable.
+
+    Args:
+        stat: Résultat de os.stat() du fichier
+
+    Returns:
+        str: ETag entre guillemets
+    """
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}-{stat.st_ino:x}"'
+
+
+def cache_control(name):
+    """En-tête Cache-Control d'un fichier média d'après son nom."""
+    if UUID_NAME.search(os.path.basename(name)):
+        return IMMUTABLE_CACHE_CONTROL
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def content_type(name):
+    """Type MIME d'un fichier média d'après son extension."""
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def parse_range(header, size):
+    """
+    Analyse un en-tête Range d'une seule plage d'octets.
+
+    Formes acceptées : `bytes=debut-fin`, `bytes=debut-`, `bytes=-suffixe`.
+    Un en-tête invalide, d'une autre unité ou à plusieurs plages est ignoré :
+    le fichier entier est servi (autorisé par la RFC 9110).
+
+    Args:
+        header: Valeur de l'en-tête Range
+        size: Taille du fichier en octets
+
+    Returns:
+        tuple: (début, fin incluse), ou None pour servir le fichier entier
+
+    Raises:
+        RangeNotSatisfiable: Si la plage ne contient aucun octet du fichier
+    """
+    match = _BYTE_RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+
+    if not first:
+        if not last:
+            return None
+        # Les N derniers octets
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def if_range_matches(header, etag, last_modified):
+    """
+    Vérifie la condition If-Range (absente = satisfaite).
+
+    Si le client a une version différente de la ressource, la plage est
+    ignorée et le fichier entier est servi.
+
+    Args:
+        header: Valeur de l'en-tête If-Range, ou None
+        etag: ETag courant du fichier
+        last_modified: Date de modification (HTTP-date) courante
+
+    Returns:
+        bool: True si la plage peut être servie
+    """
+    if not header:
+        return True
+    header = header.strip()
+    return header == etag or header == last_modified
+
+
+class FileRange:
+    """
+    Lecteur d'une plage d'un fichier ouvert, pour FileResponse.
+
+    `read` s'arrête à la fin de la plage. `fileno` est exposé : gunicorn
+    envoie alors la plage avec sendfile, depuis la position courante du
+    fichier et pour Content-Length octets, sans copie en espace utilisateur.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self._file = file
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,439 @@
+"""
+Module de métriques au format Prometheus.
+
+Ce module contient :
+- Des compteurs et des histogrammes en mémoire, mis à jour sous un verrou
+  (une addition par observation : assez léger pour rester actif en charge)
+- L'écriture périodique d'un instantané par processus dans METRICS_DIR
+- L'agrégation de tous les processus et le rendu au format texte Prometheus
+
+Avec gunicorn, chaque worker a ses propres compteurs. Chaque processus
+écrit donc ses valeurs dans `METRICS_DIR/<pid>.json` (au plus une fois par
+METRICS_FLUSH_INTERVAL secondes, et à la sortie) ; l'endpoint /metrics
+additionne tous les fichiers. Les workers de `process_images` et les pools
+d'encodage du service y contribuent de la même façon.
+
+L'instantané d'un processus terminé (ou d'un ancien processus dont le PID
+a été réutilisé) est ajouté à `METRICS_DIR/base.json`, puis supprimé : le
+répertoire ne grossit pas et les compteurs ne reculent jamais. Les
+commandes ponctuelles (benchmark, bench_db, reoptimize) n'écrivent rien
+(disable()).
+"""
+
+import atexit
+import bisect
+import contextlib
+import functools
+import json
+import multiprocessing.util
+import os
+import threading
+import time
+
+try:
+    # Verrou de fichier entre processus (POSIX)
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from django.conf import settings
+
+
+# Définitions : nom -> (type, description)
+METRICS = {
+    'imageboost_stage_duration_seconds': (
+        'histogram', "Durée de chaque étape du traitement d'une image"
+    ),
+    'imageboost_request_duration_seconds': (
+        'histogram', "Durée des requêtes HTTP par vue"
+    ),
+    'imageboost_bytes_in_total': (
+        'counter', "Octets d'originaux optimisés"
+    ),
+    'imageboost_bytes_out_total': (
+        'counter', "Octets produits par type de variante"
+    ),
+    'imageboost_uploads_total': (
+        'counter', "Uploads reçus par résultat (created, duplicate, queued, failed)"
+    ),
+    'imageboost_errors_total': (
+        'counter', "Erreurs par étape"
+    ),
+    'imageboost_api_cache_total': (
+        'counter', "Réponses de la liste et du détail : depuis le cache (hit) ou recalculées (miss)"
+    ),
+}
+
+# Bornes des histogrammes de durée (secondes)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Cumul des processus terminés, et verrou des fusions dans ce fichier
+BASE_SNAPSHOT = 'base.json'
+BASE_LOCK = 'base.lock'
+
+# Variable d'environnement qui désactive les instantanés (héritée par les
+# processus enfants démarrés en mode "spawn")
+DISABLE_ENV = 'IMAGEBOOST_METRICS_DISABLED'
+
+_lock = threading.Lock()
+_counters = {}      # (nom, labels) -> valeur
+_histograms = {}    # (nom, labels) -> [compte par borne..., somme, nombre]
+_last_flush = 0.0
+_flushed_pid = None  # PID pour lequel l'instantané a déjà été écrit
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """
+    Incrémente un compteur.
+
+    Args:
+        name: Nom du compteur (clé de METRICS)
+        amount: Valeur à ajouter
+        **labels: Étiquettes (ex: stage='webp')
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _maybe_flush()
+
+
+def observe(name, seconds, **labels):
+    """
+    Ajoute une durée à un histogramme.
+
+    Args:
+        name: Nom de l'histogramme (clé de METRICS)
+        seconds: Durée observée en secondes
+        **labels: Étiquettes (ex: stage='webp')
+    """
+    key = _key(name, labels)
+    index = bisect.bisect_left(DURATION_BUCKETS, seconds)
+    with _lock:
+        values = _histograms.get(key)
+        if values is None:
+            values = _histograms[key] = [0] * len(DURATION_BUCKETS) + [0.0, 0]
+        if index < len(DURATION_BUCKETS):
+            values[index] += 1
+        values[-2] += seconds
+        values[-1] += 1
+    _maybe_flush()
+
+
+def observe_timings(timings):
+    """
+    Enregistre les durées par étape d'une optimisation (OptimizationResult.timings).
+
+    Les variantes responsives sont regroupées par format
+    (`responsive_webp_640` -> étape `responsive_webp`) pour garder un
+    nombre d'étiquettes borné.
+
+    Args:
+        timings: Dictionnaire étape -> durée en millisecondes
+    """
+    for stage, elapsed_ms in timings.items():
+        if stage.startswith('responsive_'):
+            stage = stage.rsplit('_', 1)[0]
+        observe('imageboost_stage_duration_seconds', elapsed_ms / 1000, stage=stage)
+
+
+@contextlib.contextmanager
+def timed(stage):
+    """
+    Gestionnaire de contexte : mesure la durée du bloc comme une étape.
+
+    Args:
+        stage: Valeur de l'étiquette `stage` de imageboost_stage_duration_seconds
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('imageboost_stage_duration_seconds', time.perf_counter() - start, stage=stage)
+
+
+def count_errors(stage):
+    """
+    Décorateur : compte les exceptions levées par la fonction (puis les relance).
+
+    Args:
+        stage: Valeur de l'étiquette `stage` de imageboost_errors_total
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                inc('imageboost_errors_total', stage=stage)
+                raise
+        return wrapper
+    return decorator
+
+
+# ========== INSTANTANÉS PAR PROCESSUS ==========
+
+def disable():
+    """
+    Désactive l'écriture des instantanés pour ce processus et ses enfants.
+
+    Appelé par les commandes ponctuelles : leurs mesures ne doivent pas se
+    mêler à celles du service dans METRICS_DIR.
+    """
+    os.environ[DISABLE_ENV] = '1'
+
+
+def _enabled():
+    return bool(settings.METRICS_DIR) and not os.environ.get(DISABLE_ENV)
+
+
+def _snapshot():
+    with _lock:
+        return {
+            'counters': [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, dict(labels), list(values)] for (name, labels), values in _histograms.items()],
+        }
+
+
+def _aggregate(snapshots):
+    """
+    Additionne des instantanés.
+
+    Returns:
+        tuple: (compteurs, histogrammes) indexés par (nom, labels)
+    """
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = _key(name, labels)
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+    return counters, histograms
+
+
+def _snapshot_path(name):
+    return os.path.join(str(settings.METRICS_DIR), name)
+
+
+def _read_snapshot(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_snapshot(path, snapshot):
+    """Écrit un instantané de façon atomique (fichier temporaire puis rename)."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def _directory_lock(exclusive):
+    """
+    Verrou du répertoire des instantanés, partagé entre processus.
+
+    Exclusif pendant une fusion dans base.json, partagé pendant une lecture :
+    un rendu ne voit jamais un instantané à la fois fusionné et présent.
+    Sans fcntl (hors POSIX), aucun verrou n'est pris.
+    """
+    with open(_snapshot_path(BASE_LOCK), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _retire(name):
+    """
+    Ajoute l'instantané `name` au cumul des processus terminés, puis le supprime.
+
+    Args:
+        name: Nom du fichier dans METRICS_DIR (`<pid>.json`)
+    """
+    path = _snapshot_path(name)
+    base_path = _snapshot_path(BASE_SNAPSHOT)
+    with _directory_lock(exclusive=True):
+        try:
+            retired = _read_snapshot(path)
+        except FileNotFoundError:
+            # Déjà fusionné par un autre processus
+            return
+        except ValueError:
+            retired = None
+
+        if retired is not None:
+            try:
+                base = _read_snapshot(base_path)
+            except (FileNotFoundError, ValueError):
+                base = {'counters': [], 'histograms': []}
+            counters, histograms = _aggregate([base, retired])
+            _write_snapshot(base_path, {
+                'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+                'histograms': [[name, dict(labels), values] for (name, labels), values in histograms.items()],
+            })
+        os.remove(path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Processus d'un autre utilisateur : il existe
+        return True
+    return True
+
+
+def flush():
+    """Écrit l'instantané du processus dans METRICS_DIR (écriture atomique)."""
+    global _last_flush, _flushed_pid
+    if not _enabled():
+        return
+    _last_flush = time.monotonic()
+
+    os.makedirs(str(settings.METRICS_DIR), exist_ok=True)
+    pid = os.getpid()
+    name = f"{pid}.json"
+    if _flushed_pid != pid:
+        # Premier instantané : un fichier à ce PID vient d'un processus
+        # terminé dont le PID a été réutilisé, ses valeurs sont conservées
+        if os.path.exists(_snapshot_path(name)):
+            _retire(name)
+        _flushed_pid = pid
+    _write_snapshot(_snapshot_path(name), _snapshot())
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        try:
+            flush()
+        except OSError:
+            # Les métriques ne doivent jamais faire échouer une requête
+            pass
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+def _reset_after_fork():
+    """Processus créé par fork : les valeurs héritées appartiennent au parent."""
+    global _lock, _counters, _histograms, _last_flush
+    _lock = threading.Lock()
+    _counters = {}
+    _histograms = {}
+    _last_flush = 0.0
+
+
+# Processus principal : atexit. Processus enfants de multiprocessing (pools
+# d'encodage) : ils se terminent par os._exit, seuls les finaliseurs sont appelés
+atexit.register(_flush_at_exit)
+multiprocessing.util.Finalize(None, _flush_at_exit, exitpriority=10)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _all_snapshots():
+    """
+    Instantanés de tous les processus : le processus courant est lu en direct.
+
+    Les instantanés des processus terminés sont d'abord fusionnés dans
+    base.json, lu comme les autres.
+    """
+    snapshots = [_snapshot()]
+    directory = str(settings.METRICS_DIR or '')
+    if not directory or not os.path.isdir(directory):
+        return snapshots
+
+    own_file = f"{os.getpid()}.json"
+    for entry in os.scandir(directory):
+        root, extension = os.path.splitext(entry.name)
+        if extension == '.json' and root.isdigit() and not _pid_alive(int(root)):
+            try:
+                _retire(entry.name)
+            except OSError:
+                continue
+
+    with _directory_lock(exclusive=False):
+        for entry in os.scandir(directory):
+            if not entry.name.endswith('.json') or entry.name == own_file:
+                continue
+            try:
+                snapshots.append(_read_snapshot(entry.path))
+            except (OSError, ValueError):
+                # Fichier en cours de remplacement ou corrompu : ignoré pour ce rendu
+                continue
+    return snapshots
+
+
+# ========== RENDU PROMETHEUS ==========
+
+def _escape(value):
+    """Échappe une valeur d'étiquette (antislash, guillemet, retour à la ligne)."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    items = sorted(labels.items())
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render():
+    """
+    Agrège les métriques de tous les processus au format texte Prometheus.
+
+    Returns:
+        str: Exposition au format texte (version 0.0.4)
+    """
+    counters, histograms = _aggregate(_all_snapshots())
+
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(dict(labels))} {_format_value(value)}")
+            continue
+
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            labels = dict(labels)
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, values):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', repr(bound)))} {cumulative}")
+            count = values[-1]
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    return '\n'.join(lines) + '\n'
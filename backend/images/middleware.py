@@ -0,0 +1,58 @@
+"""
+Module de middlewares de l'application images.
+
+Ce module contient :
+- MetricsMiddleware : durée de chaque requête HTTP par vue, méthode et statut
+"""
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    """
+    Enregistre la durée de chaque requête dans imageboost_request_duration_seconds.
+
+    L'étiquette `view` est le nom de la route résolue (ex: images:upload)
+    et non le chemin : le nombre de séries reste borné quels que soient
+    les identifiants présents dans les URLs.
+
+    Compatible synchrone et asynchrone : sous ASGI, il ne force pas les
+    vues asynchrones à s'exécuter dans un thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    def _observe(self, request, response, start):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        metrics.observe(
+            'imageboost_request_duration_seconds',
+            time.perf_counter() - start,
+            view=view,
+            method=request.method,
+            status=str(response.status_code),
+        )
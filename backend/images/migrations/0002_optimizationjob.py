@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptimizationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('done', 'Terminé'), ('failed', 'Échec')], db_index=True, default='pending', help_text="État actuel du job dans la file d'attente", max_length=12)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Nombre de fois où un worker a pris ce job')),
+                ('error', models.TextField(blank=True, help_text="Message d'erreur si l'optimisation a échoué")),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text="Date de mise en file d'attente")),
+                ('started_at', models.DateTimeField(blank=True, help_text='Date de prise en charge par un worker', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, help_text='Date de fin de traitement (succès ou échec)', null=True)),
+                ('image', models.ForeignKey(help_text='Image à optimiser', on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='images.optimizedimage')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
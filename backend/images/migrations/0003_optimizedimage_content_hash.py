@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0002_optimizationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Empreinte SHA-256 du fichier original (déduplication des uploads)', max_length=64),
+        ),
+    ]
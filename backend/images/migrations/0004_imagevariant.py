@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0003_optimizedimage_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.ImageField(help_text='Fichier de la variante', upload_to='variants/')),
+                ('width', models.PositiveIntegerField(help_text='Largeur de la variante en pixels')),
+                ('height', models.PositiveIntegerField(help_text='Hauteur de la variante en pixels')),
+                ('format', models.CharField(help_text='Format de la variante (WEBP, AVIF, etc.)', max_length=10)),
+                ('byte_size', models.PositiveIntegerField(help_text='Taille du fichier de la variante en octets')),
+                ('image', models.ForeignKey(help_text='Image dont provient la variante', on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='images.optimizedimage')),
+            ],
+            options={
+                'ordering': ['width'],
+                'constraints': [models.UniqueConstraint(fields=('image', 'format', 'width'), name='unique_image_variant')],
+            },
+        ),
+    ]
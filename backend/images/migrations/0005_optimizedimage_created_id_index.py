@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0004_imagevariant'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='optimizedimage',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='optimizedimage',
+            index=models.Index(fields=['-created_at', '-id'], name='image_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0005_optimizedimage_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='size_reduction',
+            field=models.FloatField(default=0, help_text="Pourcentage de réduction de taille entre l'original et le WebP"),
+        ),
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='thumbnail_size',
+            field=models.PositiveIntegerField(default=0, help_text='Taille de la miniature en octets (0 si non générée)'),
+        ),
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='webp_size',
+            field=models.PositiveIntegerField(default=0, help_text='Taille de la version WebP en octets (0 si non générée)'),
+        ),
+    ]
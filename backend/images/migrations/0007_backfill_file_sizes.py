@@ -0,0 +1,62 @@
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    """
+    Renseigne les tailles des images optimisées avant la migration 0006.
+
+    Logique figée ici (modèle historique uniquement) : la migration ne
+    dépend pas du code courant de l'application. Les images sont parcourues
+    par ID croissant, par lots ; un fichier introuvable garde une taille de 0
+    (la commande `backfill_sizes` les signale).
+    """
+    OptimizedImage = apps.get_model('images', 'OptimizedImage')
+
+    def stored_size(field_file):
+        if not field_file:
+            return 0
+        try:
+            return field_file.storage.size(field_file.name)
+        except OSError:
+            return 0
+
+    last_id = 0
+    while True:
+        batch = list(
+            OptimizedImage.objects
+            .filter(id__gt=last_id, webp_size=0)
+            .exclude(webp_file='')
+            .exclude(webp_file__isnull=True)
+            .order_by('id')
+            .only('id', 'original_size', 'webp_file', 'thumbnail')[:500]
+        )
+        if not batch:
+            return
+        last_id = batch[-1].id
+
+        for image in batch:
+            image.webp_size = stored_size(image.webp_file)
+            image.thumbnail_size = stored_size(image.thumbnail)
+            if image.webp_size and image.original_size > 0:
+                image.size_reduction = round(
+                    (image.original_size - image.webp_size) / image.original_size * 100, 2
+                )
+            else:
+                image.size_reduction = 0
+
+        OptimizedImage.objects.bulk_update(batch, ['webp_size', 'thumbnail_size', 'size_reduction'])
+
+
+class Migration(migrations.Migration):
+
+    # Chaque lot est validé séparément : une grosse table ne reste pas
+    # verrouillée pendant toute la migration
+    atomic = False
+
+    dependencies = [
+        ('images', '0006_optimizedimage_file_sizes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
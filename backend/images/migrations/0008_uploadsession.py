@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:08
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0007_backfill_file_sizes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text="Identifiant opaque de la session (utilisé dans l'URL)", primary_key=True, serialize=False)),
+                ('original_name', models.CharField(help_text='Nom original du fichier', max_length=255)),
+                ('content_type', models.CharField(help_text='Type MIME déclaré par le client', max_length=100)),
+                ('total_size', models.PositiveBigIntegerField(help_text='Taille totale annoncée du fichier en octets')),
+                ('received_bytes', models.PositiveBigIntegerField(default=0, help_text="Nombre d'octets reçus (position du prochain morceau)")),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text="Date d'ouverture de la session")),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Date de réception du dernier morceau')),
+            ],
+        ),
+    ]
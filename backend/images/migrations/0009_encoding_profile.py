@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0008_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='encoding_profile',
+            field=models.CharField(blank=True, help_text="Profil d'encodage choisi à l'upload (vide = IMAGE_DEFAULT_PROFILE)", max_length=32),
+        ),
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='encoding_quality',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Qualité WebP utilisée (fixée par le profil ou trouvée par recherche SSIM)', null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='encoding_profile',
+            field=models.CharField(blank=True, help_text="Profil d'encodage demandé, appliqué à la finalisation", max_length=32),
+        ),
+    ]
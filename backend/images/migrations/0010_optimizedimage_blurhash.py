@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0009_encoding_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='blurhash',
+            field=models.CharField(blank=True, help_text='Placeholder compact BlurHash (~28 caractères), décodé par le navigateur', max_length=64),
+        ),
+    ]
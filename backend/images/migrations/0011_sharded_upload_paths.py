@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:36
+
+import images.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0010_optimizedimage_blurhash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagevariant',
+            name='file',
+            field=models.ImageField(help_text='Fichier de la variante', upload_to=images.models.variant_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='optimizedimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, help_text="Miniature de l'image (200x200px max)", null=True, upload_to=images.models.thumbnail_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='optimizedimage',
+            name='webp_file',
+            field=models.ImageField(blank=True, help_text='Version optimisée au format WebP (compression élevée)', null=True, upload_to=images.models.webp_upload_path),
+        ),
+    ]
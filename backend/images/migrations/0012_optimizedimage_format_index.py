@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0011_sharded_upload_paths'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='optimizedimage',
+            index=models.Index(fields=['format', '-created_at', '-id'], name='image_format_created_idx'),
+        ),
+    ]
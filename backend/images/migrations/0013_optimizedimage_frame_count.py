@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0012_optimizedimage_format_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='optimizedimage',
+            name='frame_count',
+            field=models.PositiveIntegerField(default=1, help_text="Nombre d'images de l'original (plus de 1 : animation, servie en WebP animé)"),
+        ),
+    ]
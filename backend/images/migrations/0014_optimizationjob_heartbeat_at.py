@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0013_optimizedimage_frame_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='optimizationjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Dernier signe de vie du worker (renouvelé pendant le traitement)', null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:26
+
+import images.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0014_optimizationjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagevariant',
+            name='file',
+            field=models.ImageField(db_index=True, help_text='Fichier de la variante', upload_to=images.models.variant_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='optimizedimage',
+            name='original_file',
+            field=models.ImageField(db_index=True, help_text='Fichier image original stocké sur le serveur', upload_to=images.models.upload_path),
+        ),
+        migrations.AlterField(
+            model_name='optimizedimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, db_index=True, help_text="Miniature de l'image (200x200px max)", null=True, upload_to=images.models.thumbnail_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='optimizedimage',
+            name='webp_file',
+            field=models.ImageField(blank=True, db_index=True, help_text='Version optimisée au format WebP (compression élevée)', null=True, upload_to=images.models.webp_upload_path),
+        ),
+    ]
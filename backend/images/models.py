@@ -6,12 +6,48 @@ sur les images uploadées et leurs versions optimisées.
 """
 
 # Imports Django pour les modèles et utilitaires
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
+import hashlib
 import os
+import re
 import uuid
 
 
+# Dossiers du stockage, par type de fichier
+ORIGINALS_DIR = 'originals'
+WEBP_DIR = 'webp'
+THUMBNAILS_DIR = 'thumbnails'
+VARIANTS_DIR = 'variants'
+
+_UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+def shard_path(directory, filename):
+    """
+    Chemin d'un fichier dans un dossier réparti en sous-dossiers.
+    
+    Avec MEDIA_SHARD_DEPTH = 2, "originals" + "86b28d38-....jpg" donne
+    "originals/86/b2/86b28d38-....jpg" : 65 536 sous-dossiers, chacun de
+    taille raisonnable même avec des millions de fichiers. Les sous-dossiers
+    viennent de l'UUID du nom (aléatoire, donc bien réparti) : toutes les
+    versions d'une image sont rangées sous le même préfixe. Un nom sans
+    UUID est réparti d'après son empreinte MD5.
+    
+    Args:
+        directory: Dossier de premier niveau (ORIGINALS_DIR...)
+        filename: Nom du fichier (sans dossier)
+        
+    Returns:
+        str: Chemin relatif au stockage
+    """
+    match = _UUID.search(filename)
+    key = match.group(0).replace('-', '') if match else hashlib.md5(filename.encode()).hexdigest()
+    shards = [key[2 * level:2 * level + 2] for level in range(settings.MEDIA_SHARD_DEPTH)]
+    return '/'.join([directory, *shards, filename])
+
+
 def upload_path(instance, filename):
     """
     Génère un chemin unique pour les images uploadées.
@@ -25,14 +61,53 @@ def upload_path(instance, filename):
         filename: Nom original du fichier
         
     Returns:
-        str: Chemin relatif où stocker l'image (ex: "originals/uuid.jpg")
+        str: Chemin relatif où stocker l'image (ex: "originals/86/b2/uuid.jpg")
     """
     # Extrait l'extension du fichier original
     ext = filename.split('.')[-1]
     # Crée un nom unique avec UUID pour éviter les collisions
     filename = f"{uuid.uuid4()}.{ext}"
-    # Stocke dans le dossier "originals"
-    return f"originals/{filename}"
+    # Stocke dans le dossier "originals", réparti en sous-dossiers
+    return shard_path(ORIGINALS_DIR, filename)
+
+
+def webp_upload_path(instance, filename):
+    """Chemin de la version WebP (ex: "webp/86/b2/uuid.webp")."""
+    return shard_path(WEBP_DIR, os.path.basename(filename))
+
+
+def thumbnail_upload_path(instance, filename):
+    """Chemin de la miniature (ex: "thumbnails/86/b2/thumb_uuid.jpg")."""
+    return shard_path(THUMBNAILS_DIR, os.path.basename(filename))
+
+
+def variant_upload_path(instance, filename):
+    """Chemin d'une variante responsive (ex: "variants/86/b2/uuid_640w.webp")."""
+    return shard_path(VARIANTS_DIR, os.path.basename(filename))
+
+
+class OptimizedImageQuerySet(models.QuerySet):
+    """
+    QuerySet des images : la suppression groupée supprime aussi les fichiers.
+    """
+    
+    def delete(self):
+        """
+        Supprime les images (et leurs variantes en cascade), puis leurs fichiers
+        non partagés après le commit, en arrière-plan (storage.release_files_on_commit).
+        """
+        from .caching import batched_invalidation
+        from .storage import release_files_on_commit, stored_file_names
+        
+        names = stored_file_names(self)
+        # Un signal post_delete par image : une seule invalidation du cache
+        with batched_invalidation():
+            result = super().delete()
+        release_files_on_commit(names, self.model._meta.get_field('original_file').storage)
+        return result
+    
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class OptimizedImage(models.Model):
@@ -55,6 +130,7 @@ class OptimizedImage(models.Model):
     
     original_file = models.ImageField(
         upload_to=upload_path,
+        db_index=True,
         help_text="Fichier image original stocké sur le serveur"
     )
     
@@ -62,27 +138,57 @@ class OptimizedImage(models.Model):
         help_text="Taille du fichier original en octets"
     )
     
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="Empreinte SHA-256 du fichier original (déduplication des uploads)"
+    )
+    
     # ========== VERSIONS OPTIMISÉES ==========
     
     webp_file = models.ImageField(
-        upload_to='webp/',
+        upload_to=webp_upload_path,
         null=True,
         blank=True,
+        db_index=True,
         help_text="Version optimisée au format WebP (compression élevée)"
     )
     
     thumbnail = models.ImageField(
-        upload_to='thumbnails/',
+        upload_to=thumbnail_upload_path,
         null=True,
         blank=True,
+        db_index=True,
         help_text="Miniature de l'image (200x200px max)"
     )
     
+    webp_size = models.PositiveIntegerField(
+        default=0,
+        help_text="Taille de la version WebP en octets (0 si non générée)"
+    )
+    
+    thumbnail_size = models.PositiveIntegerField(
+        default=0,
+        help_text="Taille de la miniature en octets (0 si non générée)"
+    )
+    
+    size_reduction = models.FloatField(
+        default=0,
+        help_text="Pourcentage de réduction de taille entre l'original et le WebP"
+    )
+    
     blur_placeholder = models.TextField(
         blank=True,
         help_text="Version très légère floutée encodée en base64 pour l'affichage immédiat"
     )
     
+    blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Placeholder compact BlurHash (~28 caractères), décodé par le navigateur"
+    )
+    
     # ========== MÉTADONNÉES DE L'IMAGE ==========
     
     width = models.PositiveIntegerField(
@@ -101,6 +207,25 @@ class OptimizedImage(models.Model):
         help_text="Format de l'image original (JPEG, PNG, etc.)"
     )
     
+    frame_count = models.PositiveIntegerField(
+        default=1,
+        help_text="Nombre d'images de l'original (plus de 1 : animation, servie en WebP animé)"
+    )
+    
+    # ========== ENCODAGE ==========
+    
+    encoding_profile = models.CharField(
+        max_length=32,
+        blank=True,
+        help_text="Profil d'encodage choisi à l'upload (vide = IMAGE_DEFAULT_PROFILE)"
+    )
+    
+    encoding_quality = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Qualité WebP utilisée (fixée par le profil ou trouvée par recherche SSIM)"
+    )
+    
     # ========== TIMESTAMPS ==========
     
     created_at = models.DateTimeField(
@@ -113,14 +238,24 @@ class OptimizedImage(models.Model):
         help_text="Date et heure de dernière modification"
     )
     
+    objects = OptimizedImageQuerySet.as_manager()
+    
     class Meta:
         """
         Classe Meta pour configurer le modèle.
         
         ordering : Trie les images par date de création décroissante
-        (les plus récentes en premier)
+        (les plus récentes en premier, l'ID départageant les égalités)
+        indexes : Index composite (created_at, id) parcouru par la
+        pagination par curseur de la liste (il sert aussi les tris et
+        filtres sur created_at seul), et index (format, created_at, id)
+        pour filtrer par format sans trier toute la table
         """
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='image_created_id_idx'),
+            models.Index(fields=['format', '-created_at', '-id'], name='image_format_created_idx'),
+        ]
     
     def __str__(self):
         """
@@ -130,29 +265,253 @@ class OptimizedImage(models.Model):
         """
         return f"{self.original_name} ({self.original_size} bytes)"
     
-    def get_size_reduction(self):
+    def delete(self, *args, **kwargs):
         """
-        Calcule le pourcentage de réduction de taille entre l'original et le WebP.
+        Supprime l'image, puis ses fichiers s'ils ne sont plus utilisés.
         
-        Cette méthode compare la taille du fichier original avec la version
-        WebP optimisée pour donner un pourcentage de réduction.
+        Django ne supprime pas les fichiers des ImageField : leurs noms
+        (variantes comprises) sont relevés avant la suppression, puis les
+        fichiers non partagés avec un doublon sont supprimés après le commit,
+        dans un thread d'arrière-plan (la requête n'attend pas le disque).
+        """
+        from .storage import image_file_names, release_files_on_commit
+        
+        names = image_file_names(self)
+        result = super().delete(*args, **kwargs)
+        release_files_on_commit(names, self.original_file.storage)
+        return result
+    
+    @property
+    def is_animated(self):
+        """Original animé (GIF, WebP) : la version WebP est animée, sans variantes responsives."""
+        return self.frame_count > 1
+    
+    def update_size_stats(self, webp_size, thumbnail_size):
+        """
+        Enregistre les tailles des fichiers générés et la réduction obtenue.
         
-        Returns:
-            float: Pourcentage de réduction (ex: 65.5 pour 65.5%)
-            Retourne 0 si la version WebP n'existe pas ou en cas d'erreur
+        Les tailles sont stockées en base lors de l'optimisation : la
+        sérialisation n'a ainsi jamais besoin d'interroger le stockage.
+        
+        Args:
+            webp_size: Taille de la version WebP en octets
+            thumbnail_size: Taille de la miniature en octets
         """
-        # Vérifie si la version WebP existe
-        if self.webp_file:
-            try:
-                # Récupère la taille du fichier WebP
-                webp_size = self.webp_file.size
-                # Calcule le pourcentage de réduction
-                if self.original_size > 0:
-                    reduction = ((self.original_size - webp_size) / self.original_size) * 100
-                    # Arrondit à 2 décimales
-                    return round(reduction, 2)
-            except:
-                # En cas d'erreur (fichier non accessible, etc.), retourne 0
-                pass
+        self.webp_size = webp_size
+        self.thumbnail_size = thumbnail_size
+        self.size_reduction = compute_size_reduction(self.original_size, webp_size)
+
+
+def compute_size_reduction(original_size, webp_size):
+    """
+    Calcule le pourcentage de réduction de taille entre l'original et le WebP.
+    
+    Args:
+        original_size: Taille du fichier original en octets
+        webp_size: Taille de la version WebP en octets
+        
+    Returns:
+        float: Pourcentage de réduction arrondi à 2 décimales (ex: 65.5)
+        Retourne 0 si la version WebP n'existe pas ou si l'original est vide
+    """
+    if not webp_size or original_size <= 0:
         return 0
+    return round((original_size - webp_size) / original_size * 100, 2)
+
+
+
+class ImageVariant(models.Model):
+    """
+    Variante responsive d'une image (une largeur de l'échelle configurée).
+    
+    Les variantes sont générées lors de l'optimisation pour chaque largeur
+    de IMAGE_VARIANT_WIDTHS inférieure à la largeur de l'original. Elles
+    alimentent l'attribut `srcset` : le navigateur télécharge la plus
+    petite variante suffisante pour l'écran au lieu de l'image complète.
+    """
+    
+    image = models.ForeignKey(
+        OptimizedImage,
+        on_delete=models.CASCADE,
+        related_name='variants',
+        help_text="Image dont provient la variante"
+    )
+    
+    file = models.ImageField(
+        upload_to=variant_upload_path,
+        db_index=True,
+        help_text="Fichier de la variante"
+    )
+    
+    width = models.PositiveIntegerField(
+        help_text="Largeur de la variante en pixels"
+    )
+    
+    height = models.PositiveIntegerField(
+        help_text="Hauteur de la variante en pixels"
+    )
+    
+    format = models.CharField(
+        max_length=10,
+        help_text="Format de la variante (WEBP, AVIF, etc.)"
+    )
+    
+    byte_size = models.PositiveIntegerField(
+        help_text="Taille du fichier de la variante en octets"
+    )
+    
+    class Meta:
+        """
+        Les variantes sont triées par largeur croissante (ordre du srcset).
+        """
+        ordering = ['width']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['image', 'format', 'width'],
+                name='unique_image_variant',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.image_id} - {self.width}w {self.format} ({self.byte_size} bytes)"
+
 
+class OptimizationJob(models.Model):
+    """
+    Job d'optimisation mis en file d'attente dans la base de données.
+    
+    Quand le mode asynchrone est activé (IMAGE_OPTIMIZATION_ASYNC), l'upload
+    ne fait que sauvegarder l'original et créer un job. La commande
+    `process_images` consomme ensuite la file avec un pool de processus.
+    Aucun broker externe n'est nécessaire : la table sert de file d'attente.
+    """
+    
+    # ========== STATUTS POSSIBLES ==========
+    
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_PROCESSING, 'En cours'),
+        (STATUS_DONE, 'Terminé'),
+        (STATUS_FAILED, 'Échec'),
+    ]
+    
+    # ========== CHAMPS ==========
+    
+    image = models.ForeignKey(
+        OptimizedImage,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        help_text="Image à optimiser"
+    )
+    
+    status = models.CharField(
+        max_length=12,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True,
+        help_text="État actuel du job dans la file d'attente"
+    )
+    
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Nombre de fois où un worker a pris ce job"
+    )
+    
+    error = models.TextField(
+        blank=True,
+        help_text="Message d'erreur si l'optimisation a échoué"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Date de mise en file d'attente"
+    )
+    
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Date de prise en charge par un worker"
+    )
+    
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Dernier signe de vie du worker (renouvelé pendant le traitement)"
+    )
+    
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Date de fin de traitement (succès ou échec)"
+    )
+    
+    class Meta:
+        """
+        Les jobs sont traités dans l'ordre d'arrivée (FIFO).
+        """
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f"Job {self.pk} ({self.status}) - image {self.image_id}"
+
+
+class UploadSession(models.Model):
+    """
+    Session d'upload fragmenté et reprenable.
+    
+    Le client déclare le fichier (nom, type, taille totale), puis envoie les
+    morceaux un par un à la position `received_bytes`. Après une coupure
+    réseau, il relit cette position et reprend l'envoi au lieu de tout
+    renvoyer. Les morceaux sont écrits directement dans un fichier temporaire
+    (UPLOAD_SESSION_DIR) ; la finalisation le transmet au pipeline d'optimisation.
+    """
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text="Identifiant opaque de la session (utilisé dans l'URL)"
+    )
+    
+    original_name = models.CharField(
+        max_length=255,
+        help_text="Nom original du fichier"
+    )
+    
+    content_type = models.CharField(
+        max_length=100,
+        help_text="Type MIME déclaré par le client"
+    )
+    
+    total_size = models.PositiveBigIntegerField(
+        help_text="Taille totale annoncée du fichier en octets"
+    )
+    
+    received_bytes = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Nombre d'octets reçus (position du prochain morceau)"
+    )
+    
+    encoding_profile = models.CharField(
+        max_length=32,
+        blank=True,
+        help_text="Profil d'encodage demandé, appliqué à la finalisation"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Date d'ouverture de la session"
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Date de réception du dernier morceau"
+    )
+    
+    def __str__(self):
+        return f"Upload {self.pk} ({self.received_bytes}/{self.total_size} bytes)"
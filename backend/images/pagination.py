@@ -0,0 +1,191 @@
+"""
+Module de pagination par curseur (keyset) de la liste des images.
+
+Ce module contient :
+- L'encodage/décodage du curseur opaque transmis au client
+- La lecture d'une page ordonnée sur (created_at, id), synchrone ou asynchrone
+- Les paramètres, la requête et les données d'une page de la liste,
+  partagés par les vues synchrones et asynchrones
+
+Contrairement à une pagination par OFFSET, la page suivante est lue à
+partir de la dernière clé vue : la base parcourt l'index composite
+(created_at, id) depuis cette position et s'arrête après `limit` lignes.
+Le coût d'une page reste donc constant quelle que soit sa profondeur.
+"""
+
+import base64
+import binascii
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .models import OptimizedImage
+from .serializers import OptimizedImageSerializer
+
+
+def encode_cursor(image):
+    """
+    Construit le curseur pointant juste après une image.
+
+    Args:
+        image: Dernière image de la page courante
+
+    Returns:
+        str: Curseur opaque (base64 URL-safe)
+    """
+    raw = f"{image.created_at.isoformat()}|{image.pk}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Décode un curseur reçu du client.
+
+    Args:
+        cursor: Curseur produit par encode_cursor
+
+    Returns:
+        tuple: (created_at, id) de la dernière image vue
+
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+    if created_at is None:
+        raise ValueError('Invalid cursor')
+    return created_at, pk
+
+
+def _page_queryset(queryset, cursor, limit):
+    """Requête d'une page : `limit + 1` lignes après le curseur (voir keyset_page)."""
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(created_at__lte=created_at).exclude(
+            created_at=created_at, id__gte=pk
+        )
+    # Une ligne de plus indique s'il existe une page suivante
+    return queryset[:limit + 1]
+
+
+def _split_page(rows, limit):
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def keyset_page(queryset, cursor, limit):
+    """
+    Lit une page de la liste, des plus récentes aux plus anciennes.
+
+    La condition « après le curseur » s'écrit
+    `created_at <= c AND NOT (created_at = c AND id >= i)` plutôt qu'avec un
+    OR : SQLite peut ainsi parcourir l'index composite en un seul balayage.
+
+    Args:
+        queryset: QuerySet d'OptimizedImage (filtres et prefetch déjà appliqués)
+        cursor: Curseur de la page précédente, ou None pour la première page
+        limit: Nombre maximum d'images de la page
+
+    Returns:
+        tuple: (liste des images, curseur de la page suivante ou None)
+
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    return _split_page(list(_page_queryset(queryset, cursor, limit)), limit)
+
+
+async def akeyset_page(queryset, cursor, limit):
+    """
+    Version asynchrone de keyset_page (vues asynchrones, itération `async for`).
+
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    rows = [image async for image in _page_queryset(queryset, cursor, limit)]
+    return _split_page(rows, limit)
+
+
+# ========== PAGES DE LA LISTE ==========
+
+def parse_list_params(params):
+    """
+    Lit les paramètres `limit` et `fields` de la liste.
+    
+    Args:
+        params: Paramètres de requête (request.GET)
+        
+    Returns:
+        tuple: (taille de page bornée, liste de champs ou None = tous)
+        
+    Raises:
+        ValueError: Paramètre invalide (400)
+    """
+    try:
+        limit = int(params.get('limit', settings.IMAGE_LIST_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("'limit' must be an integer")
+    limit = max(1, min(limit, settings.IMAGE_LIST_MAX_PAGE_SIZE))
+    
+    fields = None
+    if params.get('fields'):
+        fields = [name.strip() for name in params['fields'].split(',') if name.strip()]
+        unknown = set(fields) - set(OptimizedImageSerializer.Meta.fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return limit, fields
+
+
+def list_queryset(fields):
+    """
+    Requête de la liste : ne lit que les colonnes et relations utiles aux champs demandés.
+    
+    Args:
+        fields: Champs demandés, ou None pour tous
+        
+    Returns:
+        QuerySet: Images (non ordonnées : l'ordre est fixé par la pagination)
+    """
+    images = OptimizedImage.objects.all()
+    
+    # Le placeholder base64 est la colonne la plus lourde : il n'est lu que si demandé
+    if fields is not None and 'blur_placeholder' not in fields:
+        images = images.defer('blur_placeholder')
+    
+    # prefetch_related : les variantes de toute la page en une seule requête
+    if fields is None or {'variants', 'srcset'} & set(fields):
+        images = images.prefetch_related('variants')
+    return images
+
+
+def list_payload(request, page, fields, next_cursor):
+    """
+    Données d'une page : images sérialisées et URL de la page suivante.
+    
+    Args:
+        request: Requête HTTP (URLs absolues)
+        page: Images de la page (variantes déjà chargées si demandées)
+        fields: Champs demandés, ou None pour tous
+        next_cursor: Curseur de la page suivante, ou None
+        
+    Returns:
+        dict: {"results": [...], "next": URL ou None}
+    """
+    serializer = OptimizedImageSerializer(
+        page, many=True, fields=fields, context={'request': request}
+    )
+    
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+    
+    return {'results': serializer.data, 'next': next_url}
@@ -0,0 +1,144 @@
+"""
+Module des placeholders compacts (BlurHash).
+
+Ce module contient :
+- L'encodage BlurHash d'une petite image, vectorisé avec NumPy
+- Le rattrapage du BlurHash des images optimisées avant son introduction
+
+Un BlurHash décrit l'image par quelques composantes de cosinus (4×3 par
+défaut) encodées en base 83 : environ 28 caractères, contre ~1 KB pour le
+data URI JPEG de `blur_placeholder`. Le navigateur le décode en quelques
+pixels flous (SmartImage.jsx). Spécification : https://blurha.sh
+"""
+
+import numpy as np
+from PIL import Image
+
+from .caching import invalidate_images
+
+
+# Alphabet base 83 de la spécification BlurHash
+_BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+# Taille maximale de l'image analysée : au-delà, les composantes ne changent presque plus
+SAMPLE_SIZE = (32, 32)
+
+
+def _base83(value, length):
+    chars = []
+    for position in range(length - 1, -1, -1):
+        chars.append(_BASE83[(value // 83 ** position) % 83])
+    return ''.join(chars)
+
+
+def _srgb_to_linear(values):
+    values = values / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def encode_blurhash(img, components=(4, 3)):
+    """
+    Encode une image en BlurHash.
+
+    Toutes les composantes sont calculées en une opération matricielle :
+    produit des bases de cosinus horizontales et verticales avec les
+    pixels linéarisés.
+
+    Args:
+        img: Image RGB (réduite à SAMPLE_SIZE si elle est plus grande)
+        components: Nombre de composantes (horizontales, verticales), de 1 à 9
+
+    Returns:
+        str: BlurHash (2 + 4 + 2 × (x × y - 1) caractères)
+    """
+    x_components, y_components = components
+    if img.width > SAMPLE_SIZE[0] or img.height > SAMPLE_SIZE[1]:
+        img = img.copy()
+        img.thumbnail(SAMPLE_SIZE, Image.Resampling.BOX)
+
+    pixels = _srgb_to_linear(np.asarray(img.convert('RGB'), dtype=np.float64))
+    height, width = pixels.shape[:2]
+
+    # Bases de cosinus : (composantes, pixels) pour chaque axe
+    basis_x = np.cos(np.pi * np.arange(x_components)[:, None] * np.arange(width)[None, :] / width)
+    basis_y = np.cos(np.pi * np.arange(y_components)[:, None] * np.arange(height)[None, :] / height)
+
+    # factors[j, i] = moyenne de basis_y[j] × basis_x[i] × pixels, par canal
+    factors = np.einsum('jy,ix,yxc->jic', basis_y, basis_x, pixels) / (width * height)
+    factors[1:, :, :] *= 2
+    factors[0, 1:, :] *= 2
+    factors = factors.reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+
+    blurhash = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if len(ac):
+        quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+    else:
+        quantised_max, maximum = 0, 1
+    blurhash += _base83(quantised_max, 1)
+
+    r, g, b = (_linear_to_srgb(value) for value in dc)
+    blurhash += _base83((r << 16) + (g << 8) + b, 4)
+
+    # Composantes AC : racine signée, quantifiée sur 19 niveaux par canal
+    scaled = np.sign(ac) * np.sqrt(np.abs(ac) / maximum)
+    quantised = np.clip(np.floor(scaled * 9 + 9.5), 0, 18).astype(int)
+    for qr, qg, qb in quantised:
+        blurhash += _base83(qr * 19 * 19 + qg * 19 + qb, 2)
+    return blurhash
+
+
+def backfill_blurhash(model, components=(4, 3), batch_size=500):
+    """
+    Calcule le BlurHash des images optimisées avant son introduction.
+
+    Le BlurHash est calculé depuis la miniature (200 px, déjà stockée) :
+    aucun original n'est décodé. Les images sont parcourues par ID
+    croissant, par lots (une requête bornée et un bulk_update par lot).
+
+    Args:
+        model: Classe du modèle OptimizedImage
+        components: Nombre de composantes (horizontales, verticales)
+        batch_size: Nombre d'images par lot
+
+    Yields:
+        tuple: (nombre d'images mises à jour dans le lot, noms des miniatures illisibles)
+    """
+    last_id = 0
+    while True:
+        batch = list(
+            model.objects
+            .filter(id__gt=last_id, blurhash='')
+            .exclude(thumbnail='')
+            .exclude(thumbnail__isnull=True)
+            .order_by('id')
+            .only('id', 'thumbnail')[:batch_size]
+        )
+        if not batch:
+            return
+        last_id = batch[-1].id
+
+        updated = []
+        missing = []
+        for image in batch:
+            try:
+                with image.thumbnail.open('rb') as source, Image.open(source) as img:
+                    image.blurhash = encode_blurhash(img.convert('RGB'), components)
+            except (OSError, ValueError):
+                missing.append(image.thumbnail.name)
+                continue
+            updated.append(image)
+
+        model.objects.bulk_update(updated, ['blurhash'])
+        invalidate_images(image.pk for image in updated)
+        yield len(updated), missing
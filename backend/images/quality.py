@@ -0,0 +1,118 @@
+"""
+Module de recherche de qualité par mesure perceptuelle.
+
+Ce module contient :
+- Le calcul du SSIM (indice de similarité structurelle) avec NumPy
+- La recherche par dichotomie de la plus basse qualité d'encodage dont le
+  SSIM atteint une cible (profils avec `target_ssim`)
+
+Les essais sont faits sur une copie réduite de l'image (REFERENCE_SIZE) :
+chaque essai coûte quelques millisecondes quelle que soit la taille de
+l'original, puis l'original est encodé une seule fois avec la qualité trouvée.
+Une copie réduite concentre les détails : la qualité trouvée est plutôt
+prudente pour l'image pleine taille.
+"""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from .encoders import encode
+
+
+# Taille maximale de la copie sur laquelle les qualités sont essayées
+REFERENCE_SIZE = (512, 512)
+
+# Côté de la fenêtre locale du SSIM (fenêtre uniforme)
+SSIM_WINDOW = 7
+
+# Constantes de stabilisation du SSIM pour des valeurs 8 bits
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def luminance(img):
+    """Convertit une image Pillow en tableau de luminance (float64)."""
+    return np.asarray(img.convert('L'), dtype=np.float64)
+
+
+def _window_mean(values, size):
+    """
+    Moyenne de chaque fenêtre size×size entièrement contenue dans le tableau.
+
+    Calculée avec une image intégrale : le coût ne dépend pas de la taille
+    de la fenêtre.
+    """
+    integral = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    total = (
+        integral[size:, size:]
+        - integral[:-size, size:]
+        - integral[size:, :-size]
+        + integral[:-size, :-size]
+    )
+    return total / (size * size)
+
+
+def ssim(reference, candidate):
+    """
+    SSIM moyen entre deux tableaux de luminance de même taille.
+
+    Args:
+        reference: Luminance de l'image de référence
+        candidate: Luminance de l'image à évaluer
+
+    Returns:
+        float: Score entre -1 et 1 (1 = identique)
+    """
+    size = min(SSIM_WINDOW, *reference.shape)
+
+    mu_x = _window_mean(reference, size)
+    mu_y = _window_mean(candidate, size)
+    var_x = _window_mean(reference * reference, size) - mu_x * mu_x
+    var_y = _window_mean(candidate * candidate, size) - mu_y * mu_y
+    covariance = _window_mean(reference * candidate, size) - mu_x * mu_y
+
+    numerator = (2 * mu_x * mu_y + _C1) * (2 * covariance + _C2)
+    denominator = (mu_x * mu_x + mu_y * mu_y + _C1) * (var_x + var_y + _C2)
+    return float((numerator / denominator).mean())
+
+
+def search_quality(img, fmt, profile, target, quality_min, quality_max):
+    """
+    Cherche la plus basse qualité dont le SSIM atteint la cible.
+
+    Le SSIM est une fonction (presque) croissante de la qualité : une
+    dichotomie trouve la réponse en log2(quality_max - quality_min) essais.
+    Si même quality_max n'atteint pas la cible, quality_max est retenue.
+
+    Args:
+        img: Image RGB source (non modifiée)
+        fmt: Format logique ("webp", "jpeg"...)
+        profile: Nom du profil d'encodage (autres options de l'encodeur)
+        target: SSIM cible (ex: 0.95)
+        quality_min: Qualité la plus basse autorisée
+        quality_max: Qualité la plus haute autorisée
+
+    Returns:
+        int: Qualité retenue
+    """
+    # Copie réduite (nouvelle image : la source n'est ni copiée en entier ni modifiée)
+    ratio = min(REFERENCE_SIZE[0] / img.width, REFERENCE_SIZE[1] / img.height, 1)
+    size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+    sample = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+    reference = luminance(sample)
+
+    low, high = quality_min, quality_max
+    best = quality_max
+    while low <= high:
+        quality = (low + high) // 2
+        encoded = encode(sample, fmt, profile, quality)
+        with Image.open(BytesIO(encoded)) as decoded:
+            score = ssim(reference, luminance(decoded))
+        if score >= target:
+            best = quality
+            high = quality - 1
+        else:
+            low = quality + 1
+    return best
@@ -7,8 +7,39 @@ en format JSON pour l'API REST.
 
 # Import du sérialiseur de base de Django REST Framework
 from rest_framework import serializers
+from django.urls import reverse
 # Import du modèle à sérialiser
-from .models import OptimizedImage
+from .models import ImageVariant, OptimizedImage, OptimizationJob
+
+
+class ImageVariantSerializer(serializers.ModelSerializer):
+    """
+    Sérialiseur pour une variante responsive (ImageVariant).
+    """
+    
+    url = serializers.SerializerMethodField(
+        help_text="URL complète du fichier de la variante"
+    )
+    
+    class Meta:
+        model = ImageVariant
+        fields = ['width', 'height', 'format', 'byte_size', 'url']
+        read_only_fields = fields
+    
+    def get_url(self, obj):
+        """
+        Génère l'URL complète du fichier de la variante.
+        
+        Args:
+            obj: Instance du modèle ImageVariant
+            
+        Returns:
+            str: URL complète du fichier
+        """
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(obj.file.url)
+        return obj.file.url
 
 
 class OptimizedImageSerializer(serializers.ModelSerializer):
@@ -35,8 +66,22 @@ class OptimizedImageSerializer(serializers.ModelSerializer):
         help_text="URL complète de la miniature"
     )
     
-    size_reduction = serializers.SerializerMethodField(
-        help_text="Pourcentage de réduction de taille entre original et WebP"
+    render_url = serializers.SerializerMethodField(
+        help_text="URL de base des dérivés à la demande (?w=&h=&fit=&fmt=&q=)"
+    )
+    
+    image_url = serializers.SerializerMethodField(
+        help_text="URL servant le meilleur format accepté par le client (AVIF, WebP ou JPEG)"
+    )
+    
+    variants = ImageVariantSerializer(
+        many=True,
+        read_only=True,
+        help_text="Variantes responsives (largeur, hauteur, format, taille)"
+    )
+    
+    srcset = serializers.SerializerMethodField(
+        help_text="Attribut srcset prêt à l'emploi (variantes + WebP pleine taille)"
     )
     
     class Meta:
@@ -57,16 +102,45 @@ class OptimizedImageSerializer(serializers.ModelSerializer):
             'width',                 # Largeur en pixels
             'height',                # Hauteur en pixels
             'format',                # Format de l'image (JPEG, PNG, etc.)
+            'frame_count',           # Nombre d'images (plus de 1 : animation)
             'created_at',            # Date de création
             'original_url',          # URL complète (calculée)
             'webp_url',              # URL WebP (calculée)
             'thumbnail_url',         # URL thumbnail (calculée)
             'blur_placeholder',      # Placeholder flou en base64
-            'size_reduction'         # % de réduction (calculé)
+            'blurhash',              # Placeholder compact (BlurHash)
+            'webp_size',             # Taille du WebP en octets
+            'thumbnail_size',        # Taille de la miniature en octets
+            'size_reduction',        # % de réduction (enregistré à l'optimisation)
+            'encoding_profile',      # Profil d'encodage choisi à l'upload
+            'encoding_quality',      # Qualité WebP utilisée
+            'render_url',            # URL des dérivés à la demande (calculée)
+            'image_url',             # URL négociée selon Accept (calculée)
+            'variants',              # Variantes responsives
+            'srcset'                 # srcset prêt à l'emploi (calculé)
         ]
         
         # Champs qui ne peuvent pas être modifiés via l'API
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'created_at', 'updated_at', 'webp_size', 'thumbnail_size', 'size_reduction',
+            'encoding_profile', 'encoding_quality', 'frame_count',
+        ]
+    
+    def __init__(self, *args, **kwargs):
+        """
+        Initialise le sérialiseur, éventuellement restreint à certains champs.
+        
+        Args:
+            fields: Noms des champs à inclure (None = tous). L'ID est
+                toujours inclus.
+        """
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        
+        if fields is not None:
+            keep = set(fields) | {'id'}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
     
     def get_original_url(self, obj):
         """
@@ -127,17 +201,91 @@ class OptimizedImageSerializer(serializers.ModelSerializer):
             return obj.thumbnail.url
         return None
     
-    def get_size_reduction(self, obj):
+    def get_render_url(self, obj):
         """
-        Calcule le pourcentage de réduction de taille.
+        Génère l'URL de l'endpoint de rendu à la demande.
         
-        Utilise la méthode du modèle pour calculer la réduction.
+        Le client y ajoute les paramètres voulus, par exemple `?w=640`
+        pour obtenir exactement la largeur qu'il affiche.
         
         Args:
             obj: Instance du modèle OptimizedImage
             
         Returns:
-            float: Pourcentage de réduction (ex: 65.5)
+            str: URL complète de l'endpoint de rendu
         """
-        return obj.get_size_reduction()
-
+        url = reverse('images:render', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+    
+    def get_image_url(self, obj):
+        """
+        Génère l'URL de l'endpoint servant le format négocié.
+        
+        Args:
+            obj: Instance du modèle OptimizedImage
+            
+        Returns:
+            str: URL complète de l'endpoint (accepte `?w=` parmi les largeurs de l'échelle)
+        """
+        url = reverse('images:serve', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+    
+    def get_srcset(self, obj):
+        """
+        Construit l'attribut srcset à partir des variantes WebP.
+        
+        La version WebP pleine taille est ajoutée comme plus grande entrée.
+        Le navigateur choisit ensuite la plus petite image suffisante.
+        
+        Args:
+            obj: Instance du modèle OptimizedImage
+            
+        Returns:
+            str: Valeur srcset (ex: "http://.../a_320w.webp 320w, ...")
+        """
+        request = self.context.get('request')
+        
+        def absolute(url):
+            return request.build_absolute_uri(url) if request else url
+        
+        # Utilise obj.variants.all() pour profiter du prefetch_related des vues
+        entries = [
+            f"{absolute(variant.file.url)} {variant.width}w"
+            for variant in obj.variants.all()
+            if variant.format == 'WEBP'
+        ]
+        if obj.webp_file and obj.width:
+            entries.append(f"{absolute(obj.webp_file.url)} {obj.width}w")
+        return ', '.join(entries)
+    
+class OptimizationJobSerializer(serializers.ModelSerializer):
+    """
+    Sérialiseur pour le modèle OptimizationJob.
+    
+    Utilisé par l'endpoint de statut pour suivre l'avancement
+    d'une optimisation en arrière-plan.
+    """
+    
+    job_id = serializers.IntegerField(source='id', read_only=True)
+    
+    image_id = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = OptimizationJob
+        fields = [
+            'job_id',                # ID du job
+            'image_id',              # ID de l'image concernée
+            'status',                # pending, processing, done ou failed
+            'attempts',              # Nombre de prises en charge
+            'error',                 # Message d'erreur éventuel
+            'created_at',            # Date de mise en file d'attente
+            'started_at',            # Date de début de traitement
+            'finished_at',           # Date de fin de traitement
+        ]
+        read_only_fields = fields
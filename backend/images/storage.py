@@ -0,0 +1,728 @@
+"""
+Module de gestion des fichiers stockés (blobs).
+
+Ce module contient :
+- Le calcul de l'empreinte de contenu (SHA-256) des uploads
+- La déduplication : un fichier déjà connu réutilise les variantes existantes
+- Le comptage de références : un fichier n'est supprimé que lorsque plus
+  aucun enregistrement ne l'utilise (après le commit, en arrière-plan)
+- Le rattrapage des tailles de fichiers des enregistrements existants
+- Le déplacement des fichiers existants vers les dossiers répartis (shard_path)
+- La recherche et la suppression des fichiers orphelins (gc_media)
+"""
+
+import contextlib
+import hashlib
+import itertools
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, models, transaction
+from django.db.models import Case, F, Q, Value, When
+
+from . import metrics
+from .caching import invalidate_images
+from .models import (
+    ORIGINALS_DIR,
+    THUMBNAILS_DIR,
+    VARIANTS_DIR,
+    WEBP_DIR,
+    ImageVariant,
+    OptimizedImage,
+    compute_size_reduction,
+    shard_path,
+)
+
+
+# Champs fichier d'OptimizedImage pouvant être partagés entre enregistrements
+FILE_FIELDS = ('original_file', 'webp_file', 'thumbnail')
+
+# Noms de fichiers par requête de comptage de références (listes IN bornées)
+# et par tâche de suppression en arrière-plan
+RELEASE_BATCH_SIZE = 2000
+
+_cleanup = None
+_cleanup_lock = threading.Lock()
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def compute_content_hash(uploaded_file):
+    """
+    Retourne l'empreinte SHA-256 d'un fichier uploadé.
+
+    L'empreinte est normalement calculée pendant la réception par les
+    gestionnaires de `images.uploadhandlers`. À défaut (gestionnaires
+    différents, fichier construit à la main), le fichier est relu par morceaux.
+
+    Args:
+        uploaded_file: Fichier uploadé (UploadedFile ou File Django)
+
+    Returns:
+        str: Empreinte hexadécimale (64 caractères)
+    """
+    content_hash = getattr(uploaded_file, 'content_hash', None)
+    if content_hash:
+        return content_hash
+
+    hasher = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        hasher.update(chunk)
+    uploaded_file.seek(0)
+    return hasher.hexdigest()
+
+
+def find_duplicate(content_hash, encoding_profile):
+    """
+    Cherche une image déjà optimisée ayant le même contenu et le même profil.
+
+    Args:
+        content_hash: Empreinte SHA-256 du fichier uploadé
+        encoding_profile: Profil d'encodage demandé (ses variantes diffèrent d'un profil à l'autre)
+
+    Returns:
+        OptimizedImage: Enregistrement existant, ou None
+    """
+    return (
+        OptimizedImage.objects
+        .filter(content_hash=content_hash, encoding_profile=encoding_profile)
+        .exclude(webp_file='')
+        .exclude(webp_file__isnull=True)
+        .order_by('id')
+        .first()
+    )
+
+
+def find_duplicates(content_hashes, encoding_profile):
+    """
+    Cherche en une requête les images déjà optimisées pour plusieurs empreintes.
+
+    Args:
+        content_hashes: Empreintes SHA-256 des fichiers uploadés
+        encoding_profile: Profil d'encodage demandé pour tout le lot
+
+    Returns:
+        dict: Empreinte -> OptimizedImage existante (la plus ancienne)
+    """
+    duplicates = {}
+    candidates = (
+        OptimizedImage.objects
+        .filter(content_hash__in=set(content_hashes), encoding_profile=encoding_profile)
+        .exclude(webp_file='')
+        .exclude(webp_file__isnull=True)
+        .order_by('id')
+    )
+    for image in candidates:
+        duplicates.setdefault(image.content_hash, image)
+    return duplicates
+
+
+def optimized_fields(existing):
+    """
+    Valeurs des champs produits par l'optimisation d'une image.
+
+    Les champs fichier sont donnés par leur nom : les fichiers sont
+    partagés, jamais copiés.
+
+    Args:
+        existing: OptimizedImage optimisée
+
+    Returns:
+        dict: Nom du champ -> valeur, pour create() ou update()
+    """
+    return {
+        'webp_file': existing.webp_file.name,
+        'thumbnail': existing.thumbnail.name,
+        'webp_size': existing.webp_size,
+        'thumbnail_size': existing.thumbnail_size,
+        'size_reduction': existing.size_reduction,
+        'encoding_quality': existing.encoding_quality,
+        'blur_placeholder': existing.blur_placeholder,
+        'blurhash': existing.blurhash,
+        'width': existing.width,
+        'height': existing.height,
+        'format': existing.format,
+        'frame_count': existing.frame_count,
+    }
+
+
+def _shared_variants(existing, image_ids):
+    """Variantes de `existing` recréées pour chaque image de `image_ids` (mêmes fichiers)."""
+    variants = list(existing.variants.all())
+    return [
+        ImageVariant(
+            image_id=image_id,
+            file=variant.file.name,
+            width=variant.width,
+            height=variant.height,
+            format=variant.format,
+            byte_size=variant.byte_size,
+        )
+        for image_id in image_ids
+        for variant in variants
+    ]
+
+
+def clone_image(existing, original_name):
+    """
+    Crée un nouvel enregistrement qui référence les fichiers d'une image existante.
+
+    Aucun fichier n'est copié ni ré-encodé : les champs fichier et les
+    variantes responsives pointent vers les mêmes noms dans le stockage.
+
+    L'image existante est relue (et verrouillée si la base le permet) dans
+    la transaction de création : les noms copiés sont ceux de la base au
+    moment du clonage, pas ceux lus plus tôt par la requête (un fichier
+    renommé entre-temps par shard_media ne laisse pas de clone orphelin).
+
+    Args:
+        existing: OptimizedImage dont le contenu est identique
+        original_name: Nom du fichier tel qu'envoyé par l'utilisateur
+
+    Returns:
+        OptimizedImage: Nouvel enregistrement sauvegardé
+    """
+    with transaction.atomic():
+        existing = OptimizedImage.objects.select_for_update().get(pk=existing.pk)
+        clone = OptimizedImage.objects.create(
+            original_name=original_name,
+            original_file=existing.original_file.name,
+            original_size=existing.original_size,
+            content_hash=existing.content_hash,
+            encoding_profile=existing.encoding_profile,
+            **optimized_fields(existing),
+        )
+        ImageVariant.objects.bulk_create(_shared_variants(existing, [clone.pk]))
+
+    # Variantes ajoutées après le signal de create() : nouvelle invalidation
+    invalidate_images([clone.pk])
+    return clone
+
+
+def share_optimized_files(existing, image_ids):
+    """
+    Fait référencer à des images au contenu identique les fichiers optimisés
+    d'une image existante.
+
+    Un UPDATE pour toutes les images, puis leurs variantes sont remplacées
+    par celles de `existing` : rien n'est ré-encodé. Sert à une image en
+    attente dont le contenu a été optimisé entre-temps, et aux doublons
+    d'une image ré-optimisée.
+
+    Args:
+        existing: OptimizedImage optimisée
+        image_ids: Identifiants des images à faire pointer sur ses fichiers
+
+    Returns:
+        set: Noms des fichiers que ces images référençaient jusque-là (à
+        libérer avec release_files_on_commit)
+    """
+    image_ids = [image_id for image_id in image_ids if image_id != existing.pk]
+    if not image_ids:
+        return set()
+
+    images = OptimizedImage.objects.filter(pk__in=image_ids)
+    variants = ImageVariant.objects.filter(image_id__in=image_ids)
+    with transaction.atomic():
+        previous = {
+            name
+            for row in images.order_by().values_list('webp_file', 'thumbnail')
+            for name in row
+            if name
+        }
+        previous.update(name for name in variants.values_list('file', flat=True) if name)
+
+        images.update(**optimized_fields(existing))
+        variants.delete()
+        ImageVariant.objects.bulk_create(_shared_variants(existing, image_ids))
+
+    invalidate_images(image_ids)
+    return previous
+
+
+def image_file_names(image):
+    """
+    Liste les noms des fichiers stockés d'une image, variantes comprises.
+
+    À appeler avant la suppression : les variantes sont supprimées en cascade.
+
+    Args:
+        image: Instance OptimizedImage
+
+    Returns:
+        list: Noms relatifs au stockage (fichiers vides ignorés)
+    """
+    names = [getattr(image, name).name for name in FILE_FIELDS if getattr(image, name)]
+    names.extend(name for name in image.variants.values_list('file', flat=True) if name)
+    return names
+
+
+def referenced_names(names):
+    """
+    Retourne les noms encore utilisés par au moins un enregistrement.
+
+    C'est le comptage de références des blobs : il est dérivé de la base
+    plutôt que stocké dans un compteur, il ne peut donc pas se désynchroniser.
+    Les colonnes de fichiers sont indexées : chaque nom est une recherche
+    par index, pas un parcours de la table.
+
+    Args:
+        names: Noms de fichiers à vérifier
+
+    Returns:
+        set: Sous-ensemble de `names` encore référencé
+    """
+    names = set(names)
+    if not names:
+        return set()
+
+    query = Q()
+    for field_name in FILE_FIELDS:
+        query |= Q(**{f'{field_name}__in': names})
+
+    referenced = set()
+    for row in OptimizedImage.objects.filter(query).order_by().values_list(*FILE_FIELDS):
+        referenced.update(row)
+    referenced.update(
+        ImageVariant.objects.filter(file__in=names).values_list('file', flat=True)
+    )
+    return names & referenced
+
+
+def release_files(names, storage):
+    """
+    Supprime du stockage les fichiers qui ne sont plus référencés.
+
+    À appeler après la suppression d'un enregistrement : les fichiers
+    partagés avec un doublon sont conservés.
+
+    Args:
+        names: Noms des fichiers de l'enregistrement supprimé
+        storage: Backend de stockage Django (ex: image.original_file.storage)
+
+    Returns:
+        list: Noms effectivement supprimés
+    """
+    orphans = sorted(set(names) - referenced_names(names))
+    for name in orphans:
+        storage.delete(name)
+    return orphans
+
+
+def stored_file_names(images):
+    """
+    Noms des fichiers stockés d'un ensemble d'images, variantes comprises.
+
+    Version groupée de image_file_names (deux requêtes quel que soit le nombre d'images).
+
+    Args:
+        images: QuerySet d'OptimizedImage
+
+    Returns:
+        set: Noms relatifs au stockage (fichiers vides ignorés)
+    """
+    names = set()
+    for row in images.order_by().values_list(*FILE_FIELDS):
+        names.update(row)
+    names.update(
+        ImageVariant.objects.filter(image__in=images.order_by().values('pk')).values_list('file', flat=True)
+    )
+    names.discard('')
+    names.discard(None)
+    return names
+
+
+# ========== SUPPRESSION EN ARRIÈRE-PLAN ==========
+
+def _cleanup_executor():
+    """Thread de suppression des fichiers du processus, créé au premier usage."""
+    global _cleanup
+    with _cleanup_lock:
+        if _cleanup is None:
+            _cleanup = ThreadPoolExecutor(max_workers=1, thread_name_prefix='imageboost-cleanup')
+        return _cleanup
+
+
+def _release_in_background(names, storage):
+    try:
+        release_files(names, storage)
+    except Exception:
+        # Fichiers laissés sur disque : supprimés par le prochain `gc_media`
+        metrics.inc('imageboost_errors_total', stage='cleanup')
+    finally:
+        # Connexion propre au thread de suppression (fermée si expirée ou en erreur)
+        close_old_connections()
+
+
+def release_files_on_commit(names, storage):
+    """
+    Supprime les fichiers non référencés après le commit, en arrière-plan.
+
+    La suppression attend le commit de la transaction en cours (rien n'est
+    supprimé si elle est annulée), puis s'exécute dans un thread dédié :
+    la requête ne paie ni le comptage de références ni les accès disque.
+    Les noms sont traités par lots de RELEASE_BATCH_SIZE (une requête de
+    comptage et une tâche par lot). Les tâches sont exécutées dans l'ordre,
+    une à la fois ; celles encore en attente sont terminées à l'arrêt du
+    processus.
+
+    Args:
+        names: Noms des fichiers des enregistrements supprimés
+        storage: Backend de stockage Django
+    """
+    names = sorted({name for name in names if name})
+    if not names:
+        return
+
+    def schedule():
+        executor = _cleanup_executor()
+        for batch in _chunks(names, RELEASE_BATCH_SIZE):
+            executor.submit(_release_in_background, batch, storage)
+
+    transaction.on_commit(schedule)
+
+
+def _stored_size(field_file):
+    """
+    Lit la taille d'un fichier dans le stockage.
+
+    Args:
+        field_file: FieldFile d'un champ fichier (peut être vide)
+
+    Returns:
+        int: Taille en octets, 0 si le champ est vide, None si le fichier est introuvable
+    """
+    if not field_file:
+        return 0
+    try:
+        return field_file.storage.size(field_file.name)
+    except OSError:
+        return None
+
+
+def backfill_file_sizes(model, batch_size=500):
+    """
+    Renseigne webp_size, thumbnail_size et size_reduction des images
+    optimisées avant que ces tailles ne soient enregistrées en base.
+
+    Les images sont parcourues par ID croissant, par lots : chaque lot est
+    une requête bornée suivie d'un seul bulk_update. Les fichiers
+    introuvables sont signalés et leur taille laissée à 0.
+
+    Utilisé par la commande `backfill_sizes` (la migration 0007 en garde
+    une copie figée qui ne dépend que du modèle historique).
+
+    Args:
+        model: Classe du modèle OptimizedImage
+        batch_size: Nombre d'images par lot
+
+    Yields:
+        tuple: (nombre d'images mises à jour dans le lot, noms des fichiers introuvables)
+    """
+    last_id = 0
+    while True:
+        batch = list(
+            model.objects
+            .filter(id__gt=last_id, webp_size=0)
+            .exclude(webp_file='')
+            .exclude(webp_file__isnull=True)
+            .order_by('id')
+            .only('id', 'original_size', 'webp_file', 'thumbnail')[:batch_size]
+        )
+        if not batch:
+            return
+        last_id = batch[-1].id
+
+        missing = []
+        for image in batch:
+            webp_size = _stored_size(image.webp_file)
+            thumbnail_size = _stored_size(image.thumbnail)
+            if webp_size is None:
+                missing.append(image.webp_file.name)
+            if thumbnail_size is None:
+                missing.append(image.thumbnail.name)
+
+            image.webp_size = webp_size or 0
+            image.thumbnail_size = thumbnail_size or 0
+            image.size_reduction = compute_size_reduction(image.original_size, image.webp_size)
+
+        model.objects.bulk_update(batch, ['webp_size', 'thumbnail_size', 'size_reduction'])
+        invalidate_images(image.pk for image in batch)
+        yield len(batch), missing
+
+
+# ========== RÉPARTITION EN SOUS-DOSSIERS ==========
+
+# Champs fichier à déplacer : (modèle, champ, dossier, champ de l'ID de l'image)
+# Délai (secondes) avant la suppression des anciens noms d'un lot réparti :
+# une requête qui a lu l'ancien nom juste avant la mise à jour a le temps de
+# finir, puis les références sont recomptées (release_files)
+SHARD_RELEASE_GRACE = 30
+
+SHARDED_FIELDS = (
+    (OptimizedImage, 'original_file', ORIGINALS_DIR, 'id'),
+    (OptimizedImage, 'webp_file', WEBP_DIR, 'id'),
+    (OptimizedImage, 'thumbnail', THUMBNAILS_DIR, 'id'),
+    (ImageVariant, 'file', VARIANTS_DIR, 'image_id'),
+)
+
+
+def _link_or_copy(storage, name, target):
+    """
+    Rend le fichier `name` disponible sous le nom `target`, sans le retirer.
+
+    Sur disque, un lien physique est créé (instantané, sans copie) ; à
+    défaut (autre système de fichiers), le fichier est copié puis renommé
+    atomiquement. Les autres stockages passent par open/save.
+
+    Returns:
+        str: Nom effectivement utilisé (différent de `target` si ce nom est pris)
+    """
+    try:
+        source = storage.path(name)
+    except NotImplementedError:
+        with storage.open(name, 'rb') as content:
+            return storage.save(target, content)
+
+    if storage.exists(target):
+        if os.path.samefile(source, storage.path(target)):
+            # Déjà lié par une exécution interrompue
+            return target
+        target = storage.get_available_name(target)
+
+    destination = storage.path(target)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        tmp_path = f"{destination}.tmp"
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, destination)
+    return target
+
+
+def shard_stored_files(batch_size=500, keep_old=False, release_grace=SHARD_RELEASE_GRACE):
+    """
+    Déplace les fichiers existants vers les dossiers répartis, par lots.
+
+    Pensé pour tourner pendant que le service reste en ligne. Pour chaque lot
+    (requête bornée par ID croissant) :
+
+    1. Chaque fichier est rendu disponible sous son nouveau nom (lien
+       physique) : l'ancien nom reste valide pendant la mise à jour
+    2. Les enregistrements qui référencent encore l'ancien nom sont mis à
+       jour en une requête UPDATE par champ (doublons compris)
+    3. Après `release_grace` secondes, l'ancien nom est supprimé s'il n'est
+       plus référencé (release_files) : un enregistrement créé entre-temps
+       avec l'ancien nom le conserve. Les lots suivants sont traités pendant
+       ce délai ; le dernier est attendu à la fin
+
+    La commande peut être interrompue et relancée : les fichiers déjà
+    répartis sont ignorés (les anciens noms non supprimés le seront par gc_media).
+
+    Args:
+        batch_size: Nombre d'enregistrements lus par lot
+        keep_old: Conserver les anciens noms (supprimés plus tard par gc_media)
+        release_grace: Délai en secondes avant la suppression des anciens noms
+
+    Yields:
+        tuple: (champ, nombre de fichiers déplacés dans le lot, noms introuvables)
+    """
+    # Anciens noms en attente de suppression : (échéance, noms, stockage)
+    pending = []
+
+    def release_due(now):
+        while pending and pending[0][0] <= now:
+            _, names, storage = pending.pop(0)
+            release_files(names, storage)
+
+    for model, field_name, directory, image_field in SHARDED_FIELDS:
+        storage = model._meta.get_field(field_name).storage
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects
+                .filter(id__gt=last_id)
+                .exclude(**{field_name: ''})
+                .exclude(**{f'{field_name}__isnull': True})
+                .order_by('id')
+                .values_list('id', field_name)[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            renames = {}
+            missing = []
+            for _, name in rows:
+                target = shard_path(directory, os.path.basename(name))
+                if name == target or name in renames:
+                    continue
+                if not storage.exists(name):
+                    missing.append(name)
+                    continue
+                renames[name] = _link_or_copy(storage, name, target)
+
+            if renames:
+                affected = model.objects.filter(**{f'{field_name}__in': list(renames)})
+                with transaction.atomic():
+                    image_ids = set(affected.values_list(image_field, flat=True))
+                    affected.update(**{field_name: Case(
+                        *[When(**{field_name: old}, then=Value(new)) for old, new in renames.items()],
+                        default=F(field_name),
+                        output_field=models.CharField(),
+                    )})
+                    invalidate_images(image_ids)
+                if not keep_old:
+                    pending.append((time.monotonic() + release_grace, list(renames), storage))
+
+            release_due(time.monotonic())
+            yield f'{model.__name__}.{field_name}', len(renames), missing
+
+    if pending:
+        time.sleep(max(pending[-1][0] - time.monotonic(), 0))
+        release_due(time.monotonic())
+
+
+
+# ========== FICHIERS ORPHELINS ==========
+
+# Dossiers de MEDIA_ROOT écrits par l'application : les seuls parcourus par gc_media
+MANAGED_DIRS = (ORIGINALS_DIR, WEBP_DIR, THUMBNAILS_DIR, VARIANTS_DIR)
+
+
+def _name_digests(names):
+    """Empreintes 64 bits des noms de fichiers (8 octets par nom en mémoire)."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), 'little') for name in names),
+        dtype=np.uint64,
+        count=len(names),
+    )
+
+
+def _referenced_digests(chunk_size):
+    """
+    Empreintes triées et uniques de tous les noms référencés en base.
+
+    Les noms sont lus par paquets (itérateur côté base) et convertis
+    aussitôt en tableau NumPy : quelques dizaines de Mo pour des millions
+    de fichiers, au lieu d'un ensemble de chaînes Python.
+    """
+    querysets = [
+        OptimizedImage.objects.order_by().values_list(field_name, flat=True)
+        for field_name in FILE_FIELDS
+    ]
+    querysets.append(ImageVariant.objects.order_by().values_list('file', flat=True))
+
+    arrays = [np.empty(0, dtype=np.uint64)]
+    for queryset in querysets:
+        for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+            arrays.append(_name_digests([name for name in chunk if name]))
+    return np.unique(np.concatenate(arrays))
+
+
+def _scan_files(root, excluded):
+    """
+    Parcourt récursivement un dossier avec os.scandir (sans suivre les liens).
+
+    Le type de chaque entrée est connu sans appel à stat() : seul le
+    parcours des dossiers coûte des appels système.
+
+    Yields:
+        os.DirEntry: Fichiers réguliers
+    """
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in excluded:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def collect_orphaned_files(min_age=3600, chunk_size=10000, delete=False):
+    """
+    Trouve (et supprime) les fichiers de MEDIA_ROOT qu'aucun enregistrement ne référence.
+
+    1. Les noms référencés en base sont chargés une fois, sous forme
+       d'empreintes 64 bits triées (tableau NumPy)
+    2. Les dossiers gérés (MANAGED_DIRS) sont parcourus par paquets de
+       `chunk_size` fichiers ; chaque paquet est comparé aux empreintes
+       en une recherche dichotomique vectorisée (np.searchsorted)
+    3. Les candidats plus récents que `min_age` sont ignorés (upload en
+       cours : fichier écrit avant l'insertion de sa ligne)
+    4. Les candidats restants sont vérifiés par une requête exacte
+       (referenced_names) : ni une collision d'empreintes ni un
+       enregistrement créé pendant le parcours ne fait supprimer un fichier
+       utilisé
+
+    Les dossiers du cache des dérivés, des sessions d'upload et des
+    métriques sont ignorés s'ils se trouvent dans MEDIA_ROOT.
+
+    Args:
+        min_age: Âge minimum (secondes, date de modification) d'un fichier supprimable
+        chunk_size: Nombre de fichiers comparés par paquet
+        delete: False pour seulement lister les orphelins
+
+    Yields:
+        tuple: (dossier, fichiers parcourus dans le paquet, liste de (nom, taille) des orphelins)
+
+    Raises:
+        NotImplementedError: Si le stockage n'est pas un stockage sur disque
+    """
+    storage = OptimizedImage._meta.get_field('original_file').storage
+    media_root = os.path.abspath(storage.path(''))
+    excluded = {
+        os.path.abspath(str(path))
+        for path in (settings.RENDER_CACHE_DIR, settings.UPLOAD_SESSION_DIR, settings.METRICS_DIR)
+    }
+    referenced = _referenced_digests(chunk_size)
+    cutoff = time.time() - min_age
+
+    for directory in MANAGED_DIRS:
+        entries = _scan_files(os.path.join(media_root, directory), excluded)
+        for chunk in _chunks(entries, chunk_size):
+            names = [entry.path[len(media_root) + 1:].replace(os.sep, '/') for entry in chunk]
+
+            # Empreintes absentes du tableau trié : candidats orphelins
+            digests = _name_digests(names)
+            positions = np.searchsorted(referenced, digests)
+            known = np.zeros(len(names), dtype=bool)
+            inside = positions < len(referenced)
+            known[inside] = referenced[positions[inside]] == digests[inside]
+
+            candidates = {}
+            for index in np.flatnonzero(~known):
+                try:
+                    stat = chunk[index].stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime <= cutoff:
+                    candidates[names[index]] = (chunk[index].path, stat.st_size)
+
+            # Les colonnes de fichiers ne sont pas indexées : chaque requête
+            # parcourt la table, d'où des listes longues (RELEASE_BATCH_SIZE)
+            for names_part in _chunks(list(candidates), RELEASE_BATCH_SIZE):
+                for name in referenced_names(names_part):
+                    del candidates[name]
+
+            if delete:
+                for path, _ in candidates.values():
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(path)
+            yield directory, len(chunk), [(name, size) for name, (_, size) in sorted(candidates.items())]
@@ -0,0 +1,321 @@
+"""
+Module de gestion de la file d'attente d'optimisation.
+
+Ce module contient les fonctions utilisées par le mode asynchrone :
+- Mise en file d'attente d'une image (enqueue_optimization)
+- Réservation atomique des jobs par les workers (claim_jobs)
+- Exécution d'un job dans un processus du pool (run_job), avec un bail
+  renouvelé tant que le job tourne (heartbeat_at)
+- Ré-optimisation d'une image par la commande `reoptimize` (reoptimize_image)
+- Le pool de processus partagé des vues asynchrones (optimization_pool)
+
+Les imports de modèles sont faits à l'intérieur des fonctions : ce module
+est importé par les processus enfants du pool avant que Django ne soit
+initialisé (processus démarrés en mode "spawn").
+"""
+
+import contextlib
+import os
+import threading
+from datetime import timedelta
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_worker():
+    """
+    Initialise un processus enfant du pool de workers.
+
+    Configure Django (les processus sont démarrés en mode "spawn") et
+    s'assure qu'aucune connexion n'est ouverte : une connexion SQLite ne
+    doit jamais être partagée entre processus.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'imageBoost.settings')
+    import django
+    django.setup()
+
+    from django.db import connections
+    connections.close_all()
+
+
+def enqueue_optimization(image):
+    """
+    Crée un job d'optimisation en attente pour une image.
+
+    Args:
+        image: Instance OptimizedImage déjà sauvegardée
+
+    Returns:
+        OptimizationJob: Le job créé (statut "pending")
+    """
+    from .models import OptimizationJob
+    return OptimizationJob.objects.create(image=image)
+
+
+def claim_jobs(limit):
+    """
+    Réserve jusqu'à `limit` jobs en attente pour ce worker.
+
+    Chaque job est réservé par un UPDATE conditionnel (status='pending') :
+    si deux workers essaient de prendre le même job, un seul y parvient.
+
+    Args:
+        limit: Nombre maximum de jobs à réserver
+
+    Returns:
+        list: Identifiants des jobs réservés (passés au statut "processing")
+    """
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import OptimizationJob
+
+    candidates = OptimizationJob.objects.filter(
+        status=OptimizationJob.STATUS_PENDING
+    ).order_by('created_at').values_list('id', flat=True)[:limit]
+
+    claimed = []
+    for job_id in candidates:
+        now = timezone.now()
+        updated = OptimizationJob.objects.filter(
+            pk=job_id,
+            status=OptimizationJob.STATUS_PENDING,
+        ).update(
+            status=OptimizationJob.STATUS_PROCESSING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale_jobs(max_age_seconds):
+    """
+    Remet en attente les jobs bloqués au statut "processing".
+
+    Un job reste bloqué si son worker a été tué pendant le traitement : son
+    bail (heartbeat_at) n'est alors plus renouvelé. Un job en cours, même
+    long, renouvelle son bail toutes les IMAGE_JOB_HEARTBEAT_INTERVAL
+    secondes et n'est jamais remis en attente.
+
+    Args:
+        max_age_seconds: Durée sans renouvellement au-delà de laquelle un job est considéré perdu
+
+    Returns:
+        int: Nombre de jobs remis en attente
+    """
+    from django.db.models import Q
+    from django.utils import timezone
+    from .models import OptimizationJob
+
+    limit = timezone.now() - timedelta(seconds=max_age_seconds)
+    return OptimizationJob.objects.filter(
+        Q(heartbeat_at__lt=limit) | Q(heartbeat_at__isnull=True, started_at__lt=limit),
+        status=OptimizationJob.STATUS_PROCESSING,
+    ).update(status=OptimizationJob.STATUS_PENDING)
+
+
+@contextlib.contextmanager
+def job_heartbeat(job_id, interval):
+    """
+    Renouvelle le bail d'un job dans un thread tant que le bloc s'exécute.
+
+    Le thread a sa propre connexion à la base, fermée à la sortie. Un
+    renouvellement qui échoue (base verrouillée) est simplement retenté à
+    l'intervalle suivant.
+
+    Args:
+        job_id: Identifiant du job en cours
+        interval: Délai entre deux renouvellements (secondes)
+    """
+    from django.db import DatabaseError, connection
+    from django.utils import timezone
+    from .models import OptimizationJob
+
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    OptimizationJob.objects.filter(
+                        pk=job_id,
+                        status=OptimizationJob.STATUS_PROCESSING,
+                    ).update(heartbeat_at=timezone.now())
+                except DatabaseError:
+                    pass
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'job-{job_id}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job_id):
+    """
+    Exécute un job d'optimisation (appelé dans un processus du pool).
+
+    Args:
+        job_id: Identifiant du job réservé par claim_jobs
+
+    Returns:
+        tuple: (job_id, statut final, message d'erreur éventuel)
+    """
+    from django.conf import settings
+    from django.db import connection
+    from django.utils import timezone
+    from .models import OptimizationJob
+    from .storage import find_duplicate, share_optimized_files
+    from .utils import optimize_image
+
+    try:
+        job = OptimizationJob.objects.select_related('image').get(pk=job_id)
+    except OptimizationJob.DoesNotExist:
+        # L'image a été supprimée entre-temps (suppression en cascade du job)
+        return job_id, OptimizationJob.STATUS_FAILED, 'Job not found'
+
+    image = job.image
+    try:
+        # Même contenu optimisé entre-temps (fichier identique d'un même lot) :
+        # ses fichiers sont partagés au lieu d'être encodés une seconde fois
+        existing = None
+        if image.content_hash and not image.webp_file:
+            existing = find_duplicate(image.content_hash, image.encoding_profile)
+        if existing is not None:
+            share_optimized_files(existing, [image.pk])
+        else:
+            # Bail renouvelé pendant l'encodage : le job n'est pas relancé ailleurs
+            with job_heartbeat(job_id, settings.IMAGE_JOB_HEARTBEAT_INTERVAL):
+                optimize_image(image)
+        job.status = OptimizationJob.STATUS_DONE
+        job.error = ''
+    except Exception as e:
+        job.status = OptimizationJob.STATUS_FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+
+    # Libère la connexion : le processus peut rester inactif longtemps
+    connection.close()
+    return job_id, job.status, job.error
+
+
+def reoptimize_image(image_id):
+    """
+    Régénère les versions optimisées d'une image (appelé dans un processus du pool).
+
+    Utilisé par la commande `reoptimize` après un changement des réglages
+    d'encodage : WebP, miniature, placeholder et variantes sont recalculés
+    depuis l'original, les anciens fichiers sont libérés. Les doublons de
+    l'image (même contenu, même profil) ne sont pas ré-encodés : ils sont
+    repointés en un UPDATE sur les nouveaux fichiers, la déduplication est
+    conservée.
+
+    Args:
+        image_id: Identifiant de l'image
+
+    Returns:
+        tuple: (image_id, taille de l'original en octets, message d'erreur ou '')
+    """
+    from .models import OptimizedImage
+    from .storage import release_files_on_commit, share_optimized_files
+    from .utils import optimize_image
+
+    try:
+        image = OptimizedImage.objects.get(pk=image_id)
+    except OptimizedImage.DoesNotExist:
+        # Image supprimée depuis la lecture de la liste
+        return image_id, 0, ''
+
+    try:
+        optimize_image(image)
+        if image.content_hash:
+            clone_ids = (
+                OptimizedImage.objects
+                .filter(content_hash=image.content_hash, encoding_profile=image.encoding_profile)
+                .exclude(pk=image.pk)
+                .values_list('pk', flat=True)
+            )
+            previous = share_optimized_files(image, list(clone_ids))
+            release_files_on_commit(previous, image.webp_file.storage)
+        error = ''
+    except Exception as e:
+        error = str(e)
+    return image_id, image.original_size, error
+
+
+# ========== POOL DES VUES ASYNCHRONES ==========
+
+def optimization_pool():
+    """
+    Pool de processus d'encodage partagé par les vues asynchrones.
+
+    Créé au premier usage (ASYNC_OPTIMIZE_WORKERS processus, mode "spawn")
+    et conservé pour la durée de vie du processus ASGI : la boucle
+    d'événements n'exécute jamais l'encodage elle-même.
+
+    Returns:
+        ProcessPoolExecutor: Pool partagé
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            from django.conf import settings
+
+            _pool = ProcessPoolExecutor(
+                max_workers=max(settings.ASYNC_OPTIMIZE_WORKERS, 1),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+            )
+        return _pool
+
+
+def discard_optimization_pool(pool):
+    """
+    Abandonne un pool devenu inutilisable (processus tué, ex: manque de mémoire).
+
+    Le prochain appel à optimization_pool en crée un nouveau.
+
+    Args:
+        pool: Pool ayant levé BrokenProcessPool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def optimize_image_by_id(image_id):
+    """
+    Optimise une image enregistrée (appelé dans un processus du pool partagé).
+
+    Args:
+        image_id: Identifiant de l'image
+
+    Returns:
+        str: Message d'erreur, ou '' en cas de succès
+    """
+    from django.db import connection
+    from .models import OptimizedImage
+    from .utils import optimize_image
+
+    try:
+        optimize_image(OptimizedImage.objects.get(pk=image_id))
+        return ''
+    except Exception as e:
+        return str(e)
+    finally:
+        # Libère la connexion : le processus peut rester inactif longtemps
+        connection.close()
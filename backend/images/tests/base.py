@@ -0,0 +1,137 @@
+"""
+Outils partagés par les tests de l'application images.
+
+Ce module contient :
+- La génération d'images en mémoire (octets ou fichier uploadé)
+- MediaTestCase : fichiers écrits dans un dossier temporaire, cache de
+  l'API en mémoire, métriques jamais écrites sur disque
+- MediaTransactionTestCase : idem, pour le code qui écrit en base depuis
+  plusieurs threads (optimize_many, upload groupé) ou qui attend un commit
+"""
+
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from images import derivatives, storage
+
+
+def make_image(width=800, height=600, color=(200, 50, 50), fmt='JPEG', mode='RGB'):
+    """
+    Génère une image unie.
+
+    Args:
+        width: Largeur en pixels
+        height: Hauteur en pixels
+        color: Couleur de remplissage
+        fmt: Format Pillow ("JPEG", "PNG", "WEBP", "GIF")
+        mode: Mode Pillow ("RGB", "RGBA"...)
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def make_upload(name='photo.jpg', content_type='image/jpeg', content=None, **kwargs):
+    """
+    Fichier uploadé contenant une image générée (ou `content`).
+
+    Args:
+        name: Nom du fichier envoyé
+        content_type: Type MIME annoncé
+        content: Octets du fichier (sinon make_image(**kwargs))
+
+    Returns:
+        SimpleUploadedFile: Fichier prêt pour le client de test
+    """
+    if content is None:
+        content = make_image(**kwargs)
+    return SimpleUploadedFile(name, content, content_type=content_type)
+
+
+def image_size(content):
+    """Dimensions (largeur, hauteur) d'une image donnée par ses octets."""
+    with Image.open(io.BytesIO(content)) as img:
+        return img.size
+
+
+class MediaMixin:
+    """
+    Fichiers du test écrits dans un dossier temporaire.
+
+    Médias, dérivés à la demande et sessions d'upload sont isolés par test ;
+    le cache de l'API est en mémoire et les métriques ne sont pas écrites
+    dans METRICS_DIR.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp(prefix='imageboost-tests-')
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+        overrides = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp_dir, 'media'),
+            RENDER_CACHE_DIR=os.path.join(self.tmp_dir, 'derivatives'),
+            UPLOAD_SESSION_DIR=os.path.join(self.tmp_dir, 'uploads'),
+            METRICS_DIR='',
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            IMAGE_OPTIMIZATION_ASYNC=False,
+            UPLOAD_BATCH_WORKERS=2,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        # Cache en mémoire partagé par les tests, et IDs réutilisés après
+        # l'annulation d'une transaction : aucune réponse ne doit survivre au test
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        # Le cache de dérivés du processus pointe sur le dossier du test
+        derivatives._cache = None
+        self.addCleanup(setattr, derivatives, '_cache', None)
+
+    def media_path(self, name):
+        """Chemin absolu d'un fichier du stockage."""
+        return os.path.join(self.tmp_dir, 'media', name)
+
+    def upload(self, upload=None, **data):
+        """
+        Envoie une image à l'endpoint d'upload.
+
+        Args:
+            upload: Fichier à envoyer (sinon make_upload())
+            **data: Autres champs du formulaire (profile...)
+
+        Returns:
+            Response: Réponse du client de test
+        """
+        data['image'] = upload or make_upload()
+        return self.client.post(reverse('images:upload'), data)
+
+    def wait_for_release(self):
+        """Attend la fin des suppressions de fichiers lancées en arrière-plan."""
+        if storage._cleanup is not None:
+            storage._cleanup.submit(lambda: None).result()
+
+
+class MediaTestCase(MediaMixin, TestCase):
+    """TestCase (une transaction annulée par test) avec des fichiers isolés."""
+
+
+class MediaTransactionTestCase(MediaMixin, TransactionTestCase):
+    """
+    TransactionTestCase avec des fichiers isolés.
+
+    Les threads d'optimisation écrivent avec leur propre connexion : la
+    transaction d'un TestCase les bloquerait ("database table is locked").
+    """
@@ -0,0 +1,88 @@
+"""
+Tests du budget mémoire des grandes images (limites, décodage réduit, admission).
+"""
+
+from io import BytesIO
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from images import admission
+from images.admission import ImageInfo, ImageTooLarge, ServerBusy, admit, budget_factor, inspect_image
+from images.models import OptimizedImage
+
+from .base import MediaTestCase, make_image, make_upload
+
+
+class InspectImageTests(SimpleTestCase):
+
+    def test_reads_header_and_rewinds(self):
+        source = BytesIO(make_image(300, 200))
+
+        info = inspect_image(source)
+
+        self.assertEqual((info.width, info.height, info.mode, info.format, info.frames),
+                         (300, 200, 'RGB', 'JPEG', 1))
+        self.assertEqual(source.tell(), 0)
+
+    @override_settings(IMAGE_MAX_PIXELS=50_000)
+    def test_too_many_pixels(self):
+        with self.assertRaisesMessage(ImageTooLarge, '300x200'):
+            inspect_image(BytesIO(make_image(300, 200)))
+
+    @override_settings(IMAGE_DECODE_PIXEL_BUDGET=1_000_000)
+    def test_budget_factor(self):
+        self.assertEqual(budget_factor((1000, 1000)), 1)
+        self.assertEqual(budget_factor((2000, 1000)), 2)
+        self.assertEqual(budget_factor((4000, 3000)), 4)
+        self.assertEqual(budget_factor((100_000, 100_000)), 8)
+
+
+@override_settings(IMAGE_LARGE_PIXELS=100_000, IMAGE_MAX_LARGE_JOBS=1, IMAGE_ADMISSION_RETRY_AFTER=7)
+class AdmitTests(SimpleTestCase):
+
+    def setUp(self):
+        # Sémaphore recréé avec la limite de ce test
+        patcher = mock.patch.object(admission, '_large_jobs', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_large_images_share_the_slots(self):
+        large = ImageInfo(1000, 1000, 'RGB', 'JPEG')
+        small = ImageInfo(100, 100, 'RGB', 'JPEG')
+
+        with admit(large):
+            with self.assertRaises(ServerBusy) as busy:
+                with admit(large):
+                    pass
+            with admit(small):
+                pass
+        with admit(large):
+            pass
+
+        self.assertEqual(busy.exception.retry_after, 7)
+
+
+@override_settings(IMAGE_LARGE_PIXELS=100_000, IMAGE_MAX_LARGE_JOBS=1, IMAGE_ADMISSION_RETRY_AFTER=7)
+class UploadAdmissionTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(admission, '_large_jobs', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_busy_server_returns_503_with_retry_after(self):
+        with admit(ImageInfo(1000, 1000, 'RGB', 'JPEG')):
+            response = self.upload(make_upload(content=make_image(600, 400)))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertFalse(OptimizedImage.objects.exists())
+
+    @override_settings(IMAGE_MAX_PIXELS=100_000)
+    def test_oversized_upload_returns_413(self):
+        response = self.upload(make_upload(content=make_image(600, 400)))
+
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(OptimizedImage.objects.exists())
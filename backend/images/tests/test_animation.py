@@ -0,0 +1,114 @@
+"""
+Tests des images animées (GIF et WebP animés convertis en WebP animé).
+"""
+
+import os
+from io import BytesIO
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from images.animation import frame_count, frame_timeline
+from images.models import OptimizedImage
+
+from .base import MediaTestCase, make_upload
+
+
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+def make_gif(durations=(100, 200, 10), loop=0, size=(120, 80)):
+    """GIF animé d'une image unie par couleur de COLORS."""
+    frames = [Image.new('RGB', size, color).convert('P') for color in COLORS[:len(durations)]]
+    buffer = BytesIO()
+    frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:],
+                   duration=list(durations), loop=loop)
+    return buffer.getvalue()
+
+
+class TimelineTests(SimpleTestCase):
+
+    def test_durations_and_loop(self):
+        with Image.open(BytesIO(make_gif(loop=3))) as img:
+            durations, loop = frame_timeline(img)
+
+            self.assertEqual(frame_count(img), 3)
+            self.assertEqual(img.tell(), 0)
+        # Durée trop courte : jouée comme par les navigateurs (100 ms)
+        self.assertEqual(durations, [100, 200, 100])
+        self.assertEqual(loop, 3)
+
+    def test_gif_without_loop_extension_plays_once(self):
+        frames = [Image.new('P', (10, 10), index) for index in range(2)]
+        buffer = BytesIO()
+        frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:], duration=50)
+
+        with Image.open(buffer) as img:
+            self.assertEqual(frame_timeline(img)[1], 1)
+
+
+class AnimatedUploadTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.data = self.upload(make_upload('anim.gif', 'image/gif', content=make_gif())).json()
+        self.image = OptimizedImage.objects.get(pk=self.data['id'])
+
+    def test_converted_to_animated_webp(self):
+        self.assertEqual((self.image.format, self.image.frame_count), ('GIF', 3))
+        self.assertTrue(self.image.is_animated)
+        with Image.open(self.image.webp_file.path) as webp:
+            self.assertEqual((webp.format, webp.n_frames, webp.size), ('WEBP', 3, (120, 80)))
+            self.assertEqual(frame_timeline(webp), ([100, 200, 100], 0))
+            for index, color in enumerate(COLORS):
+                webp.seek(index)
+                # GIF : encodé sans perte, couleurs exactes
+                self.assertEqual(webp.convert('RGB').getpixel((5, 5)), color)
+
+    def test_poster_thumbnail_and_no_ladder(self):
+        with Image.open(self.image.thumbnail.path) as thumbnail:
+            self.assertEqual(getattr(thumbnail, 'n_frames', 1), 1)
+            # Miniature JPEG : couleur de la première image, à la compression près
+            pixel = thumbnail.convert('RGB').getpixel((5, 5))
+            self.assertTrue(all(abs(a - b) <= 4 for a, b in zip(pixel, COLORS[0])))
+        self.assertFalse(self.image.variants.exists())
+
+    def test_serve_negotiates_animation_formats(self):
+        url = reverse('images:serve', args=[self.image.pk])
+
+        webp = self.client.get(url, HTTP_ACCEPT='image/webp')
+        gif = self.client.get(url, HTTP_ACCEPT='image/jpeg')
+
+        self.assertEqual(webp['Content-Type'], 'image/webp')
+        self.assertEqual(gif['Content-Type'], 'image/gif')
+        with open(self.image.original_file.path, 'rb') as f:
+            self.assertEqual(b''.join(gif.streaming_content), f.read())
+        self.assertEqual(self.client.get(url + '?w=320', HTTP_ACCEPT='image/webp').status_code, 400)
+
+    def test_animated_webp_source(self):
+        buffer = BytesIO()
+        with Image.open(self.image.webp_file.path) as webp:
+            webp.save(buffer, 'WEBP', save_all=True)
+
+        data = self.upload(make_upload('anim.webp', 'image/webp', content=buffer.getvalue())).json()
+
+        image = OptimizedImage.objects.get(pk=data['id'])
+        self.assertEqual((image.format, image.frame_count), ('WEBP', 3))
+        self.assertGreater(os.path.getsize(image.webp_file.path), 0)
+
+
+class AnimationLimitsTests(MediaTestCase):
+
+    @override_settings(IMAGE_ANIMATION_MAX_FRAMES=2)
+    def test_too_many_frames(self):
+        response = self.upload(make_upload('anim.gif', 'image/gif', content=make_gif()))
+
+        self.assertEqual(response.status_code, 413)
+
+    @override_settings(IMAGE_ANIMATION_MAX_PIXELS=20_000)
+    def test_too_many_pixels(self):
+        response = self.upload(make_upload('anim.gif', 'image/gif', content=make_gif()))
+
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(OptimizedImage.objects.exists())
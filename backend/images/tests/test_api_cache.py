@@ -0,0 +1,89 @@
+"""
+Tests du cache des réponses de l'API (HIT/MISS, 304, invalidation par générations).
+"""
+
+from django.urls import reverse
+
+from images.caching import batched_invalidation, invalidate_images
+from images.models import OptimizedImage
+
+from .base import MediaTestCase, make_upload
+
+
+class ApiCacheTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.image_id = self.upload(make_upload()).json()['id']
+        self.detail_url = reverse('images:detail', args=[self.image_id])
+        self.list_url = reverse('images:list')
+
+    def test_second_request_is_a_hit(self):
+        first = self.client.get(self.detail_url)
+        second = self.client.get(self.detail_url)
+
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(second['Cache-Control'], 'no-cache')
+
+    def test_conditional_request_returns_304(self):
+        etag = self.client.get(self.list_url)['ETag']
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(self.list_url, {'limit': 1})
+
+        self.assertEqual(self.client.get(self.list_url, {'limit': 2})['X-Cache'], 'MISS')
+
+    def test_change_invalidates_detail_and_list(self):
+        self.client.get(self.detail_url)
+        self.client.get(self.list_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image = OptimizedImage.objects.get(pk=self.image_id)
+            image.original_name = 'renamed.jpg'
+            image.save()
+
+        detail = self.client.get(self.detail_url)
+        self.assertEqual(detail['X-Cache'], 'MISS')
+        self.assertEqual(detail.json()['original_name'], 'renamed.jpg')
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+
+    def test_other_images_stay_cached(self):
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(make_upload(color=(0, 0, 255)))
+
+        self.assertEqual(self.client.get(self.detail_url)['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+
+    def test_invalidation_waits_for_commit(self):
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            invalidate_images([self.image_id])
+        self.assertEqual(self.client.get(self.detail_url)['X-Cache'], 'HIT')
+
+        callbacks[0]()
+        self.assertEqual(self.client.get(self.detail_url)['X-Cache'], 'MISS')
+
+    def test_batched_invalidation_is_a_single_callback(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            with batched_invalidation():
+                OptimizedImage.objects.filter(pk=self.image_id).first().save()
+                OptimizedImage.objects.filter(pk=self.image_id).first().save()
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_errors_are_not_cached(self):
+        url = reverse('images:detail', args=[999999])
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertNotIn('X-Cache', self.client.get(url))
@@ -0,0 +1,101 @@
+"""
+Tests des vues asynchrones (mêmes réponses que les vues synchrones).
+
+Les processus du pool d'encodage ne voient pas la base de test en mémoire :
+l'optimisation y est exécutée dans le processus du test.
+"""
+
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, override_settings
+from django.urls import reverse
+
+from images import async_views
+from images.models import OptimizationJob, OptimizedImage
+from images.tasks import optimize_image_by_id
+
+from .base import MediaTestCase, make_image, make_upload
+
+
+@mock.patch.object(async_views, '_optimize_in_pool', sync_to_async(optimize_image_by_id))
+class AsyncViewTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+
+    @staticmethod
+    def payload(response):
+        return json.loads(response.content)
+
+    async def upload(self, upload=None, **data):
+        request = self.factory.post(reverse('images:upload'), {'image': upload or make_upload(), **data})
+        return await async_views.image_upload(request)
+
+    async def test_upload_creates_an_optimized_image(self):
+        response = await self.upload(make_upload(content=make_image(700, 500)))
+
+        self.assertEqual(response.status_code, 201)
+        image = await OptimizedImage.objects.aget(pk=self.payload(response)['id'])
+        self.assertTrue(image.webp_file)
+
+    async def test_duplicate_reuses_files(self):
+        content = make_image(700, 500)
+        first = await self.upload(make_upload(content=content))
+        second = await self.upload(make_upload('copy.jpg', content=content))
+
+        self.assertEqual(second.status_code, 201)
+        first_data, second_data = self.payload(first), self.payload(second)
+        self.assertEqual(first_data['webp_url'], second_data['webp_url'])
+        self.assertEqual(second_data['original_name'], 'copy.jpg')
+
+    async def test_invalid_uploads(self):
+        invalid = await self.upload(make_upload('a.txt', 'text/plain', content=b'x'))
+        broken = await self.upload(make_upload(content=b'not an image'))
+        profile = await self.upload(profile='turbo')
+
+        self.assertEqual((invalid.status_code, broken.status_code, profile.status_code), (400, 400, 400))
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    async def test_oversized_upload(self):
+        self.assertEqual((await self.upload()).status_code, 413)
+
+    async def test_queued_upload(self):
+        with override_settings(IMAGE_OPTIMIZATION_ASYNC=True):
+            response = await self.upload()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.payload(response)['status'], 'pending')
+        self.assertTrue(await OptimizationJob.objects.filter(image_id=self.payload(response)['id']).aexists())
+
+    async def test_detail_list_and_cache_shared_with_sync_views(self):
+        image_id = self.payload(await self.upload())['id']
+        url = reverse('images:detail', args=[image_id])
+
+        # Même clé de cache que la vue synchrone
+        await sync_to_async(self.client.get)(url)
+        detail = await async_views.image_detail(self.factory.get(url), image_id)
+        listing = await async_views.image_list(self.factory.get(reverse('images:list'), {'fields': 'id'}))
+
+        self.assertEqual(detail['X-Cache'], 'HIT')
+        self.assertEqual(self.payload(detail)['id'], image_id)
+        self.assertEqual(self.payload(listing)['results'], [{'id': image_id}])
+        missing = await async_views.image_detail(self.factory.get(url), 999999)
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_invalid_list_params(self):
+        response = await async_views.image_list(self.factory.get(reverse('images:list'), {'limit': 'x'}))
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_delete(self):
+        image_id = self.payload(await self.upload())['id']
+        url = reverse('images:delete', args=[image_id])
+
+        response = await async_views.image_delete(self.factory.delete(url), image_id)
+        missing = await async_views.image_delete(self.factory.delete(url), image_id)
+
+        self.assertEqual((response.status_code, missing.status_code), (204, 404))
+        self.assertFalse(await OptimizedImage.objects.filter(pk=image_id).aexists())
@@ -0,0 +1,111 @@
+"""
+Tests de l'upload par lot (validation, résultats par fichier, déduplication dans le lot).
+"""
+
+from django.test import override_settings
+from django.urls import reverse
+
+from images.models import OptimizationJob, OptimizedImage
+from images.tasks import claim_jobs, run_job
+
+from .base import MediaTestCase, MediaTransactionTestCase, make_image, make_upload
+
+
+def post_batch(client, files, **data):
+    return client.post(reverse('images:upload-batch'), {'images': files, **data})
+
+
+class SyncBatchTests(MediaTransactionTestCase):
+    """Optimisation dans un pool de threads : les lignes doivent être commitées."""
+
+    def test_all_files_succeed(self):
+        response = post_batch(self.client, [
+            make_upload('a.jpg', color=(10, 10, 10)),
+            make_upload('b.png', 'image/png', fmt='PNG', color=(20, 20, 20)),
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual([r['filename'] for r in data['succeeded']], ['a.jpg', 'b.png'])
+        self.assertEqual(data['failed'], [])
+        self.assertTrue(all(r['image']['webp_url'] for r in data['succeeded']))
+
+    def test_invalid_files_are_reported_individually(self):
+        response = post_batch(self.client, [
+            make_upload('ok.jpg'),
+            make_upload('notes.txt', 'text/plain', content=b'hello'),
+            make_upload('broken.jpg', content=b'not an image'),
+        ])
+
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual([r['index'] for r in data['succeeded']], [0])
+        self.assertEqual([f['index'] for f in data['failed']], [1, 2])
+        self.assertEqual(OptimizedImage.objects.count(), 1)
+
+    def test_identical_files_share_one_encoding(self):
+        content = make_image(700, 500)
+
+        response = post_batch(self.client, [
+            make_upload('one.jpg', content=content),
+            make_upload('two.jpg', content=content),
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        one, two = [r['image'] for r in response.json()['succeeded']]
+        self.assertEqual(two['original_name'], 'two.jpg')
+        self.assertEqual((one['original_url'], one['webp_url']), (two['original_url'], two['webp_url']))
+
+
+class BatchValidationTests(MediaTestCase):
+
+    def test_nothing_valid_returns_400(self):
+        response = post_batch(self.client, [make_upload('a.txt', 'text/plain', content=b'x')])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['failed']), 1)
+
+    @override_settings(UPLOAD_BATCH_MAX_FILES=1)
+    def test_too_many_files(self):
+        response = post_batch(self.client, [make_upload('a.jpg'), make_upload('b.jpg')])
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_profile(self):
+        self.assertEqual(post_batch(self.client, [make_upload()], profile='nope').status_code, 400)
+
+
+class AsyncBatchTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # MediaTestCase impose le mode synchrone : réactivé après son setUp
+        overrides = override_settings(IMAGE_OPTIMIZATION_ASYNC=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_identical_files_are_queued_and_share_files(self):
+        content = make_image(700, 500)
+
+        response = post_batch(self.client, [
+            make_upload('one.jpg', content=content),
+            make_upload('two.jpg', content=content),
+        ])
+
+        self.assertEqual(response.status_code, 202)
+        ids = [r['image']['id'] for r in response.json()['succeeded']]
+        one, two = OptimizedImage.objects.in_bulk(ids).values()
+        self.assertEqual(one.original_file.name, two.original_file.name)
+        self.assertEqual(OptimizationJob.objects.count(), 2)
+
+        for job_id in claim_jobs(10):
+            run_job(job_id)
+
+        one.refresh_from_db()
+        two.refresh_from_db()
+        self.assertTrue(one.webp_file)
+        self.assertEqual(one.webp_file.name, two.webp_file.name)
+        self.assertEqual(
+            sorted(one.variants.values_list('file', flat=True)),
+            sorted(two.variants.values_list('file', flat=True)),
+        )
@@ -0,0 +1,74 @@
+"""
+Tests des outils du benchmark (corpus synthétique, mesure, comparaison).
+"""
+
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from images.benchmark import BenchCase, compare, default_cases, ensure_corpus, run_case
+
+
+class CorpusTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='imageboost-bench-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_quick_cases_are_small_and_sorted(self):
+        cases = default_cases(quick=True)
+
+        self.assertTrue(all(case.size in ('0.3mp', '2mp') for case in cases))
+        self.assertEqual(cases[0].name, '0.3mp-rgb-jpeg')
+        self.assertIn(BenchCase('2mp', 'RGBA', 'PNG'), cases)
+        self.assertIn(BenchCase('12mp', 'RGBA', 'PNG'), default_cases())
+
+    def test_corpus_is_deterministic_and_reused(self):
+        case = BenchCase('0.3mp', 'P', 'GIF')
+
+        path = ensure_corpus([case], self.directory)[case.name]
+        with open(path, 'rb') as f:
+            first = f.read()
+        os.utime(path, (0, 0))
+        ensure_corpus([case], self.directory)
+
+        self.assertEqual(os.stat(path).st_mtime, 0)
+        with Image.open(path) as img:
+            self.assertEqual((img.format, img.mode, img.size), ('GIF', 'P', (640, 480)))
+        os.remove(path)
+        with open(ensure_corpus([case], self.directory)[case.name], 'rb') as f:
+            self.assertEqual(f.read(), first)
+
+    def test_run_case_reports_stages(self):
+        case = BenchCase('0.3mp', 'RGB', 'JPEG')
+        path = ensure_corpus([case], self.directory)[case.name]
+
+        result = run_case(path, repeat=1)
+
+        self.assertIn('total', result['timings_ms'])
+        self.assertIn('webp', result['timings_ms'])
+        self.assertGreater(result['output_bytes']['webp'], 0)
+
+
+class CompareTests(SimpleTestCase):
+
+    def result(self, webp_ms, rss=100.0):
+        return {'cases': {'a': {'timings_ms': {'webp': webp_ms}, 'peak_rss_mb': rss}}}
+
+    def test_regression_needs_percentage_and_absolute_gap(self):
+        rows = compare(self.result(100.0), self.result(130.0), threshold_pct=10)
+
+        self.assertEqual(rows[0][:4], ('a', 'webp', 100.0, 130.0))
+        self.assertTrue(rows[0][5])
+        # +50 % mais moins de MIN_REGRESSION_MS : bruit
+        self.assertFalse(compare(self.result(2.0), self.result(3.0), 10)[0][5])
+        self.assertFalse(compare(self.result(100.0), self.result(105.0), 10)[0][5])
+
+    def test_memory_and_unknown_cases(self):
+        rows = compare(self.result(100.0, rss=100.0), self.result(100.0, rss=150.0), 10)
+
+        self.assertEqual([(row[1], row[5]) for row in rows], [('webp', False), ('peak_rss_mb', True)])
+        self.assertEqual(compare({'cases': {}}, self.result(100.0), 10), [])
@@ -0,0 +1,109 @@
+"""
+Tests de la suppression groupée (par IDs ou par filtre).
+"""
+
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import override_settings
+from django.urls import reverse
+
+from images.models import OptimizedImage
+from images.storage import image_file_names
+
+from .base import MediaTestCase, MediaTransactionTestCase, make_image, make_upload
+
+
+def create_image(index, fmt='JPEG', created_at=None):
+    """Ligne sans fichiers : la suppression ne lit que les noms."""
+    image = OptimizedImage.objects.create(
+        original_name=f'{index}.jpg',
+        original_file=f'originals/{index}.jpg',
+        original_size=1000,
+        format=fmt,
+    )
+    if created_at is not None:
+        OptimizedImage.objects.filter(pk=image.pk).update(created_at=created_at)
+    return image.pk
+
+
+class BulkDeleteTests(MediaTestCase):
+
+    def bulk_delete(self, body):
+        return self.client.post(reverse('images:bulk-delete'), body, content_type='application/json')
+
+    def test_delete_by_ids(self):
+        ids = [create_image(index) for index in range(3)]
+
+        response = self.bulk_delete({'ids': [ids[0], ids[1], ids[1], 999999]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'deleted': 2, 'missing': [999999]})
+        self.assertEqual(list(OptimizedImage.objects.values_list('pk', flat=True)), [ids[2]])
+
+    def test_delete_by_filter(self):
+        january = datetime(2024, 1, 15, tzinfo=dt_timezone.utc)
+        march = datetime(2024, 3, 15, tzinfo=dt_timezone.utc)
+        old_png = create_image(0, 'PNG', january)
+        create_image(1, 'JPEG', january)
+        create_image(2, 'PNG', march)
+
+        response = self.bulk_delete({'filter': {'format': 'png', 'created_before': '2024-02-01'}})
+
+        self.assertEqual(response.json(), {'deleted': 1, 'missing': []})
+        self.assertFalse(OptimizedImage.objects.filter(pk=old_png).exists())
+        self.assertEqual(OptimizedImage.objects.count(), 2)
+
+    def test_created_after_is_inclusive(self):
+        moment = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        create_image(0, created_at=moment)
+
+        response = self.bulk_delete({'filter': {'created_after': '2024-05-01T12:00:00+00:00'}})
+
+        self.assertEqual(response.json()['deleted'], 1)
+
+    @override_settings(IMAGE_BULK_DELETE_MAX=2)
+    def test_limits(self):
+        for index in range(3):
+            create_image(index, 'GIF')
+
+        too_broad = self.bulk_delete({'filter': {'format': 'GIF'}})
+        too_many = self.bulk_delete({'ids': [1, 2, 3]})
+
+        self.assertEqual((too_broad.status_code, too_many.status_code), (400, 400))
+        self.assertEqual(OptimizedImage.objects.count(), 3)
+
+    def test_invalid_bodies(self):
+        for body in (
+            {},
+            {'ids': [1], 'filter': {'format': 'PNG'}},
+            {'ids': []},
+            {'ids': ['1']},
+            {'ids': [True]},
+            {'filter': {}},
+            {'filter': {'owner': 'me'}},
+            {'filter': {'format': ''}},
+            {'filter': {'created_after': 'yesterday'}},
+            [1, 2],
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(self.bulk_delete(body).status_code, 400)
+
+
+class BulkDeleteFilesTests(MediaTransactionTestCase):
+
+    def test_unshared_files_are_released(self):
+        content = make_image(600, 400)
+        kept, shared_copy = [self.upload(make_upload(content=content)).json()['id'] for _ in range(2)]
+        alone = self.upload(make_upload(color=(0, 0, 200))).json()['id']
+        shared_names = image_file_names(OptimizedImage.objects.get(pk=kept))
+        alone_names = image_file_names(OptimizedImage.objects.get(pk=alone))
+
+        response = self.client.post(
+            reverse('images:bulk-delete'), {'ids': [shared_copy, alone]}, content_type='application/json'
+        )
+        self.wait_for_release()
+
+        self.assertEqual(response.json()['deleted'], 2)
+        self.assertTrue(all(os.path.exists(self.media_path(name)) for name in shared_names))
+        self.assertFalse(any(os.path.exists(self.media_path(name)) for name in alone_names))
@@ -0,0 +1,115 @@
+"""
+Tests de la suppression des fichiers après le commit et du ramasse-miettes `gc_media`.
+"""
+
+import os
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+
+from images.models import OptimizedImage
+from images.storage import image_file_names, stored_file_names
+
+from .base import MediaTestCase, MediaTransactionTestCase, make_upload
+
+
+class ReleaseOnCommitTests(MediaTransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+        self.names = image_file_names(self.image)
+
+    def exists(self):
+        return [os.path.exists(self.media_path(name)) for name in self.names]
+
+    def test_files_are_removed_after_commit(self):
+        self.image.delete()
+        self.wait_for_release()
+
+        self.assertFalse(any(self.exists()))
+
+    def test_rollback_keeps_files(self):
+        image_id = self.image.pk
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.image.delete()
+                raise RuntimeError('rollback')
+        self.wait_for_release()
+
+        self.assertTrue(all(self.exists()))
+        self.assertTrue(OptimizedImage.objects.filter(pk=image_id).exists())
+
+    def test_queryset_delete_releases_every_image(self):
+        other = OptimizedImage.objects.get(pk=self.upload(make_upload(color=(0, 0, 200))).json()['id'])
+        names = self.names + image_file_names(other)
+
+        OptimizedImage.objects.all().delete()
+        self.wait_for_release()
+
+        self.assertFalse(any(os.path.exists(self.media_path(name)) for name in names))
+
+
+class StoredFileNamesTests(MediaTestCase):
+
+    def test_includes_variants(self):
+        image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+
+        self.assertEqual(stored_file_names(OptimizedImage.objects.all()), set(image_file_names(image)))
+        self.assertEqual(stored_file_names(OptimizedImage.objects.none()), set())
+
+
+class GcMediaTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+        self.orphan = self.write('webp/aa/bb/orphan.webp', age=7200)
+        self.recent = self.write('variants/aa/bb/recent.webp', age=0)
+        self.unmanaged = self.write('exports/old.zip', age=7200)
+
+    def write(self, name, age):
+        path = self.media_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * 10)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_media', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_lists_old_orphans_only(self):
+        output = self.gc('--dry-run')
+
+        self.assertIn('webp/aa/bb/orphan.webp (10 octets)', output)
+        self.assertNotIn('recent.webp', output)
+        self.assertIn('1 orphelins à supprimer', output)
+        self.assertTrue(os.path.exists(self.orphan))
+
+    def test_deletes_orphans_and_keeps_referenced_files(self):
+        self.gc('--chunk-size', '2')
+
+        self.assertFalse(os.path.exists(self.orphan))
+        self.assertTrue(os.path.exists(self.recent))
+        self.assertTrue(os.path.exists(self.unmanaged))
+        self.assertTrue(all(os.path.exists(self.media_path(name)) for name in image_file_names(self.image)))
+
+    def test_min_age(self):
+        self.gc('--min-age', '0')
+
+        self.assertFalse(os.path.exists(self.recent))
+
+    def test_excluded_directories(self):
+        cache_file = self.write('webp/cache/derived.webp', age=7200)
+
+        with override_settings(RENDER_CACHE_DIR=os.path.dirname(cache_file)):
+            self.gc()
+
+        self.assertTrue(os.path.exists(cache_file))
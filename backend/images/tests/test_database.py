@@ -0,0 +1,71 @@
+"""
+Tests des réglages SQLite et du benchmark de la base (base temporaire).
+"""
+
+import shutil
+import tempfile
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from images.dbbench import create_schema, measure, populate, temporary_database
+from images.models import OptimizedImage
+
+
+# Bases temporaires utilisées par ces tests (alias `dbbench_<nom>`)
+BENCH_DATABASES = ('tuned', 'baseline', 'indexed', 'bare', 'bench')
+
+
+class DatabaseBenchTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Alias ajoutés à la volée par temporary_database : autorisés après la
+        # validation de `databases` (ils n'existent pas encore à ce moment)
+        cls.databases = frozenset(cls.databases) | {f'dbbench_{name}' for name in BENCH_DATABASES}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='imageboost-dbbench-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def pragmas(self, alias):
+        with connections[alias].cursor() as cursor:
+            return {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'synchronous')
+            }
+
+    def indexes(self, alias):
+        with connections[alias].cursor() as cursor:
+            return set(connections[alias].introspection.get_constraints(
+                cursor, OptimizedImage._meta.db_table
+            ))
+
+    def test_tuned_connection_uses_wal(self):
+        with temporary_database(self.directory, 'tuned', tuned=True) as tuned:
+            self.assertEqual(self.pragmas(tuned), {'journal_mode': 'wal', 'synchronous': 1})
+        with temporary_database(self.directory, 'baseline', tuned=False) as baseline:
+            self.assertEqual(self.pragmas(baseline), {'journal_mode': 'delete', 'synchronous': 2})
+        self.assertNotIn('dbbench_tuned', connections.settings)
+
+    def test_schema_with_and_without_indexes(self):
+        with temporary_database(self.directory, 'indexed', tuned=True) as alias:
+            create_schema(alias, indexed=True)
+            self.assertTrue({'image_created_id_idx', 'image_format_created_idx'} <= self.indexes(alias))
+        with temporary_database(self.directory, 'bare', tuned=False) as alias:
+            create_schema(alias, indexed=False)
+            self.assertFalse({'image_created_id_idx', 'image_format_created_idx'} & self.indexes(alias))
+
+    def test_populate_and_measure(self):
+        with temporary_database(self.directory, 'bench', tuned=True) as alias:
+            create_schema(alias, indexed=True)
+            self.assertEqual(list(populate(alias, 120, batch_size=50)), [50, 100, 120])
+
+            results = measure(alias, repeat=2, inserts=2, writers=2, readers=1, writes_per_thread=3)
+
+        self.assertEqual(results['rows'], 120)
+        self.assertEqual(results['mixed']['lock_errors'], 0)
+        self.assertIn('image_created_id_idx', results['plans']['list'])
+        self.assertIn('image_format_created_idx', results['plans']['by_format'])
+        self.assertNotIn('TEMP B-TREE', results['plans']['list'])
@@ -0,0 +1,84 @@
+"""
+Tests de la déduplication par empreinte et du comptage de références des fichiers.
+"""
+
+import hashlib
+import os
+
+from django.urls import reverse
+
+from images.models import ImageVariant, OptimizedImage
+from images.storage import image_file_names, referenced_names, release_files
+
+from .base import MediaTestCase, MediaTransactionTestCase, make_image, make_upload
+
+
+class DeduplicationTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.content = make_image(900, 600)
+
+    def test_identical_upload_reuses_stored_files(self):
+        first = self.upload(make_upload('a.jpg', content=self.content)).json()
+        second = self.upload(make_upload('b.jpg', content=self.content)).json()
+
+        self.assertNotEqual(first['id'], second['id'])
+        self.assertEqual(second['original_name'], 'b.jpg')
+        for field in ('original_url', 'webp_url', 'thumbnail_url'):
+            self.assertEqual(first[field], second[field])
+        clone = OptimizedImage.objects.get(pk=second['id'])
+        self.assertEqual(clone.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(
+            sorted(clone.variants.values_list('file', flat=True)),
+            sorted(ImageVariant.objects.filter(image_id=first['id']).values_list('file', flat=True)),
+        )
+
+    def test_other_profile_is_encoded_again(self):
+        first = self.upload(make_upload(content=self.content)).json()
+        second = self.upload(make_upload(content=self.content), profile='fast').json()
+
+        self.assertNotEqual(first['webp_url'], second['webp_url'])
+
+class SharedReleaseTests(MediaTransactionTestCase):
+    """
+    La suppression en arrière-plan lit la base depuis son propre thread :
+    les lignes doivent être réellement commitées.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.content = make_image(900, 600)
+
+    def test_shared_files_are_kept_until_the_last_reference(self):
+        first = self.upload(make_upload(content=self.content)).json()
+        second = self.upload(make_upload(content=self.content)).json()
+        names = image_file_names(OptimizedImage.objects.get(pk=first['id']))
+
+        self.client.delete(reverse('images:delete', args=[first['id']]))
+        self.wait_for_release()
+        self.assertTrue(all(os.path.exists(self.media_path(name)) for name in names))
+
+        self.client.delete(reverse('images:delete', args=[second['id']]))
+        self.wait_for_release()
+        self.assertFalse(any(os.path.exists(self.media_path(name)) for name in names))
+
+
+class ReferenceCountTests(MediaTestCase):
+
+    def test_referenced_names_covers_every_file_column(self):
+        image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+        names = image_file_names(image)
+
+        self.assertEqual(referenced_names(names + ['webp/unknown.webp']), set(names))
+        self.assertEqual(referenced_names([]), set())
+
+    def test_release_files_skips_referenced_names(self):
+        image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+        storage = image.original_file.storage
+        orphan = storage.save('webp/orphan.webp', make_upload(name='orphan.webp'))
+
+        release_files([image.webp_file.name, orphan], storage)
+
+        self.assertTrue(storage.exists(image.webp_file.name))
+        self.assertFalse(storage.exists(orphan))
@@ -0,0 +1,113 @@
+"""
+Tests de la file d'attente d'optimisation (OptimizationJob, process_images).
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from images.models import OptimizationJob
+from images.tasks import claim_jobs, requeue_stale_jobs, run_job
+
+from .base import MediaTestCase, make_upload
+
+
+class AsyncUploadTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # MediaTestCase impose le mode synchrone : réactivé après son setUp
+        overrides = override_settings(IMAGE_OPTIMIZATION_ASYNC=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def queue_image(self, **kwargs):
+        response = self.upload(make_upload(**kwargs))
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def test_upload_queues_a_pending_job(self):
+        data = self.queue_image()
+
+        self.assertEqual(data['status'], 'pending')
+        job = OptimizationJob.objects.get(pk=data['job_id'])
+        self.assertEqual(job.image_id, data['id'])
+        self.assertFalse(job.image.webp_file)
+
+        status = self.client.get(reverse('images:status', args=[data['id']])).json()
+        self.assertEqual(status['status'], 'pending')
+        self.assertNotIn('image', status)
+
+    def test_claim_jobs_reserves_each_job_once(self):
+        for index in range(3):
+            self.queue_image(color=(index * 60, 10, 10))
+
+        first = claim_jobs(2)
+        second = claim_jobs(2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(set(first) & set(second))
+        for job in OptimizationJob.objects.all():
+            self.assertEqual(job.status, OptimizationJob.STATUS_PROCESSING)
+            self.assertEqual(job.attempts, 1)
+            self.assertIsNotNone(job.heartbeat_at)
+        self.assertEqual(claim_jobs(2), [])
+
+    def test_requeue_only_jobs_without_recent_heartbeat(self):
+        for index in range(3):
+            self.queue_image(color=(index * 60, 10, 10))
+        stale, alive, legacy = claim_jobs(3)
+        old = timezone.now() - timedelta(seconds=3600)
+        OptimizationJob.objects.filter(pk=stale).update(started_at=old, heartbeat_at=old)
+        # Long encodage dont le bail est renouvelé : jamais relancé
+        OptimizationJob.objects.filter(pk=alive).update(started_at=old)
+        # Job réservé avant l'ajout de heartbeat_at
+        OptimizationJob.objects.filter(pk=legacy).update(started_at=old, heartbeat_at=None)
+
+        self.assertEqual(requeue_stale_jobs(600), 2)
+
+        statuses = dict(OptimizationJob.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[stale], OptimizationJob.STATUS_PENDING)
+        self.assertEqual(statuses[alive], OptimizationJob.STATUS_PROCESSING)
+        self.assertEqual(statuses[legacy], OptimizationJob.STATUS_PENDING)
+
+    def test_run_job_optimizes_the_image(self):
+        data = self.queue_image()
+        [job_id] = claim_jobs(1)
+
+        self.assertEqual(run_job(job_id), (job_id, OptimizationJob.STATUS_DONE, ''))
+
+        status = self.client.get(reverse('images:status', args=[data['id']])).json()
+        self.assertEqual(status['status'], 'done')
+        self.assertTrue(status['image']['webp_url'])
+
+    def test_run_job_records_failures(self):
+        data = self.queue_image()
+        job = OptimizationJob.objects.get(pk=data['job_id'])
+        with open(job.image.original_file.path, 'wb') as f:
+            f.write(b'not an image')
+        [job_id] = claim_jobs(1)
+
+        _, job_status, error = run_job(job_id)
+
+        self.assertEqual(job_status, OptimizationJob.STATUS_FAILED)
+        self.assertTrue(error)
+        job.refresh_from_db()
+        self.assertEqual(job.error, error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_process_images_once_drains_the_queue(self):
+        for index in range(2):
+            self.queue_image(color=(index * 60, 10, 10))
+
+        call_command('process_images', once=True, workers=0, stdout=StringIO())
+
+        self.assertEqual(
+            set(OptimizationJob.objects.values_list('status', flat=True)),
+            {OptimizationJob.STATUS_DONE},
+        )
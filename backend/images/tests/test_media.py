@@ -0,0 +1,117 @@
+"""
+Tests du service des fichiers média (plages d'octets, ETag, requêtes conditionnelles).
+"""
+
+import os
+import uuid
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from images.media import (
+    IMMUTABLE_CACHE_CONTROL, RangeNotSatisfiable, content_etag, if_range_matches, parse_range,
+)
+
+from .base import MediaTestCase
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_single_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+        self.assertEqual(parse_range('bytes=990-5000', 1000), (990, 999))
+
+    def test_ignored_headers_serve_the_whole_file(self):
+        for header in ('bytes=0-1,5-9', 'items=0-9', 'bytes=-', 'bytes=9-1', 'garbage'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+    def test_unsatisfiable(self):
+        for header in ('bytes=1000-', 'bytes=-0'):
+            with self.subTest(header=header), self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 1000)
+
+    def test_if_range(self):
+        self.assertTrue(if_range_matches(None, '"a"', 'date'))
+        self.assertTrue(if_range_matches('"a"', '"a"', 'date'))
+        self.assertTrue(if_range_matches('date', '"a"', 'date'))
+        self.assertFalse(if_range_matches('"b"', '"a"', 'date'))
+
+    def test_etag_follows_size_mtime_and_inode(self):
+        stat = SimpleNamespace(st_size=255, st_mtime_ns=16, st_ino=10)
+
+        self.assertEqual(content_etag(stat), '"ff-10-a"')
+        self.assertNotEqual(content_etag(stat), content_etag(SimpleNamespace(st_size=255, st_mtime_ns=17, st_ino=10)))
+
+
+class MediaServeTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 4
+        self.name = f'webp/{uuid.uuid4()}.webp'
+        os.makedirs(os.path.dirname(self.media_path(self.name)))
+        with open(self.media_path(self.name), 'wb') as f:
+            f.write(self.content)
+        self.url = reverse('media', kwargs={'path': self.name})
+
+    def get(self, path=None, **headers):
+        url = reverse('media', kwargs={'path': path}) if path else self.url
+        return self.client.get(url, **headers)
+
+    def test_full_file(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+    def test_range_outside_the_file(self):
+        response = self.get(HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_stale_if_range_serves_the_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests(self):
+        etag = self.get()['ETag']
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_head(self):
+        response = self.client.head(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response.content, b'')
+
+    def test_missing_and_escaping_paths(self):
+        self.assertEqual(self.get('webp/missing.webp').status_code, 404)
+        self.assertEqual(self.get('../settings.py').status_code, 404)
+        self.assertEqual(self.get('webp').status_code, 404)
+
+    def test_names_without_uuid_are_revalidated(self):
+        name = 'notes/plain.png'
+        os.makedirs(os.path.dirname(self.media_path(name)))
+        open(self.media_path(name), 'wb').close()
+
+        self.assertNotEqual(self.get(name)['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
@@ -0,0 +1,102 @@
+"""
+Tests des métriques Prometheus (compteurs, histogrammes, instantanés par processus).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from images import metrics
+
+
+def dead_pid():
+    """PID d'un processus terminé."""
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+class MetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='imageboost-metrics-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        # Valeurs du processus isolées du reste de la suite
+        for name, value in (('_counters', {}), ('_histograms', {}), ('_flushed_pid', None)):
+            patcher = mock.patch.object(metrics, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        overrides = override_settings(METRICS_DIR=self.directory, METRICS_FLUSH_INTERVAL=3600)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        environ = mock.patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop(metrics.DISABLE_ENV, None)
+
+    def write(self, name, counters=(), histograms=()):
+        with open(os.path.join(self.directory, name), 'w') as f:
+            json.dump({'counters': list(counters), 'histograms': list(histograms)}, f)
+
+    def test_counters_and_histograms_render(self):
+        metrics.inc('imageboost_uploads_total', outcome='created')
+        metrics.inc('imageboost_uploads_total', 2, outcome='created')
+        metrics.observe('imageboost_stage_duration_seconds', 0.02, stage='webp')
+        metrics.observe('imageboost_stage_duration_seconds', 100, stage='webp')
+
+        text = metrics.render()
+
+        self.assertIn('imageboost_uploads_total{outcome="created"} 3', text)
+        self.assertIn('imageboost_stage_duration_seconds_bucket{stage="webp",le="0.025"} 1', text)
+        self.assertIn('imageboost_stage_duration_seconds_bucket{stage="webp",le="60.0"} 1', text)
+        self.assertIn('imageboost_stage_duration_seconds_bucket{stage="webp",le="+Inf"} 2', text)
+        self.assertIn('imageboost_stage_duration_seconds_sum{stage="webp"} 100.02', text)
+        self.assertIn('# TYPE imageboost_errors_total counter', text)
+
+    def test_responsive_stages_are_grouped(self):
+        metrics.observe_timings({'responsive_webp_640': 10.0, 'responsive_webp_320': 5.0})
+
+        self.assertIn('imageboost_stage_duration_seconds_count{stage="responsive_webp"} 2', metrics.render())
+
+    def test_other_processes_are_summed(self):
+        metrics.inc('imageboost_errors_total', stage='webp')
+        # Fichier du processus courant : ignoré, ses valeurs sont lues en direct
+        self.write(f'{os.getpid()}.json', counters=[['imageboost_errors_total', {'stage': 'webp'}, 9]])
+        self.write(f'{os.getppid()}.json', counters=[['imageboost_errors_total', {'stage': 'webp'}, 4]])
+
+        self.assertIn('imageboost_errors_total{stage="webp"} 5', metrics.render())
+
+    def test_dead_process_is_merged_into_base(self):
+        pid = dead_pid()
+        counter = [['imageboost_errors_total', {'stage': 'webp'}, 2]]
+        self.write(metrics.BASE_SNAPSHOT, counters=counter)
+        self.write(f'{pid}.json', counters=counter)
+
+        text = metrics.render()
+
+        self.assertIn('imageboost_errors_total{stage="webp"} 4', text)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f'{pid}.json')))
+        # Rendu suivant : la valeur n'est pas comptée deux fois
+        self.assertIn('imageboost_errors_total{stage="webp"} 4', metrics.render())
+
+    def test_reused_pid_keeps_previous_values(self):
+        self.write(f'{os.getpid()}.json', counters=[['imageboost_errors_total', {'stage': 'db'}, 3]])
+        metrics.inc('imageboost_errors_total', stage='db')
+
+        metrics.flush()
+
+        self.assertIn('imageboost_errors_total{stage="db"} 4', metrics.render())
+
+    def test_disable_stops_snapshots(self):
+        metrics.disable()
+        metrics.inc('imageboost_errors_total', stage='db')
+
+        metrics.flush()
+
+        self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,74 @@
+"""
+Tests de la négociation de format (en-tête Accept) de la vue image_serve.
+"""
+
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from images.encoders import negotiate_format
+
+from .base import MediaTestCase, image_size, make_image, make_upload
+
+
+class NegotiateFormatTests(SimpleTestCase):
+
+    def test_explicit_types_only(self):
+        self.assertEqual(negotiate_format('image/webp,*/*;q=0.8'), 'webp')
+        self.assertEqual(negotiate_format('*/*'), 'jpeg')
+        self.assertEqual(negotiate_format(''), 'jpeg')
+        self.assertEqual(negotiate_format('image/webp;q=0'), 'jpeg')
+
+    def test_avif_requires_configuration_and_support(self):
+        accept = 'image/avif,image/webp'
+
+        with mock.patch('images.encoders.avif_available', return_value=True):
+            with override_settings(IMAGE_ENCODERS={'avif': {'enabled': True}}):
+                self.assertEqual(negotiate_format(accept), 'avif')
+            with override_settings(IMAGE_ENCODERS={'avif': {'enabled': False}}):
+                self.assertEqual(negotiate_format(accept), 'webp')
+        with mock.patch('images.encoders.avif_available', return_value=False):
+            with override_settings(IMAGE_ENCODERS={'avif': {'enabled': True}}):
+                self.assertEqual(negotiate_format(accept), 'webp')
+
+
+class ImageServeTests(MediaTestCase):
+
+    def serve(self, image_id, accept):
+        return self.client.get(reverse('images:serve', args=[image_id]), HTTP_ACCEPT=accept)
+
+    def test_webp_client(self):
+        data = self.upload().json()
+
+        response = self.serve(data['id'], 'image/webp,*/*')
+
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('Accept', response['Vary'])
+
+    def test_jpeg_original_is_passed_through(self):
+        content = make_image(800, 600)
+        data = self.upload(make_upload(content=content)).json()
+
+        response = self.serve(data['id'], 'image/jpeg')
+
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(b''.join(response.streaming_content), content)
+
+    def test_png_original_is_transcoded(self):
+        data = self.upload(make_upload('a.png', 'image/png', content=make_image(400, 300, fmt='PNG'))).json()
+
+        response = self.serve(data['id'], '*/*')
+
+        content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertTrue(content.startswith(b'\xff\xd8'))
+        self.assertEqual(image_size(content), (400, 300))
+
+    def test_budget_reduced_jpeg_is_served_at_stored_size(self):
+        with override_settings(IMAGE_DECODE_PIXEL_BUDGET=1_000_000):
+            data = self.upload(make_upload(content=make_image(2000, 1000))).json()
+            response = self.serve(data['id'], 'image/jpeg')
+
+        self.assertEqual((data['width'], data['height']), (1000, 500))
+        self.assertEqual(image_size(b''.join(response.streaming_content)), (1000, 500))
@@ -0,0 +1,101 @@
+"""
+Tests de la pagination par curseur (keyset) et des champs partiels de la liste.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from images.models import OptimizedImage
+from images.pagination import decode_cursor, encode_cursor, keyset_page
+
+from .base import MediaTestCase
+
+
+def create_images(count, created_at=None):
+    """Crée `count` lignes sans fichiers (la liste ne lit que les noms)."""
+    images = [
+        OptimizedImage.objects.create(
+            original_name=f'{index}.jpg',
+            original_file=f'originals/{index}.jpg',
+            original_size=1000,
+        )
+        for index in range(count)
+    ]
+    if created_at is not None:
+        OptimizedImage.objects.update(created_at=created_at)
+    return images
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        image = OptimizedImage(pk=42, created_at=created_at)
+
+        self.assertEqual(decode_cursor(encode_cursor(image)), (created_at, 42))
+
+    def test_invalid_cursors_are_rejected(self):
+        for cursor in ('not-base64!', 'Zm9v', 'eHx5', 'w6k='):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+class KeysetPageTests(MediaTestCase):
+
+    def test_pages_cover_every_row_once_with_ties(self):
+        # Même created_at partout : l'ordre ne tient qu'à l'ID
+        create_images(7, created_at=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        expected = list(OptimizedImage.objects.order_by('-id').values_list('id', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = keyset_page(OptimizedImage.objects.all(), cursor, 3)
+            seen.extend(image.pk for image in page)
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+
+    def test_last_full_page_has_no_next_cursor(self):
+        create_images(4)
+
+        page, cursor = keyset_page(OptimizedImage.objects.all(), None, 4)
+
+        self.assertEqual(len(page), 4)
+        self.assertIsNone(cursor)
+
+
+class ImageListViewTests(MediaTestCase):
+
+    def test_next_link_and_limit(self):
+        create_images(5)
+
+        first = self.client.get(reverse('images:list'), {'limit': 2}).json()
+        second = self.client.get(first['next']).json()
+
+        self.assertEqual(len(first['results']), 2)
+        self.assertIn('limit=2', first['next'])
+        self.assertEqual(len(second['results']), 2)
+        self.assertFalse({r['id'] for r in first['results']} & {r['id'] for r in second['results']})
+
+    @override_settings(IMAGE_LIST_MAX_PAGE_SIZE=3)
+    def test_limit_is_capped(self):
+        create_images(5)
+
+        data = self.client.get(reverse('images:list'), {'limit': 100}).json()
+
+        self.assertEqual(len(data['results']), 3)
+
+    def test_sparse_fields(self):
+        create_images(1)
+
+        data = self.client.get(reverse('images:list'), {'fields': 'id,original_name'}).json()
+
+        self.assertEqual(set(data['results'][0]), {'id', 'original_name'})
+
+    def test_invalid_params_return_400(self):
+        for params in ({'fields': 'id,password'}, {'limit': 'x'}, {'cursor': 'bogus'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('images:list'), params).status_code, 400)
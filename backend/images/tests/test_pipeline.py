@@ -0,0 +1,57 @@
+"""
+Tests du pipeline d'optimisation (décodage unique, variantes en parallèle).
+"""
+
+import io
+
+from PIL import Image
+
+from images.models import OptimizedImage
+from images.utils import THUMBNAIL_SIZE, build_variants, optimize_many
+
+from .base import MediaTestCase, MediaTransactionTestCase, image_size, make_image, make_upload
+
+
+class BuildVariantsTests(MediaTestCase):
+
+    def test_all_variants_come_from_one_call(self):
+        result = build_variants(io.BytesIO(make_image(1200, 800)))
+
+        self.assertEqual((result.width, result.height, result.format), (1200, 800, 'JPEG'))
+        with Image.open(io.BytesIO(result.webp)) as webp:
+            self.assertEqual((webp.format, webp.size), ('WEBP', (1200, 800)))
+        thumb_width, thumb_height = image_size(result.thumbnail)
+        self.assertLessEqual(thumb_width, THUMBNAIL_SIZE[0])
+        self.assertLessEqual(thumb_height, THUMBNAIL_SIZE[1])
+        self.assertTrue(result.blur_placeholder.startswith('data:image/jpeg;base64,'))
+        for stage in ('decode', 'decode_reduced', 'webp', 'thumbnail', 'variants'):
+            self.assertIn(stage, result.timings)
+
+    def test_transparent_png_is_flattened(self):
+        result = build_variants(io.BytesIO(make_image(300, 200, color=(0, 0, 0, 0), fmt='PNG', mode='RGBA')))
+
+        self.assertEqual(result.format, 'PNG')
+        with Image.open(io.BytesIO(result.webp)) as webp:
+            webp = webp.convert('RGB')
+            # Fond blanc sous la transparence, pas du noir
+            self.assertEqual(webp.getpixel((10, 10)), (255, 255, 255))
+
+
+class OptimizeManyTests(MediaTransactionTestCase):
+
+    def test_each_image_gets_its_own_result(self):
+        images = []
+        for index, content in enumerate([make_image(color=(10, 200, 10)), b'not an image']):
+            image = OptimizedImage(
+                original_name=f'{index}.jpg',
+                original_file=make_upload(f'{index}.jpg', content=content),
+                original_size=len(content),
+            )
+            image.save()
+            images.append(image)
+
+        errors = optimize_many(images, max_workers=2)
+
+        self.assertIsNone(errors[images[0].pk])
+        self.assertTrue(errors[images[1].pk])
+        self.assertTrue(OptimizedImage.objects.get(pk=images[0].pk).webp_file)
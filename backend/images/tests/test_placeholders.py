@@ -0,0 +1,66 @@
+"""
+Tests des placeholders (data URI JPEG flou, BlurHash) et de leur rattrapage.
+"""
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from images.models import OptimizedImage
+from images.placeholders import _BASE83, backfill_blurhash, encode_blurhash
+
+from .base import MediaTestCase, make_upload
+
+
+def decode_base83(text):
+    value = 0
+    for char in text:
+        value = value * 83 + _BASE83.index(char)
+    return value
+
+
+class BlurHashTests(SimpleTestCase):
+
+    def test_length_depends_on_components(self):
+        img = Image.linear_gradient('L').convert('RGB')
+
+        self.assertEqual(len(encode_blurhash(img)), 28)
+        self.assertEqual(len(encode_blurhash(img, (1, 1))), 6)
+        self.assertEqual(len(encode_blurhash(img, (9, 9))), 2 + 4 + 2 * 80)
+
+    def test_uniform_image_encodes_its_colour(self):
+        blurhash = encode_blurhash(Image.new('RGB', (64, 48), (200, 50, 10)))
+
+        self.assertEqual(blurhash[0], _BASE83[3 + 2 * 9])
+        dc = decode_base83(blurhash[2:6])
+        self.assertEqual((dc >> 16, (dc >> 8) & 255, dc & 255), (200, 50, 10))
+
+    def test_large_images_are_sampled(self):
+        small = Image.new('RGB', (32, 32), (10, 120, 240))
+        large = small.resize((1024, 1024))
+
+        self.assertEqual(encode_blurhash(small), encode_blurhash(large))
+
+
+class PlaceholderUploadTests(MediaTestCase):
+
+    def test_both_placeholders_by_default(self):
+        data = self.upload(make_upload()).json()
+
+        self.assertEqual(len(data['blurhash']), 28)
+        self.assertTrue(data['blur_placeholder'].startswith('data:image/jpeg;base64,'))
+
+    @override_settings(IMAGE_PLACEHOLDERS=['blurhash'])
+    def test_blurhash_only(self):
+        data = self.upload(make_upload()).json()
+
+        self.assertEqual(data['blur_placeholder'], '')
+        self.assertEqual(len(data['blurhash']), 28)
+
+    def test_backfill_uses_the_thumbnail(self):
+        data = self.upload(make_upload()).json()
+        OptimizedImage.objects.update(blurhash='')
+
+        batches = list(backfill_blurhash(OptimizedImage))
+
+        self.assertEqual(batches, [(1, [])])
+        self.assertEqual(OptimizedImage.objects.get(pk=data['id']).blurhash, data['blurhash'])
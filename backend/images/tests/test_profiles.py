@@ -0,0 +1,73 @@
+"""
+Tests des profils d'encodage (validation, options par format, recherche de qualité).
+"""
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from images.encoders import encoder_options, quality_target, resolve_profile
+from images.models import OptimizedImage
+from images.quality import search_quality, ssim
+
+from .base import MediaTestCase, make_upload
+
+
+class ProfileSettingsTests(SimpleTestCase):
+
+    def test_default_profile_is_standard(self):
+        self.assertEqual(resolve_profile(None), 'standard')
+        self.assertEqual(resolve_profile(''), 'standard')
+        self.assertEqual(encoder_options('webp'), {'quality': 85, 'method': 6})
+
+    def test_unknown_profile_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Unknown encoding profile 'turbo'"):
+            resolve_profile('turbo')
+
+    def test_profile_overrides_encoder_settings(self):
+        self.assertEqual(encoder_options('webp', 'fast'), {'quality': 80, 'method': 2})
+        self.assertEqual(encoder_options('jpeg', 'fast')['optimize'], False)
+        self.assertEqual(encoder_options('webp', 'fast', quality=60)['quality'], 60)
+        # Clés de contrôle de l'AVIF (enabled, lazy) : jamais passées à Pillow
+        self.assertNotIn('enabled', encoder_options('avif'))
+
+    def test_quality_target(self):
+        self.assertIsNone(quality_target('standard'))
+        self.assertEqual(quality_target('max-compression'), (0.95, 40, 90))
+
+
+class QualitySearchTests(SimpleTestCase):
+
+    def test_ssim_of_identical_images_is_one(self):
+        values = np.random.default_rng(0).random((32, 32)) * 255
+
+        self.assertAlmostEqual(ssim(values, values), 1.0)
+        self.assertLess(ssim(values, values[::-1]), 0.5)
+
+    def test_search_stays_within_bounds(self):
+        img = Image.radial_gradient('L').convert('RGB')
+
+        low = search_quality(img, 'webp', 'standard', 0.5, 40, 90)
+        high = search_quality(img, 'webp', 'standard', 1.01, 40, 90)
+
+        self.assertEqual(low, 40)
+        self.assertEqual(high, 90)
+
+
+class ProfileUploadTests(MediaTestCase):
+
+    def test_upload_records_profile_and_quality(self):
+        standard = self.upload(make_upload()).json()
+        fast = self.upload(make_upload(color=(1, 2, 3)), profile='fast').json()
+
+        self.assertEqual((standard['encoding_profile'], standard['encoding_quality']), ('standard', 85))
+        self.assertEqual((fast['encoding_profile'], fast['encoding_quality']), ('fast', 80))
+
+    @override_settings(IMAGE_DEFAULT_PROFILE='balanced')
+    def test_configured_default_profile(self):
+        data = self.upload(make_upload()).json()
+
+        self.assertEqual(OptimizedImage.objects.get(pk=data['id']).encoding_profile, 'balanced')
+
+    def test_unknown_profile_returns_400(self):
+        self.assertEqual(self.upload(make_upload(), profile='turbo').status_code, 400)
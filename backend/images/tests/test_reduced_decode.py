@@ -0,0 +1,46 @@
+"""
+Tests du décodage à résolution réduite (mode draft JPEG, Image.reduce).
+"""
+
+import io
+
+from django.test import SimpleTestCase
+
+from images.utils import THUMBNAIL_SIZE, decode_reduced, reduction_factor
+
+from .base import make_image
+
+
+class ReductionFactorTests(SimpleTestCase):
+
+    def test_keeps_a_margin_above_the_target(self):
+        self.assertEqual(reduction_factor((4000, 3000), (200, 200)), 8)
+        self.assertEqual(reduction_factor((1600, 1200), (200, 200)), 4)
+        self.assertEqual(reduction_factor((800, 600), (200, 200)), 2)
+        self.assertEqual(reduction_factor((300, 200), (200, 200)), 1)
+
+
+class DecodeReducedTests(SimpleTestCase):
+
+    def test_jpeg_is_decoded_in_draft_mode(self):
+        img, source_format = decode_reduced(io.BytesIO(make_image(3200, 2400)), THUMBNAIL_SIZE)
+
+        self.assertEqual(source_format, 'JPEG')
+        self.assertEqual(img.mode, 'RGB')
+        # libjpeg décode à 1/8 : le buffer pleine taille n'est jamais alloué
+        self.assertEqual(img.size, (400, 300))
+
+    def test_other_formats_are_reduced_before_conversion(self):
+        content = make_image(1600, 1200, color=(10, 20, 30, 255), fmt='PNG', mode='RGBA')
+
+        img, source_format = decode_reduced(io.BytesIO(content), THUMBNAIL_SIZE)
+
+        self.assertEqual(source_format, 'PNG')
+        self.assertEqual(img.mode, 'RGB')
+        self.assertEqual(img.size, (400, 300))
+        self.assertEqual(img.getpixel((0, 0)), (10, 20, 30))
+
+    def test_small_images_are_decoded_at_full_size(self):
+        img, _ = decode_reduced(io.BytesIO(make_image(300, 200)), THUMBNAIL_SIZE)
+
+        self.assertEqual(img.size, (300, 200))
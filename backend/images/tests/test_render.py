@@ -0,0 +1,101 @@
+"""
+Tests des dérivés à la demande : liste blanche des paramètres, rendu et cache.
+"""
+
+import threading
+import time
+
+from django.http import QueryDict
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from images.derivatives import parse_render_params
+from images.locks import KeyedLock
+
+from .base import MediaTestCase, image_size, make_image, make_upload
+
+
+class RenderParamsTests(SimpleTestCase):
+
+    def parse(self, query):
+        return parse_render_params(QueryDict(query))
+
+    def test_defaults(self):
+        params = self.parse('w=320')
+
+        self.assertEqual((params.width, params.height), (320, 0))
+        self.assertEqual((params.fit, params.fmt, params.quality), ('contain', 'webp', 75))
+        self.assertEqual(params.content_type, 'image/webp')
+
+    def test_values_outside_whitelist_are_rejected(self):
+        for query in ('w=321', 'h=10000', 'w=320&q=90', 'w=abc', '', 'w=320&fmt=gif',
+                      'w=320&fit=stretch', 'w=320&fit=cover'):
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                self.parse(query)
+
+    def test_cache_key_depends_on_file_and_params(self):
+        params = self.parse('w=320&h=200&fit=cover&fmt=jpeg&q=50')
+
+        self.assertEqual(params.cache_key('a.jpg'), self.parse('fit=cover&w=320&h=200&q=50&fmt=jpeg').cache_key('a.jpg'))
+        self.assertNotEqual(params.cache_key('a.jpg'), params.cache_key('b.jpg'))
+        self.assertNotEqual(params.cache_key('a.jpg'), self.parse('w=320&h=200&fit=cover&fmt=jpeg&q=65').cache_key('a.jpg'))
+
+
+class RenderViewTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.image_id = self.upload(make_upload(content=make_image(1200, 800))).json()['id']
+
+    def render(self, query):
+        return self.client.get(f"{reverse('images:render', args=[self.image_id])}?{query}")
+
+    def test_renders_then_serves_from_cache(self):
+        first = self.render('w=320&fmt=jpeg')
+        second = self.render('w=320&fmt=jpeg')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'image/jpeg')
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        content = b''.join(second.streaming_content)
+        self.assertEqual(image_size(content), (320, 213))
+
+    def test_cover_fills_the_box(self):
+        response = self.render('w=200&h=200&fit=cover&fmt=png')
+
+        self.assertEqual(image_size(b''.join(response.streaming_content)), (200, 200))
+
+    def test_rejected_params_return_400(self):
+        response = self.render('w=333')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('w', response.json()['error'])
+
+    def test_unknown_image_returns_404(self):
+        response = self.client.get(reverse('images:render', args=[999999]) + '?w=320')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class KeyedLockTests(SimpleTestCase):
+
+    def test_same_key_is_exclusive_and_entries_are_forgotten(self):
+        locks = KeyedLock()
+        inside = []
+        peak = []
+
+        def work():
+            with locks.hold('key'):
+                inside.append(1)
+                peak.append(len(inside))
+                time.sleep(0.01)
+                inside.pop()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(max(peak), 1)
+        self.assertEqual(locks._locks, {})
@@ -0,0 +1,70 @@
+"""
+Tests de la commande `reoptimize` (doublons conservés, simulation, reprise).
+"""
+
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from images.models import ImageVariant, OptimizedImage
+
+from .base import MediaTransactionTestCase, make_image, make_upload
+
+
+# La commande désactive les métriques du processus (variable d'environnement)
+@mock.patch.dict(os.environ)
+class ReoptimizeCommandTests(MediaTransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.checkpoint = os.path.join(self.tmp_dir, 'reoptimize.json')
+        content = make_image(900, 600)
+        self.ids = [
+            self.upload(make_upload(name, content=content)).json()['id']
+            for name in ('a.jpg', 'b.jpg')
+        ]
+        self.upload(make_upload('other.png', 'image/png', fmt='PNG', width=400, height=300))
+
+    def reoptimize(self, *args):
+        out = StringIO()
+        call_command('reoptimize', '--workers', '0', '--checkpoint', self.checkpoint,
+                     *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_dry_run_counts_encodings(self):
+        output = self.reoptimize('--dry-run')
+
+        self.assertIn('3 image(s) à ré-optimiser, 2 encodage(s)', output)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_duplicates_stay_shared_and_old_files_are_released(self):
+        before = OptimizedImage.objects.get(pk=self.ids[0])
+        old_webp = before.webp_file.name
+
+        output = self.reoptimize()
+        self.wait_for_release()
+
+        first, second = OptimizedImage.objects.filter(pk__in=self.ids).order_by('pk')
+        self.assertIn('Terminé : 3 image(s), 0 échec(s)', output)
+        self.assertNotEqual(first.webp_file.name, old_webp)
+        self.assertEqual(first.webp_file.name, second.webp_file.name)
+        self.assertEqual(
+            sorted(ImageVariant.objects.filter(image=first).values_list('file', flat=True)),
+            sorted(ImageVariant.objects.filter(image=second).values_list('file', flat=True)),
+        )
+        self.assertFalse(os.path.exists(self.media_path(old_webp)))
+        self.assertTrue(os.path.exists(first.webp_file.path))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_missing_variants_only(self):
+        ImageVariant.objects.filter(image_id=self.ids[0]).delete()
+
+        output = self.reoptimize('--missing-variants', '--dry-run')
+
+        # Le doublon a encore ses variantes : seule l'image modifiée est concernée
+        self.assertIn('1 image(s) à ré-optimiser', output)
+
+    def test_format_filter(self):
+        self.assertIn('1 image(s)', self.reoptimize('--format', 'png', '--dry-run'))
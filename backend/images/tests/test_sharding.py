@@ -0,0 +1,96 @@
+"""
+Tests de la répartition des fichiers en sous-dossiers (shard_path, shard_stored_files).
+"""
+
+import os
+
+from django.test import SimpleTestCase, override_settings
+
+from images.models import ImageVariant, OptimizedImage, shard_path
+from images.storage import image_file_names, shard_stored_files
+
+from .base import MediaTestCase, make_image, make_upload
+
+
+NAME = '86b28d38-1c2f-4a4e-9d2b-0f7c8e1a2b3c.jpg'
+
+
+class ShardPathTests(SimpleTestCase):
+
+    def test_uuid_prefix(self):
+        self.assertEqual(shard_path('originals', NAME), f'originals/86/b2/{NAME}')
+        self.assertEqual(shard_path('variants', f'x_{NAME}'), f'variants/86/b2/x_{NAME}')
+
+    @override_settings(MEDIA_SHARD_DEPTH=1)
+    def test_depth(self):
+        self.assertEqual(shard_path('originals', NAME), f'originals/86/{NAME}')
+
+    def test_names_without_uuid_are_hashed(self):
+        path = shard_path('originals', 'photo.jpg')
+
+        self.assertRegex(path, r'^originals/[0-9a-f]{2}/[0-9a-f]{2}/photo\.jpg$')
+        self.assertEqual(path, shard_path('originals', 'photo.jpg'))
+
+
+class ShardStoredFilesTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        content = make_image(900, 600)
+        self.ids = [self.upload(make_upload(content=content)).json()['id'] for _ in range(2)]
+
+    def flatten(self):
+        """Ramène les fichiers des images à l'ancienne disposition (dossiers plats)."""
+        moved = {}
+        for image in OptimizedImage.objects.filter(pk__in=self.ids):
+            for name in image_file_names(image):
+                flat = f"{name.split('/')[0]}/{os.path.basename(name)}"
+                if name not in moved:
+                    os.rename(self.media_path(name), self.media_path(flat))
+                moved[name] = flat
+        for field in ('original_file', 'webp_file', 'thumbnail'):
+            for old, new in moved.items():
+                OptimizedImage.objects.filter(**{field: old}).update(**{field: new})
+        for old, new in moved.items():
+            ImageVariant.objects.filter(file=old).update(file=new)
+        return moved
+
+    def test_new_uploads_are_sharded(self):
+        image = OptimizedImage.objects.get(pk=self.ids[0])
+
+        for name in image_file_names(image):
+            directory, filename = name.split('/')[0], os.path.basename(name)
+            self.assertEqual(name, shard_path(directory, filename))
+
+    def test_flat_files_are_moved_and_released(self):
+        moved = self.flatten()
+
+        results = list(shard_stored_files(batch_size=1, release_grace=0))
+
+        first, second = OptimizedImage.objects.filter(pk__in=self.ids).order_by('pk')
+        self.assertEqual(set(image_file_names(first)), set(moved))
+        # Doublons : mis à jour par la même requête, ils partagent toujours les fichiers
+        self.assertEqual(image_file_names(first), image_file_names(second))
+        self.assertTrue(all(os.path.exists(self.media_path(name)) for name in moved))
+        self.assertFalse(any(os.path.exists(self.media_path(flat)) for flat in moved.values()))
+        self.assertEqual(sum(count for _, count, _ in results), len(moved))
+        self.assertTrue(all(missing == [] for _, _, missing in results))
+
+    def test_keep_old_and_rerun(self):
+        moved = self.flatten()
+
+        list(shard_stored_files(keep_old=True, release_grace=0))
+        rerun = list(shard_stored_files(release_grace=0))
+
+        self.assertTrue(all(os.path.exists(self.media_path(flat)) for flat in moved.values()))
+        self.assertEqual(sum(count for _, count, _ in rerun), 0)
+
+    def test_missing_files_are_reported(self):
+        self.flatten()
+        original = OptimizedImage.objects.get(pk=self.ids[0]).original_file.name
+        os.remove(self.media_path(original))
+
+        results = list(shard_stored_files(release_grace=0))
+
+        self.assertIn(original, [name for _, _, missing in results for name in missing])
+        self.assertEqual(OptimizedImage.objects.get(pk=self.ids[1]).original_file.name, original)
@@ -0,0 +1,59 @@
+"""
+Tests des tailles enregistrées à l'optimisation (webp_size, thumbnail_size, size_reduction).
+"""
+
+import os
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from images.models import OptimizedImage, compute_size_reduction
+from images.storage import backfill_file_sizes
+
+from .base import MediaTestCase
+
+
+class SizeReductionTests(SimpleTestCase):
+
+    def test_percentages(self):
+        self.assertEqual(compute_size_reduction(1000, 345), 65.5)
+        self.assertEqual(compute_size_reduction(1000, 1500), -50.0)
+        self.assertEqual(compute_size_reduction(1000, 0), 0)
+        self.assertEqual(compute_size_reduction(0, 100), 0)
+
+
+class StoredSizesTests(MediaTestCase):
+
+    def test_sizes_match_files_on_disk(self):
+        image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+
+        self.assertEqual(image.webp_size, os.path.getsize(image.webp_file.path))
+        self.assertEqual(image.thumbnail_size, os.path.getsize(image.thumbnail.path))
+        self.assertEqual(
+            image.size_reduction, compute_size_reduction(image.original_size, image.webp_size)
+        )
+
+    def test_backfill_fills_missing_sizes(self):
+        image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+        expected = (image.webp_size, image.thumbnail_size, image.size_reduction)
+        OptimizedImage.objects.update(webp_size=0, thumbnail_size=0, size_reduction=0)
+
+        batches = list(backfill_file_sizes(OptimizedImage, batch_size=10))
+
+        image.refresh_from_db()
+        self.assertEqual(batches, [(1, [])])
+        self.assertEqual((image.webp_size, image.thumbnail_size, image.size_reduction), expected)
+
+    def test_backfill_reports_missing_files(self):
+        image = OptimizedImage.objects.get(pk=self.upload().json()['id'])
+        os.remove(image.thumbnail.path)
+        OptimizedImage.objects.update(webp_size=0)
+
+        out = StringIO()
+        call_command('backfill_sizes', stdout=out, stderr=out)
+
+        image.refresh_from_db()
+        self.assertGreater(image.webp_size, 0)
+        self.assertEqual(image.thumbnail_size, 0)
+        self.assertIn(image.thumbnail.name, out.getvalue())
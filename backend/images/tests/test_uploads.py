@@ -0,0 +1,108 @@
+"""
+Tests des uploads fragmentés et reprenables (sessions, position, finalisation).
+"""
+
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from images import uploads
+from images.models import OptimizedImage, UploadSession
+
+from .base import MediaTestCase, make_image
+
+
+class UploadSessionTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.content = make_image(640, 480)
+
+    def open_session(self, size=None, **extra):
+        data = {'filename': 'chunked.jpg', 'content_type': 'image/jpeg',
+                'size': len(self.content) if size is None else size, **extra}
+        return self.client.post(reverse('images:upload-session-create'), data, content_type='application/json')
+
+    def send(self, session, offset, chunk):
+        return self.client.patch(
+            reverse('images:upload-session', kwargs={'session_id': session['upload_id']}),
+            chunk, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def finalize(self, session):
+        return self.client.post(
+            reverse('images:upload-session-finalize', kwargs={'session_id': session['upload_id']})
+        )
+
+    def test_chunks_then_finalize(self):
+        response = self.open_session()
+        session = response.json()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(session['offset'], 0)
+
+        middle = len(self.content) // 2
+        self.assertEqual(self.send(session, 0, self.content[:middle])['Upload-Offset'], str(middle))
+        resumed = self.client.get(reverse('images:upload-session', kwargs={'session_id': session['upload_id']}))
+        self.assertEqual(resumed.json()['offset'], middle)
+        self.send(session, middle, self.content[middle:])
+
+        response = self.finalize(session)
+
+        self.assertEqual(response.status_code, 201)
+        image = OptimizedImage.objects.get(pk=response.json()['id'])
+        self.assertEqual(image.original_name, 'chunked.jpg')
+        self.assertEqual(image.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.listdir(settings.UPLOAD_SESSION_DIR))
+
+    def test_hash_is_rebuilt_when_the_hasher_is_lost(self):
+        session = self.open_session().json()
+        middle = len(self.content) // 3
+        self.send(session, 0, self.content[:middle])
+        # Autre processus ou redémarrage : l'empreinte en cours n'est plus en mémoire
+        uploads._hashers.clear()
+        self.send(session, middle, self.content[middle:])
+
+        image = OptimizedImage.objects.get(pk=self.finalize(session).json()['id'])
+
+        self.assertEqual(image.content_hash, hashlib.sha256(self.content).hexdigest())
+
+    def test_wrong_offset_returns_expected_position(self):
+        session = self.open_session().json()
+        self.send(session, 0, self.content[:100])
+
+        response = self.send(session, 50, self.content[50:150])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '100')
+
+    def test_chunk_beyond_declared_size_is_rejected(self):
+        session = self.open_session(size=10).json()
+
+        self.assertEqual(self.send(session, 0, self.content[:20]).status_code, 400)
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        session = self.open_session().json()
+        self.send(session, 0, self.content[:100])
+
+        response = self.finalize(session)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 100)
+        self.assertTrue(UploadSession.objects.exists())
+
+    def test_invalid_sessions_are_rejected(self):
+        for extra in ({'size': 0}, {'content_type': 'text/plain'}, {'filename': ''}, {'profile': 'nope'}):
+            with self.subTest(extra=extra):
+                self.assertEqual(self.open_session(**extra).status_code, 400)
+
+    def test_expired_session_is_gone(self):
+        session = self.open_session().json()
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(self.send(session, 0, self.content[:10]).status_code, 404)
+        self.assertFalse(UploadSession.objects.exists())
@@ -0,0 +1,63 @@
+"""
+Tests de l'échelle responsive (ImageVariant) et de sa sélection par `?w=`.
+"""
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from images.models import ImageVariant, OptimizedImage
+from images.utils import ladder_widths
+
+from .base import MediaTestCase, image_size, make_image, make_upload
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640, 1280, 1920])
+class LadderWidthsTests(SimpleTestCase):
+
+    def test_only_smaller_widths_are_kept(self):
+        self.assertEqual(ladder_widths(1000), [320, 640])
+        self.assertEqual(ladder_widths(640), [320])
+        self.assertEqual(ladder_widths(4000), [320, 640, 1280, 1920])
+        self.assertEqual(ladder_widths(200), [])
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640, 1280, 1920])
+class VariantUploadTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.data = self.upload(make_upload(content=make_image(1000, 500))).json()
+
+    def test_variants_are_stored_and_serialized(self):
+        variants = ImageVariant.objects.filter(image_id=self.data['id']).order_by('width')
+
+        self.assertEqual([(v.width, v.height, v.format) for v in variants],
+                         [(320, 160, 'WEBP'), (640, 320, 'WEBP')])
+        self.assertEqual([v['width'] for v in self.data['variants']], [320, 640])
+        self.assertTrue(all(v['byte_size'] > 0 for v in self.data['variants']))
+        self.assertIn('320w', self.data['srcset'])
+        self.assertIn('1000w', self.data['srcset'])
+
+    def test_serve_picks_the_requested_width(self):
+        url = reverse('images:serve', args=[self.data['id']])
+
+        response = self.client.get(url + '?w=320', HTTP_ACCEPT='image/webp')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(image_size(b''.join(response.streaming_content)), (320, 160))
+
+    def test_serve_regenerates_a_missing_variant(self):
+        ImageVariant.objects.filter(image_id=self.data['id'], width=640).delete()
+        url = reverse('images:serve', args=[self.data['id']])
+
+        response = self.client.get(url + '?w=640', HTTP_ACCEPT='image/webp')
+
+        self.assertEqual(image_size(b''.join(response.streaming_content)), (640, 320))
+        self.assertTrue(OptimizedImage.objects.get(pk=self.data['id']).variants.filter(width=640).exists())
+
+    def test_serve_rejects_widths_outside_the_ladder(self):
+        url = reverse('images:serve', args=[self.data['id']])
+
+        for width in ('1280', '500', 'abc'):
+            with self.subTest(width=width):
+                self.assertEqual(self.client.get(f'{url}?w={width}').status_code, 400)
@@ -0,0 +1,57 @@
+"""
+Module de gestionnaires d'upload Django.
+
+Ces gestionnaires remplacent ceux de Django (FILE_UPLOAD_HANDLERS) pour
+calculer l'empreinte SHA-256 du fichier pendant qu'il est reçu : chaque
+morceau est haché au moment où il est écrit, sans relecture du fichier.
+L'empreinte est exposée dans l'attribut `content_hash` du fichier uploadé.
+"""
+
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingMemoryFileUploadHandler(MemoryFileUploadHandler):
+    """
+    Stocke les petits fichiers en mémoire et calcule leur empreinte SHA-256.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # Le morceau n'est haché que si ce gestionnaire le conserve ;
+        # sinon il est transmis au gestionnaire suivant qui le hachera
+        if self.activated:
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.hasher.hexdigest()
+        return file
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Écrit les gros fichiers sur disque et calcule leur empreinte SHA-256.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_hash = self.hasher.hexdigest()
+        return file
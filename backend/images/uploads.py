@@ -0,0 +1,347 @@
+"""
+Module de gestion des uploads fragmentés et reprenables.
+
+Ce module contient :
+- L'ouverture d'une session d'upload (fichier temporaire sur disque)
+- L'écriture d'un morceau à une position donnée, en mémoire bornée
+- Le calcul incrémental de l'empreinte SHA-256 pendant la réception
+- La finalisation : le fichier assemblé est présenté comme un fichier
+  uploadé classique au pipeline d'optimisation
+- La validation d'un upload et la réponse d'une image mise en file
+  d'attente, partagées par les vues synchrones et asynchrones
+
+Protocole (inspiré de tus) :
+    POST  /api/images/uploads/                  -> ouvre la session
+    PATCH /api/images/uploads/<id>/             -> morceau, en-tête Upload-Offset
+    GET   /api/images/uploads/<id>/             -> position pour reprendre
+    POST  /api/images/uploads/<id>/finalize/    -> optimisation
+"""
+
+import contextlib
+import hashlib
+import os
+import threading
+from datetime import timedelta
+
+try:
+    # Verrou de fichier entre processus (POSIX)
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
+from django.utils import timezone
+
+from . import metrics
+from .encoders import resolve_profile
+from .locks import KeyedLock
+from .models import UploadSession
+
+
+# Liste des types MIME acceptés à l'upload
+ALLOWED_CONTENT_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp', 'image/gif']
+
+# Taille des blocs lus depuis la requête et depuis le disque
+BLOCK_SIZE = 64 * 1024
+
+# Verrous par session : un seul morceau écrit à la fois pour une session.
+# Ils ne valent que dans le processus : entre processus, le fichier de la
+# session est en plus verrouillé par flock (_locked_session_file)
+_session_locks = KeyedLock()
+
+# Empreintes en cours par session : id -> (position, objet sha256).
+# Un objet hashlib ne se sérialise pas : s'il manque (autre processus,
+# redémarrage), il est reconstruit en relisant le début du fichier.
+_hashers = {}
+_hashers_guard = threading.Lock()
+
+
+class OffsetMismatch(Exception):
+    """
+    Le morceau reçu ne commence pas à la position attendue par le serveur.
+
+    Attributes:
+        offset: Position actuelle de la session (à laquelle reprendre)
+    """
+
+    def __init__(self, offset):
+        super().__init__(f"Expected offset {offset}")
+        self.offset = offset
+
+
+class SessionFile(UploadedFile):
+    """
+    Fichier assemblé d'une session, présenté comme un fichier uploadé.
+
+    Comme TemporaryUploadedFile, il expose `temporary_file_path()` : le
+    stockage sur disque déplace alors le fichier au lieu de le recopier.
+    """
+
+    def __init__(self, path, name, content_type, size, content_hash):
+        super().__init__(open(path, 'rb'), name, content_type, size)
+        self.path = path
+        self.content_hash = content_hash
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def session_path(session):
+    """Chemin du fichier temporaire d'une session."""
+    return os.path.join(str(settings.UPLOAD_SESSION_DIR), f"{session.pk.hex}.part")
+
+
+@contextlib.contextmanager
+def _locked_session_file(session, mode, exclusive):
+    """
+    Ouvre le fichier d'une session sous verrou flock, partagé entre processus.
+
+    Le fichier est vidé sur disque avant que le verrou ne soit relâché.
+    Sans fcntl (hors POSIX), seul le verrou du processus protège la session.
+
+    Args:
+        session: UploadSession
+        mode: Mode d'ouverture du fichier ('r+b', 'rb')
+        exclusive: Verrou exclusif (écriture) plutôt que partagé (lecture)
+
+    Yields:
+        file: Fichier ouvert et verrouillé
+    """
+    with open(session_path(session), mode) as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield f
+        finally:
+            f.flush()
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _remember_hasher(session_id, offset, hasher):
+    with _hashers_guard:
+        if hasher is None:
+            _hashers.pop(session_id, None)
+        else:
+            _hashers[session_id] = (offset, hasher)
+
+
+def _hasher_at(session, offset):
+    """
+    Retourne l'empreinte en cours du fichier jusqu'à `offset`.
+
+    Réutilise l'objet sha256 du processus s'il est à la bonne position ;
+    sinon relit les `offset` premiers octets du fichier par blocs.
+    """
+    with _hashers_guard:
+        cached = _hashers.get(session.pk)
+    if cached and cached[0] == offset:
+        return cached[1]
+
+    hasher = hashlib.sha256()
+    remaining = offset
+    with open(session_path(session), 'rb') as f:
+        while remaining:
+            block = f.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def purge_expired_sessions():
+    """
+    Supprime les sessions abandonnées (sans morceau reçu depuis UPLOAD_SESSION_TTL).
+
+    Returns:
+        int: Nombre de sessions supprimées
+    """
+    limit = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    expired = list(UploadSession.objects.filter(updated_at__lt=limit))
+    for session in expired:
+        discard_session(session)
+    return len(expired)
+
+
+def create_session(original_name, content_type, total_size, encoding_profile):
+    """
+    Ouvre une session d'upload et crée son fichier temporaire vide.
+
+    Args:
+        original_name: Nom original du fichier
+        content_type: Type MIME déclaré (déjà validé)
+        total_size: Taille totale annoncée en octets (déjà validée)
+        encoding_profile: Profil d'encodage appliqué à la finalisation (déjà validé)
+
+    Returns:
+        UploadSession: Session créée
+    """
+    purge_expired_sessions()
+
+    session = UploadSession.objects.create(
+        original_name=original_name,
+        content_type=content_type,
+        total_size=total_size,
+        encoding_profile=encoding_profile,
+    )
+    os.makedirs(str(settings.UPLOAD_SESSION_DIR), exist_ok=True)
+    open(session_path(session), 'wb').close()
+    return session
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Écrit un morceau à la position `offset` en lisant la requête par blocs.
+
+    Le morceau n'est jamais entièrement chargé en mémoire : chaque bloc lu
+    est écrit sur disque et ajouté à l'empreinte. Si la connexion coupe en
+    cours de route, les octets déjà reçus sont conservés et la position
+    renvoyée permet au client de reprendre exactement là.
+
+    Args:
+        session: UploadSession
+        offset: Position annoncée par le client (en-tête Upload-Offset)
+        stream: Flux de la requête (méthode read)
+        length: Nombre d'octets annoncés (Content-Length)
+
+    Returns:
+        int: Nouvelle position de la session
+
+    Raises:
+        OffsetMismatch: Si `offset` n'est pas la position actuelle
+        ValueError: Si le morceau dépasse la taille totale annoncée
+    """
+    # Le verrou du fichier couvre l'écriture et la mise à jour de la position :
+    # deux processus qui reçoivent le même morceau ne s'entremêlent pas
+    with _session_locks.hold(session.pk), _locked_session_file(session, 'r+b', True) as f:
+        session.refresh_from_db(fields=['received_bytes'])
+        if offset != session.received_bytes:
+            raise OffsetMismatch(session.received_bytes)
+        if offset + length > session.total_size:
+            raise ValueError('Chunk exceeds the declared upload size')
+
+        hasher = _hasher_at(session, offset)
+        written = 0
+
+        # Écarte les octets d'un morceau précédent interrompu
+        f.seek(offset)
+        f.truncate()
+        while written < length:
+            block = stream.read(min(BLOCK_SIZE, length - written))
+            if not block:
+                break
+            f.write(block)
+            hasher.update(block)
+            written += len(block)
+        f.flush()
+
+        new_offset = offset + written
+
+        # Mise à jour conditionnelle, par sécurité : la position ne progresse
+        # que depuis celle qui vient d'être vérifiée
+        updated = UploadSession.objects.filter(
+            pk=session.pk, received_bytes=offset
+        ).update(received_bytes=new_offset, updated_at=timezone.now())
+        if not updated:
+            _remember_hasher(session.pk, None, None)
+            session.refresh_from_db(fields=['received_bytes'])
+            raise OffsetMismatch(session.received_bytes)
+
+        _remember_hasher(session.pk, new_offset, hasher)
+        session.received_bytes = new_offset
+        return new_offset
+
+
+def finalize_session(session):
+    """
+    Vérifie qu'une session est complète et retourne le fichier assemblé.
+
+    Args:
+        session: UploadSession
+
+    Returns:
+        SessionFile: Fichier prêt pour le pipeline (avec `content_hash`)
+
+    Raises:
+        ValueError: Si tous les octets n'ont pas été reçus
+    """
+    with _session_locks.hold(session.pk), _locked_session_file(session, 'rb', False):
+        session.refresh_from_db(fields=['received_bytes'])
+        if session.received_bytes != session.total_size:
+            raise ValueError(
+                f'Upload incomplete: {session.received_bytes}/{session.total_size} bytes received'
+            )
+        content_hash = _hasher_at(session, session.total_size).hexdigest()
+
+    return SessionFile(
+        session_path(session),
+        session.original_name,
+        session.content_type,
+        session.total_size,
+        content_hash,
+    )
+
+
+def discard_session(session):
+    """
+    Supprime une session et son fichier temporaire.
+
+    Le fichier peut déjà avoir été déplacé dans le stockage par la finalisation.
+
+    Args:
+        session: UploadSession
+    """
+    _remember_hasher(session.pk, None, None)
+    try:
+        os.remove(session_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+# ========== VALIDATION ET RÉPONSES PARTAGÉES PAR LES VUES ==========
+
+def validate_upload(files, profile_name):
+    """
+    Valide le fichier `image` et le profil d'encodage d'un upload.
+    
+    Partagé par la vue d'upload et sa version asynchrone (async_views).
+    
+    Args:
+        files: Fichiers reçus (request.FILES)
+        profile_name: Valeur du champ `profile`, ou None
+        
+    Returns:
+        tuple: (fichier uploadé, nom du profil d'encodage)
+        
+    Raises:
+        ValueError: Message d'erreur à renvoyer au client (400)
+    """
+    try:
+        # Vérifie qu'un fichier nommé 'image' est présent dans la requête
+        if 'image' not in files:
+            raise ValueError('No image file provided')
+        uploaded_file = files['image']
+        
+        # Vérifie que le type du fichier est dans la liste autorisée
+        if uploaded_file.content_type not in ALLOWED_CONTENT_TYPES:
+            raise ValueError(f'Invalid file type. Allowed: {", ".join(ALLOWED_CONTENT_TYPES)}')
+        
+        return uploaded_file, resolve_profile(profile_name)
+    except ValueError:
+        metrics.inc('imageboost_errors_total', stage='validation')
+        raise
+
+
+def queued_payload(request, optimized_image, job):
+    """Données renvoyées pour une image mise en file d'attente (mode asynchrone)."""
+    status_url = reverse('images:status', kwargs={'pk': optimized_image.pk})
+    return {
+        'id': optimized_image.pk,
+        'job_id': job.pk,
+        'status': job.status,
+        'status_url': request.build_absolute_uri(status_url),
+    }
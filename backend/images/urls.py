@@ -1,12 +1,48 @@
+from django.conf import settings
 from django.urls import path
-from .views import ImageUploadView, image_list, image_detail, image_delete
+
+from . import async_views
+from .views import (
+    ImageBatchUploadView,
+    ImageUploadView,
+    UploadSessionView,
+    image_bulk_delete,
+    image_delete,
+    image_detail,
+    image_list,
+    image_render,
+    image_serve,
+    image_status,
+    upload_session_create,
+    upload_session_finalize,
+)
 
 app_name = 'images'
 
+# Vues asynchrones (serveur ASGI) ou vues DRF synchrones pour les routes principales
+if settings.API_ASYNC_VIEWS:
+    upload_view = async_views.image_upload
+    list_view = async_views.image_list
+    detail_view = async_views.image_detail
+    delete_view = async_views.image_delete
+else:
+    upload_view = ImageUploadView.as_view()
+    list_view = image_list
+    detail_view = image_detail
+    delete_view = image_delete
+
 urlpatterns = [
-    path('upload/', ImageUploadView.as_view(), name='upload'),
-    path('', image_list, name='list'),
-    path('<int:pk>/', image_detail, name='detail'),
-    path('<int:pk>/delete/', image_delete, name='delete'),
+    path('upload/', upload_view, name='upload'),
+    path('upload/batch/', ImageBatchUploadView.as_view(), name='upload-batch'),
+    path('uploads/', upload_session_create, name='upload-session-create'),
+    path('uploads/<uuid:session_id>/', UploadSessionView.as_view(), name='upload-session'),
+    path('uploads/<uuid:session_id>/finalize/', upload_session_finalize, name='upload-session-finalize'),
+    path('', list_view, name='list'),
+    path('delete/', image_bulk_delete, name='bulk-delete'),
+    path('<int:pk>/', detail_view, name='detail'),
+    path('<int:pk>/delete/', delete_view, name='delete'),
+    path('<int:pk>/status/', image_status, name='status'),
+    path('<int:pk>/render', image_render, name='render'),
+    path('<int:pk>/image/', image_serve, name='serve'),
 ]
 
@@ -4,42 +4,136 @@ Module d'utilitaires pour l'optimisation d'images.
 Ce module contient les fonctions pour traiter et optimiser les images :
 - Conversion en différents formats (WebP, JPEG)
 - Génération de thumbnails
-- Création de placeholders flous
+- Génération des variantes responsives (srcset)
+- Conversion des animations (GIF, WebP) en WebP animé
+- Création de placeholders flous (data URI JPEG ou BlurHash)
 """
 
 # Imports pour l'encodage base64
 import base64
+import os
+import secrets
+# Imports pour la mesure des temps d'exécution
+import time
+# Imports pour l'exécution parallèle des encodages
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 # Imports pour la manipulation de fichiers en mémoire
 from io import BytesIO
 # Imports Pillow pour le traitement d'images
 from PIL import Image, ImageFilter
-# Imports Django pour les fichiers
+# Imports Django pour les fichiers et la configuration
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.core.files.uploadedfile import InMemoryUploadedFile
-import sys
+from django.db import IntegrityError, connection
 
+from .encoders import FORMATS, avif_eager, encode, encoder_options, quality_target
+from . import metrics
+from .admission import admit, budget_factor, inspect_image
+from .animation import encode_animated_webp, frame_timeline, is_animated, is_lossless
+from .caching import invalidate_images
+from .locks import KeyedLock
+from .models import ImageVariant
+from .placeholders import encode_blurhash
+from .quality import search_quality
+from .storage import release_files
 
-def optimize_image(optimized_image_instance):
+
+# Taille maximale de la miniature (ratio d'aspect préservé)
+THUMBNAIL_SIZE = (200, 200)
+
+# Taille maximale du placeholder flou
+BLUR_SIZE = (20, 20)
+
+# Verrous des variantes générées à la demande (AVIF "lazy")
+_variant_locks = KeyedLock()
+
+# Modes acceptés par Image.reduce (les autres sont convertis avant la réduction)
+_REDUCIBLE_MODES = ('L', 'LA', 'PA', 'RGB', 'RGBA', 'CMYK', 'I', 'F', 'YCbCr')
+
+# Marge du décodage réduit : la source réduite garde au moins 2x la taille cible
+# pour que le rééchantillonnage LANCZOS final reste de bonne qualité
+REDUCED_DECODE_GAP = 2.0
+
+# Hauteur des bandes de la réduction d'une grande image (en lignes de l'image réduite)
+REDUCE_STRIP_ROWS = 64
+
+
+@dataclass
+class EncodedVariant:
+    """
+    Variante encodée (une largeur de IMAGE_VARIANT_WIDTHS, ou l'AVIF pleine taille).
     """
-    Optimise une image en créant plusieurs versions.
     
-    Cette fonction prend une instance OptimizedImage et génère :
-    1. Une version WebP optimisée (compression élevée)
-    2. Une miniature (thumbnail) de 200x200px
-    3. Un placeholder flou encodé en base64 pour l'affichage immédiat
+    width: int
+    height: int
+    format: str
+    content: bytes
+
+
+@dataclass
+class OptimizationResult:
+    """
+    Résultat du pipeline de variantes pour une image.
     
-    Args:
-        optimized_image_instance: Instance du modèle OptimizedImage à optimiser
+    Contient les octets encodés de chaque variante ainsi que les durées
+    de chaque étape (en millisecondes) pour savoir où passe le temps.
     """
-    # ========== OUVERTURE ET PRÉPARATION DE L'IMAGE ==========
     
-    # Ouvre l'image originale depuis le fichier stocké
-    img = Image.open(optimized_image_instance.original_file)
+    width: int
+    height: int
+    format: str
+    quality: int = None
+    frame_count: int = 1
+    webp: bytes = b''
+    thumbnail: bytes = b''
+    blur_placeholder: str = ''
+    blurhash: str = ''
+    responsive: list = field(default_factory=list)
+    timings: dict = field(default_factory=dict)
+
+
+def _elapsed_ms(start):
+    """Retourne le temps écoulé depuis `start` (time.perf_counter) en millisecondes."""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def shrink_to_fit(img, max_size, reducing_gap=None):
+    """
+    Réduit une image pour qu'elle tienne dans `max_size` sans l'agrandir.
+    
+    Contrairement à Image.thumbnail(), retourne une nouvelle image et ne
+    modifie pas la source : plusieurs threads peuvent lire la même source.
+    
+    Args:
+        img: Image Pillow source (non modifiée)
+        max_size: Tuple (largeur, hauteur) maximum
+        reducing_gap: Optimisation Pillow (réduction entière avant le rééchantillonnage)
+        
+    Returns:
+        Image: Nouvelle image réduite
+    """
+    ratio = min(max_size[0] / img.width, max_size[1] / img.height)
+    if ratio >= 1:
+        return img.copy()
+    size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=reducing_gap)
+
+
+def _flatten_to_rgb(img):
+    """
+    Convertit une image ouverte en RGB.
     
-    # ========== CONVERSION EN RGB ==========
-    # Les images avec transparence (RGBA, LA, P) doivent être converties en RGB
-    # pour être compatibles avec JPEG et WebP
+    Les images avec transparence (RGBA, LA, P) sont aplaties sur un fond
+    blanc pour être compatibles avec JPEG et WebP ; les autres modes
+    (L, CMYK, etc.) sont convertis en RGB.
     
+    Args:
+        img: Image Pillow ouverte (décodage éventuellement pas encore fait)
+        
+    Returns:
+        Image: Image RGB entièrement décodée
+    """
     if img.mode in ('RGBA', 'LA', 'P'):
         # Crée une nouvelle image RGB avec fond blanc
         rgb_img = Image.new('RGB', img.size, (255, 255, 255))
@@ -50,109 +144,703 @@ def optimize_image(optimized_image_instance):
         
         # Colle l'image originale sur le fond blanc en préservant la transparence
         rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-        img = rgb_img
+        return rgb_img
+    
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    
+    # Force le décodage complet (Image.open est paresseux)
+    img.load()
+    return img
+
+
+def decode_rgb(source):
+    """
+    Décode une image source en un unique buffer RGB pleine résolution.
+    
+    Args:
+        source: Fichier ou chemin de l'image originale
         
-    elif img.mode != 'RGB':
-        # Si l'image est dans un autre mode (L, CMYK, etc.), convertit en RGB
-        img = img.convert('RGB')
+    Returns:
+        tuple: (image RGB décodée, format d'origine comme "JPEG" ou "PNG")
+    """
+    img = Image.open(source)
     
-    # ========== ENREGISTREMENT DES MÉTADONNÉES ==========
+    # Le format est perdu lors de la conversion : on le lit avant
+    source_format = img.format or 'JPEG'
     
-    # Enregistre les dimensions de l'image
-    optimized_image_instance.width = img.width
-    optimized_image_instance.height = img.height
+    return _flatten_to_rgb(img), source_format
+
+
+def reduction_factor(size, max_size, gap=REDUCED_DECODE_GAP):
+    """
+    Choisit le facteur de réduction entier (8, 4, 2 ou 1) pour une cible.
     
-    # Enregistre le format original ou définit JPEG par défaut
-    optimized_image_instance.format = img.format or 'JPEG'
+    Le facteur retenu est le plus grand pour lequel l'image réduite reste
+    au moins `gap` fois plus grande que la taille finale dans `max_size`.
     
-    # ========== CRÉATION DE LA VERSION WEBP ==========
-    # Format moderne avec compression optimale (réduction moyenne de 60-70%)
+    Args:
+        size: Tuple (largeur, hauteur) de la source
+        max_size: Tuple (largeur, hauteur) maximum de la variante finale
+        gap: Marge à conserver au-dessus de la taille finale
+        
+    Returns:
+        int: Facteur de réduction (1 = pas de réduction)
+    """
+    ratio = min(max_size[0] / size[0], max_size[1] / size[1])
+    for factor in (8, 4, 2):
+        if ratio * gap * factor <= 1:
+            return factor
+    return 1
+
+
+def reduce_rgb(img, max_size):
+    """
+    Réduit un buffer RGB déjà décodé par un facteur entier (Image.reduce).
     
-    # Crée un buffer en mémoire pour stocker l'image WebP
-    webp_buffer = BytesIO()
+    Args:
+        img: Image RGB pleine résolution (non modifiée)
+        max_size: Tuple (largeur, hauteur) maximum de la variante finale
+        
+    Returns:
+        Image: Image réduite (ou `img` si aucune réduction n'est utile)
+    """
+    factor = reduction_factor(img.size, max_size)
+    if factor > 1:
+        return img.reduce(factor)
+    return img
+
+
+def decode_reduced(source, max_size):
+    """
+    Décode une image à résolution réduite pour une petite variante.
     
-    # Sauvegarde l'image en format WebP avec qualité 85% et méthode 6 (meilleure compression)
-    img.save(webp_buffer, format='WEBP', quality=85, method=6)
+    Pour les JPEG, le mode "draft" de Pillow fait décoder directement par
+    libjpeg à 1/2, 1/4 ou 1/8 de la résolution : le buffer pleine taille
+    n'est jamais alloué. Les autres formats n'ont pas de décodage partiel,
+    ils sont décodés dans leur mode d'origine puis réduits avant la
+    conversion en RGB.
     
-    # Remet le curseur au début du buffer pour pouvoir le lire
-    webp_buffer.seek(0)
+    Le facteur n'est jamais inférieur à celui du budget de pixels
+    (IMAGE_DECODE_PIXEL_BUDGET) : une grande image n'est jamais convertie
+    en RGB pleine résolution, même pour une cible proche de sa taille.
     
-    # Crée un fichier Django à partir du contenu du buffer
-    webp_file = ContentFile(webp_buffer.read())
+    Args:
+        source: Fichier ou chemin de l'image originale
+        max_size: Tuple (largeur, hauteur) maximum de la variante finale
+        
+    Returns:
+        tuple: (image RGB réduite, format d'origine)
+    """
+    img = Image.open(source)
+    source_format = img.format or 'JPEG'
     
-    # Génère un nom de fichier WebP à partir du nom original
-    webp_filename = optimized_image_instance.original_file.name.rsplit('.', 1)[0] + '.webp'
+    factor = max(reduction_factor(img.size, max_size), budget_factor(img.size))
+    if factor > 1:
+        return _decode_by_factor(img, factor), source_format
+    return _flatten_to_rgb(img), source_format
+
+
+def decode_within_budget(source, factor):
+    """
+    Décode une image trop grande pour le budget de pixels, réduite d'un facteur entier.
     
-    # Sauvegarde le fichier WebP (save=False car on sauvera tout à la fin)
-    optimized_image_instance.webp_file.save(webp_filename, webp_file, save=False)
+    Args:
+        source: Fichier ou chemin de l'image originale
+        factor: Facteur de réduction (admission.budget_factor)
+        
+    Returns:
+        tuple: (image RGB réduite, format d'origine)
+    """
+    img = Image.open(source)
+    return _decode_by_factor(img, factor), img.format or 'JPEG'
+
+
+def _decode_by_factor(img, factor):
+    """
+    Décode une image ouverte réduite d'un facteur entier.
     
-    # ========== CRÉATION DU THUMBNAIL ==========
-    # Miniature de 200x200px maximum en préservant le ratio d'aspect
+    JPEG : décodage "draft" par libjpeg directement à la résolution réduite.
+    Autres formats : décodage dans le mode d'origine (1 à 4 octets par pixel),
+    réduction immédiate, puis conversion en RGB de la seule image réduite :
+    aucune copie RGB pleine taille n'est créée.
+    """
+    if img.format == 'JPEG':
+        img.draft('RGB', (img.width // factor, img.height // factor))
+        return _flatten_to_rgb(img)
+    
+    img.load()
+    if img.mode not in _REDUCIBLE_MODES:
+        has_alpha = img.mode == 'P' or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+    return _flatten_to_rgb(_reduce_in_strips(img, factor))
+
+
+def _reduce_in_strips(img, factor, rows=REDUCE_STRIP_ROWS):
+    """
+    Image.reduce par bandes horizontales.
     
-    # Définit la taille maximale du thumbnail
-    thumbnail_size = (200, 200)
+    Pour les modes avec alpha (RGBA, LA), Image.reduce crée d'abord une copie
+    pleine taille (alpha prémultiplié) : par bandes, seule la copie d'une
+    bande est allouée. Le résultat est identique (bandes multiples du facteur).
+    """
+    strip = rows * factor
+    if img.height <= strip:
+        return img.reduce(factor)
+    
+    reduced = Image.new(img.mode, (-(-img.width // factor), -(-img.height // factor)))
+    for top in range(0, img.height, strip):
+        band = img.crop((0, top, img.width, min(top + strip, img.height)))
+        reduced.paste(band.reduce(factor), (0, top // factor))
+    return reduced
+
+
+def encode_webp(img, profile=None, quality=None):
+    """
+    Encode une image en WebP avec les réglages de IMAGE_ENCODERS['webp'] et du profil.
     
-    # Crée une copie de l'image pour ne pas modifier l'original
-    # thumbnail() modifie l'image en place en respectant le ratio
-    img.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
+    Args:
+        img: Image RGB source
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        quality: Qualité imposée (recherche SSIM), sinon celle du profil
+        
+    Returns:
+        bytes: Contenu du fichier WebP
+    """
+    return encode(img, 'webp', profile, quality)
+
+
+def build_thumbnail(img):
+    """
+    Génère la miniature JPEG (200x200px max, qualité 75%).
     
-    # Crée un buffer pour le thumbnail
-    thumbnail_buffer = BytesIO()
+    Args:
+        img: Image RGB source (non modifiée)
+        
+    Returns:
+        bytes: Contenu du fichier JPEG
+    """
+    thumb = shrink_to_fit(img, THUMBNAIL_SIZE, reducing_gap=3.0)
+    buffer = BytesIO()
+    thumb.save(buffer, format='JPEG', quality=75)
+    return buffer.getvalue()
+
+
+def build_blur_placeholder(img):
+    """
+    Génère le placeholder flou encodé en data URI base64.
     
-    # Sauvegarde le thumbnail en JPEG avec qualité 75%
-    img.save(thumbnail_buffer, format='JPEG', quality=75)
+    Le placeholder est calculé depuis la source et non depuis la miniature.
     
-    # Remet le curseur au début
-    thumbnail_buffer.seek(0)
+    Args:
+        img: Image RGB source (non modifiée)
+        
+    Returns:
+        str: Data URI "data:image/jpeg;base64,..."
+    """
+    blur_img = shrink_to_fit(img, BLUR_SIZE, reducing_gap=3.0)
     
-    # Crée un fichier Django à partir du buffer
-    thumbnail_file = ContentFile(thumbnail_buffer.read())
+    # Applique un filtre de flou gaussien pour créer l'effet placeholder
+    blur_img = blur_img.filter(ImageFilter.GaussianBlur(radius=2))
     
-    # Génère un nom de fichier pour le thumbnail
-    thumbnail_filename = f"thumb_{optimized_image_instance.original_file.name}"
+    # Sauvegarde avec qualité très basse (50%) pour réduire la taille
+    buffer = BytesIO()
+    blur_img.save(buffer, format='JPEG', quality=50)
     
-    # Sauvegarde le thumbnail
-    optimized_image_instance.thumbnail.save(thumbnail_filename, thumbnail_file, save=False)
+    blur_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    return f"data:image/jpeg;base64,{blur_base64}"
+
+
+def build_blurhash(img):
+    """
+    Génère le placeholder BlurHash (BLURHASH_COMPONENTS composantes).
     
-    # ========== CRÉATION DU BLUR PLACEHOLDER ==========
-    # Version très petite et floutée pour l'affichage immédiat avant chargement
+    Args:
+        img: Image RGB source (non modifiée)
+        
+    Returns:
+        str: Chaîne BlurHash
+    """
+    sample = shrink_to_fit(img, (32, 32), reducing_gap=3.0)
+    return encode_blurhash(sample, tuple(settings.BLURHASH_COMPONENTS))
+
+
+def ladder_widths(source_width):
+    """
+    Retourne les largeurs responsives à générer pour une image.
     
-    # Taille très réduite pour un placeholder léger
-    blur_size = (20, 20)
+    Seules les largeurs strictement inférieures à l'original sont gardées :
+    une variante n'est jamais agrandie.
     
-    # Crée une copie de l'image originale (avant réduction du thumbnail)
-    # Note: On devrait utiliser une copie de l'image originale, pas celle du thumbnail
-    # Pour simplifier, on utilise une copie (idéalement, on recréerait depuis l'original)
-    blur_img = img.copy()
+    Args:
+        source_width: Largeur de l'image originale en pixels
+        
+    Returns:
+        list: Largeurs de IMAGE_VARIANT_WIDTHS à générer
+    """
+    return [width for width in settings.IMAGE_VARIANT_WIDTHS if width < source_width]
+
+
+def build_responsive_variant(img, width, fmt='webp', profile=None, quality=None):
+    """
+    Encode une variante responsive à la largeur donnée.
     
-    # Réduit l'image à 20x20px maximum
-    blur_img.thumbnail(blur_size, Image.Resampling.LANCZOS)
+    Args:
+        img: Image RGB source (non modifiée)
+        width: Largeur cible en pixels (ratio d'aspect préservé)
+        fmt: Format logique ("webp" ou "avif")
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        quality: Qualité imposée (WebP seulement : l'échelle AVIF est différente)
+        
+    Returns:
+        EncodedVariant: Variante encodée
+    """
+    if width >= img.width:
+        # Variante pleine taille : aucun redimensionnement
+        resized = img
+    else:
+        height = max(1, round(img.height * width / img.width))
+        # Réduction entière rapide avant le rééchantillonnage LANCZOS
+        source = reduce_rgb(img, (width, height))
+        resized = source.resize((width, height), Image.Resampling.LANCZOS)
+    
+    return EncodedVariant(
+        width=resized.width,
+        height=resized.height,
+        format=FORMATS[fmt][0],
+        content=encode(resized, fmt, profile, quality if fmt == 'webp' else None),
+    )
+
+
+def _timed(func, *args):
+    """Exécute func(*args) et retourne (résultat, durée en ms)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, _elapsed_ms(start)
+
+
+def build_variants(source, profile=None):
+    """
+    Pipeline de variantes : décodages ciblés puis encodages en parallèle.
     
-    # Applique un filtre de flou gaussien pour créer l'effet placeholder
-    blur_img = blur_img.filter(ImageFilter.GaussianBlur(radius=2))
+    Seule la version WebP pleine taille a besoin d'un décodage complet.
+    La miniature et le placeholder sont calculés depuis une source réduite
+    (décodage "draft" pour les JPEG, Image.reduce sinon), et les encodages
+    sont exécutés dans un pool de threads : Pillow relâche le GIL pendant
+    le décodage, l'encodage et le redimensionnement.
     
-    # Crée un buffer pour le placeholder
-    blur_buffer = BytesIO()
+    Une image qui dépasse IMAGE_DECODE_PIXEL_BUDGET est décodée réduite
+    (decode_within_budget) : la version WebP et les dimensions enregistrées
+    sont alors celles de l'image réduite.
     
-    # Sauvegarde avec qualité très basse (50%) pour réduire la taille
-    blur_img.save(blur_buffer, format='JPEG', quality=50)
+    Si le profil d'encodage a une cible SSIM, la qualité WebP est d'abord
+    cherchée sur une copie réduite, puis appliquée à toutes les variantes WebP.
+    
+    Une animation (GIF, WebP) suit son propre pipeline : build_animated_variants.
+    
+    Args:
+        source: Fichier ouvert de l'image originale
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        
+    Returns:
+        OptimizationResult: Octets de chaque variante et durées par étape
+    """
+    start = time.perf_counter()
+    
+    # Les octets compressés sont lus une fois : chaque décodage a son propre flux
+    data = source.read()
+    timings = {}
+    
+    if is_animated(Image.open(BytesIO(data))):
+        return build_animated_variants(data, profile)
+    
+    with ThreadPoolExecutor(max_workers=max(3, os.cpu_count() or 1)) as executor:
+        # En-tête seulement : format et dimensions, aucun pixel décodé
+        header = Image.open(BytesIO(data))
+        is_jpeg = header.format == 'JPEG'
+        factor = budget_factor(header.size)
+        
+        if is_jpeg:
+            # Le décodage réduit tourne pendant le décodage complet
+            reduced_future = executor.submit(_timed, decode_reduced, BytesIO(data), THUMBNAIL_SIZE)
+        
+        decode_start = time.perf_counter()
+        if factor > 1:
+            # Au-delà du budget : toutes les variantes partent de l'image réduite
+            img, source_format = decode_within_budget(BytesIO(data), factor)
+        else:
+            img, source_format = decode_rgb(BytesIO(data))
+        timings['decode'] = _elapsed_ms(decode_start)
+        
+        # Qualité WebP : cherchée par SSIM si le profil a une cible, sinon fixée par le profil
+        target = quality_target(profile)
+        if target:
+            quality, timings['quality_search'] = _timed(search_quality, img, 'webp', profile, *target)
+        else:
+            quality = encoder_options('webp', profile).get('quality')
+        
+        # Chaque tâche ne fait que lire `img` : seule encode_webp appelle save() dessus
+        webp_future = executor.submit(_timed, encode_webp, img, profile, quality)
+        
+        if is_jpeg:
+            (reduced, _), timings['decode_reduced'] = reduced_future.result()
+        else:
+            reduced, timings['decode_reduced'] = _timed(reduce_rgb, img, THUMBNAIL_SIZE)
+        
+        thumbnail_future = executor.submit(_timed, build_thumbnail, reduced)
+        # Placeholders choisis dans IMAGE_PLACEHOLDERS
+        blur_future = blurhash_future = None
+        if 'jpeg' in settings.IMAGE_PLACEHOLDERS:
+            blur_future = executor.submit(_timed, build_blur_placeholder, reduced)
+        if 'blurhash' in settings.IMAGE_PLACEHOLDERS:
+            blurhash_future = executor.submit(_timed, build_blurhash, reduced)
+        # Échelle WebP, plus l'AVIF (échelle + pleine taille) s'il n'est pas généré à la demande
+        responsive_jobs = [(width, 'webp') for width in ladder_widths(img.width)]
+        if avif_eager():
+            responsive_jobs += [(width, 'avif') for width in ladder_widths(img.width) + [img.width]]
+        
+        responsive_futures = [
+            executor.submit(_timed, build_responsive_variant, img, width, fmt, profile, quality)
+            for width, fmt in responsive_jobs
+        ]
+        
+        result = OptimizationResult(
+            width=img.width, height=img.height, format=source_format, quality=quality
+        )
+        result.webp, timings['webp'] = webp_future.result()
+        result.thumbnail, timings['thumbnail'] = thumbnail_future.result()
+        if blur_future:
+            result.blur_placeholder, timings['blur'] = blur_future.result()
+        if blurhash_future:
+            result.blurhash, timings['blurhash'] = blurhash_future.result()
+        
+        for future in responsive_futures:
+            variant, elapsed = future.result()
+            result.responsive.append(variant)
+            timings[f'responsive_{variant.format.lower()}_{variant.width}'] = elapsed
+    
+    timings['variants'] = _elapsed_ms(start)
+    result.timings = timings
+    return result
+
+
+def build_animated_variants(data, profile=None):
+    """
+    Pipeline d'une animation : WebP animé, miniature et placeholders fixes.
     
-    # Remet le curseur au début
-    blur_buffer.seek(0)
+    Les images sont décodées une à une (voir images/animation.py) : la
+    mémoire ne dépend pas du nombre d'images. La miniature, les placeholders
+    et la recherche de qualité partent de la première image (le "poster").
+    Un GIF est encodé sans perte : aucune qualité n'est alors enregistrée.
     
-    # Lit les données binaires
-    blur_data = blur_buffer.read()
+    Pas de variantes responsives ni d'AVIF : l'animation n'est encodée qu'à
+    sa taille d'origine (les limites de inspect_image bornent son coût).
     
-    # Encode en base64 pour pouvoir l'utiliser directement dans le HTML
-    blur_base64 = base64.b64encode(blur_data).decode('utf-8')
+    Args:
+        data: Octets du fichier original
+        profile: Nom du profil d'encodage (None = profil par défaut)
+        
+    Returns:
+        OptimizationResult: Octets de chaque variante et durées par étape
+    """
+    start = time.perf_counter()
+    timings = {}
+    
+    img = Image.open(BytesIO(data))
+    source_format = img.format
+    (durations, loop), timings['frames'] = _timed(frame_timeline, img)
+    
+    # Poster : première image, aplatie en RGB (copie indépendante de `img`)
+    decode_start = time.perf_counter()
+    img.seek(0)
+    poster = _flatten_to_rgb(img.convert('RGBA'))
+    timings['decode'] = _elapsed_ms(decode_start)
+    
+    # Qualité WebP (comme build_variants), sauf pour un encodage sans perte
+    target = quality_target(profile)
+    if is_lossless(source_format):
+        quality = None
+    elif target:
+        quality, timings['quality_search'] = _timed(search_quality, poster, 'webp', profile, *target)
+    else:
+        quality = encoder_options('webp', profile).get('quality')
+    
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        reduced, timings['decode_reduced'] = _timed(reduce_rgb, poster, THUMBNAIL_SIZE)
+        thumbnail_future = executor.submit(_timed, build_thumbnail, reduced)
+        blur_future = blurhash_future = None
+        if 'jpeg' in settings.IMAGE_PLACEHOLDERS:
+            blur_future = executor.submit(_timed, build_blur_placeholder, reduced)
+        if 'blurhash' in settings.IMAGE_PLACEHOLDERS:
+            blurhash_future = executor.submit(_timed, build_blurhash, reduced)
+        
+        # Seul ce thread lit `img` (seek image par image) : les tâches lisent le poster
+        result = OptimizationResult(
+            width=img.width, height=img.height, format=source_format,
+            quality=quality, frame_count=len(durations),
+        )
+        result.webp, timings['webp'] = _timed(
+            encode_animated_webp, img, durations, loop, profile, quality
+        )
+        result.thumbnail, timings['thumbnail'] = thumbnail_future.result()
+        if blur_future:
+            result.blur_placeholder, timings['blur'] = blur_future.result()
+        if blurhash_future:
+            result.blurhash, timings['blurhash'] = blurhash_future.result()
+    
+    timings['variants'] = _elapsed_ms(start)
+    result.timings = timings
+    return result
+
+
+@metrics.count_errors('optimize')
+def optimize_image(optimized_image_instance):
+    """
+    Optimise une image en créant plusieurs versions.
     
-    # Stocke le placeholder dans le format data URI pour utilisation immédiate
-    optimized_image_instance.blur_placeholder = f"data:image/jpeg;base64,{blur_base64}"
+    Cette fonction prend une instance OptimizedImage et génère :
+    1. Une version WebP optimisée (compression élevée)
+    2. Une miniature (thumbnail) de 200x200px
+    3. Les placeholders de IMAGE_PLACEHOLDERS (BlurHash, data URI JPEG flou)
+    4. Les variantes responsives (IMAGE_VARIANT_WIDTHS) dans ImageVariant
     
-    # ========== SAUVEGARDE FINALE ==========
+    Une animation (GIF, WebP) donne un WebP animé, une miniature fixe et
+    aucune variante responsive.
+    
+    Args:
+        optimized_image_instance: Instance du modèle OptimizedImage à optimiser
+        
+    Returns:
+        OptimizationResult: Résultat du pipeline avec les durées par étape
+    """
+    start = time.perf_counter()
+    
+    # ========== DÉCODAGE ET ENCODAGE DES VARIANTES ==========
+    
+    original_file = optimized_image_instance.original_file
+    original_file.open('rb')
+    try:
+        result = build_variants(original_file, optimized_image_instance.encoding_profile)
+    finally:
+        original_file.close()
+    
+    # ========== ENREGISTREMENT DES MÉTADONNÉES ==========
+    
+    optimized_image_instance.width = result.width
+    optimized_image_instance.height = result.height
+    optimized_image_instance.format = result.format
+    optimized_image_instance.frame_count = result.frame_count
+    optimized_image_instance.encoding_quality = result.quality
+    
+    # ========== SAUVEGARDE DES FICHIERS ==========
+    
+    save_start = time.perf_counter()
+    
+    # Fichiers d'une optimisation précédente (ré-optimisation) : libérés après
+    previous_names = [
+        field_file.name
+        for field_file in (optimized_image_instance.webp_file, optimized_image_instance.thumbnail)
+        if field_file
+    ]
+    
+    # Génère les noms de fichiers à partir du nom original. Une ré-optimisation
+    # ajoute une révision : les fichiers sont servis comme immuables, un nom
+    # déjà servi n'est jamais réutilisé pour un autre contenu
+    # (les fonctions upload_to des champs choisissent le dossier)
+    root, extension = os.path.splitext(os.path.basename(original_file.name))
+    if previous_names:
+        root = f"{root}_{secrets.token_hex(4)}"
+    webp_filename = f"{root}.webp"
+    thumbnail_filename = f"thumb_{root}{extension}"
+    
+    # save=False car on sauvera tout à la fin
+    store_start = time.perf_counter()
+    optimized_image_instance.webp_file.save(webp_filename, ContentFile(result.webp), save=False)
+    optimized_image_instance.thumbnail.save(thumbnail_filename, ContentFile(result.thumbnail), save=False)
+    optimized_image_instance.blur_placeholder = result.blur_placeholder
+    optimized_image_instance.blurhash = result.blurhash
+    optimized_image_instance.update_size_stats(len(result.webp), len(result.thumbnail))
+    result.timings['store'] = _elapsed_ms(store_start)
     
     # Sauvegarde toutes les modifications dans la base de données
+    db_start = time.perf_counter()
     optimized_image_instance.save()
+    result.timings['db_save'] = _elapsed_ms(db_start)
+    
+    # Supprime les anciens fichiers s'ils ne sont plus partagés avec un doublon
+    if previous_names:
+        release_files(previous_names, original_file.storage)
+    
+    # ========== VARIANTES RESPONSIVES ==========
+    
+    variants_start = time.perf_counter()
+    _replace_variants(optimized_image_instance, result.responsive)
+    result.timings['store_variants'] = _elapsed_ms(variants_start)
+    
+    result.timings['save'] = _elapsed_ms(save_start)
+    result.timings['total'] = _elapsed_ms(start)
+    
+    # ========== MÉTRIQUES ==========
+    
+    metrics.observe_timings(result.timings)
+    metrics.inc('imageboost_bytes_in_total', optimized_image_instance.original_size)
+    metrics.inc('imageboost_bytes_out_total', len(result.webp), variant='webp')
+    metrics.inc('imageboost_bytes_out_total', len(result.thumbnail), variant='thumbnail')
+    for variant in result.responsive:
+        metrics.inc('imageboost_bytes_out_total', len(variant.content), variant=f'responsive_{variant.format.lower()}')
+    return result
+
+
+def _variant_stem(optimized_image_instance):
+    """
+    Nom de base des variantes : celui du WebP (avec sa révision éventuelle).
+    
+    Les variantes d'une ré-optimisation ne reprennent donc jamais le nom
+    d'une variante précédente.
+    """
+    name = optimized_image_instance.webp_file.name or optimized_image_instance.original_file.name
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def _replace_variants(optimized_image_instance, encoded_variants):
+    """
+    Remplace les lignes ImageVariant d'une image par les variantes encodées.
+    
+    Les fichiers des anciennes variantes (ré-optimisation) sont supprimés
+    s'ils ne sont plus référencés par aucun enregistrement.
+    
+    Args:
+        optimized_image_instance: Instance OptimizedImage déjà sauvegardée
+        encoded_variants: Liste d'EncodedVariant produite par build_variants
+    """
+    previous = optimized_image_instance.variants.all()
+    old_names = [name for name in previous.values_list('file', flat=True) if name]
+    previous.delete()
+    
+    # Nom de base commun : "<uuid>_<largeur>w.webp"
+    stem = _variant_stem(optimized_image_instance)
+    
+    variants = []
+    for encoded in encoded_variants:
+        variant = ImageVariant(
+            image=optimized_image_instance,
+            width=encoded.width,
+            height=encoded.height,
+            format=encoded.format,
+            byte_size=len(encoded.content),
+        )
+        extension = encoded.format.lower()
+        variant.file.save(f"{stem}_{encoded.width}w.{extension}", ContentFile(encoded.content), save=False)
+        variants.append(variant)
+    
+    ImageVariant.objects.bulk_create(variants)
+    # bulk_create n'émet pas de signal : les réponses en cache de l'image sont invalidées ici
+    invalidate_images([optimized_image_instance.pk])
+    
+    if old_names:
+        release_files(old_names, optimized_image_instance.original_file.storage)
+
+
+def ensure_variant(optimized_image_instance, fmt, width):
+    """
+    Retourne une variante (format, largeur), en la générant si elle manque.
+    
+    Utilisé pour l'AVIF "lazy" et pour les lignes WebP manquantes de
+    l'échelle : la variante est encodée à la première demande puis
+    enregistrée dans ImageVariant pour les suivantes. Les
+    requêtes concurrentes du processus pour la même variante attendent
+    le premier encodage au lieu d'encoder à nouveau.
+    
+    Args:
+        optimized_image_instance: Instance OptimizedImage
+        fmt: Format logique ("avif" ou "webp")
+        width: Largeur voulue (une largeur de l'échelle ou la largeur de l'original)
+        
+    Returns:
+        ImageVariant: Variante existante ou nouvellement créée
+    
+    Raises:
+        ServerBusy: Si la génération d'une grande image doit attendre une place
+        ImageTooLarge: Si l'original dépasse les limites de inspect_image
+    """
+    pil_format = FORMATS[fmt][0]
+    variants = ImageVariant.objects.filter(image=optimized_image_instance, format=pil_format, width=width)
+    
+    variant = variants.first()
+    if variant:
+        return variant
+    
+    with _variant_locks.hold(f"{optimized_image_instance.pk}:{pil_format}:{width}"):
+        # Une autre requête a pu créer la variante pendant l'attente
+        variant = variants.first()
+        if variant:
+            return variant
+        
+        # Même contrôle d'admission que l'upload : place réservée pour une grande
+        # image, décodage réduit au budget de pixels (decode_reduced)
+        original_file = optimized_image_instance.original_file
+        with original_file.open('rb') as source, admit(inspect_image(source)):
+            img, _ = decode_reduced(source, (width, optimized_image_instance.height or width))
+            encoded = build_responsive_variant(
+                img, width, fmt, optimized_image_instance.encoding_profile,
+                optimized_image_instance.encoding_quality,
+            )
+        
+        stem = _variant_stem(optimized_image_instance)
+        variant = ImageVariant(
+            image=optimized_image_instance,
+            width=width,
+            height=encoded.height,
+            format=encoded.format,
+            byte_size=len(encoded.content),
+        )
+        variant.file.save(f"{stem}_{width}w.{fmt}", ContentFile(encoded.content), save=False)
+        
+        try:
+            variant.save()
+            invalidate_images([optimized_image_instance.pk])
+        except IntegrityError:
+            # Un autre processus l'a créée en même temps : garde la sienne
+            variant.file.delete(save=False)
+            variant = variants.get()
+        return variant
+
+
+def _optimize_in_thread(optimized_image_instance):
+    """Optimise une image dans un thread du pool de optimize_many."""
+    try:
+        optimize_image(optimized_image_instance)
+        return None
+    except Exception as e:
+        return e
+    finally:
+        # Chaque thread a sa propre connexion à la base : elle est fermée
+        # pour ne pas laisser de connexion ouverte par thread du pool
+        connection.close()
+
+
+def optimize_many(instances, max_workers):
+    """
+    Optimise plusieurs images en parallèle dans un pool de threads borné.
+    
+    Le décodage et l'encodage Pillow libèrent le GIL : plusieurs images
+    avancent réellement en même temps. Une erreur sur une image n'arrête
+    pas les autres.
+    
+    Args:
+        instances: Instances OptimizedImage déjà sauvegardées
+        max_workers: Nombre maximum d'images optimisées simultanément
+        
+    Returns:
+        dict: ID de l'image -> exception levée, ou None en cas de succès
+    """
+    if not instances:
+        return {}
+    
+    workers = max(1, min(max_workers, len(instances)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        errors = executor.map(_optimize_in_thread, instances)
+        return {instance.pk: error for instance, error in zip(instances, errors)}
 
 
 def create_blur_placeholder_from_url(image_url):
@@ -160,26 +848,8 @@ def create_blur_placeholder_from_url(image_url):
     try:
         import requests
         response = requests.get(image_url, timeout=5)
-        img = Image.open(BytesIO(response.content))
-        
-        # Convert to RGB if needed
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Create tiny blurred version
-        blur_size = (20, 20)
-        blur_img = img.copy()
-        blur_img.thumbnail(blur_size, Image.Resampling.LANCZOS)
-        blur_img = blur_img.filter(ImageFilter.GaussianBlur(radius=2))
-        
-        blur_buffer = BytesIO()
-        blur_img.save(blur_buffer, format='JPEG', quality=50)
-        blur_buffer.seek(0)
-        blur_data = blur_buffer.read()
-        blur_base64 = base64.b64encode(blur_data).decode('utf-8')
-        
-        return f"data:image/jpeg;base64,{blur_base64}"
+        img, _ = decode_rgb(BytesIO(response.content))
+        return build_blur_placeholder(img)
     except Exception as e:
         print(f"Error creating blur placeholder: {e}")
         return None
-
@@ -5,20 +5,74 @@ Ce module contient toutes les vues API pour :
 - Upload d'images
 - Liste des images
 - Détails d'une image
-- Suppression d'images
+- Suppression d'images (une à une ou groupée)
+- Suivi du statut d'optimisation (mode asynchrone)
+- Dérivés redimensionnés à la demande
+- Service des images avec négociation de format (AVIF, WebP, JPEG)
+- Upload de plusieurs images en une requête
+- Upload fragmenté et reprenable des gros fichiers
+- Service des fichiers média (plages d'octets, ETag, cache immuable)
 """
 
+import contextlib
+import os
+from datetime import datetime, time
+
 # Imports Django REST Framework pour créer l'API
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET, require_safe
+from PIL import UnidentifiedImageError
 
 # Imports locaux : modèles, sérialiseurs et utilitaires
-from .models import OptimizedImage
-from .serializers import OptimizedImageSerializer
-from .utils import optimize_image
+from . import metrics
+from .admission import ImageTooLarge, ServerBusy, admit, inspect_image
+from .caching import cached_response, invalidate_images
+from .models import OptimizedImage, OptimizationJob, UploadSession
+from .derivatives import RenderParams, get_cache, parse_render_params, render_derivative
+from .encoders import FORMATS, encoder_settings, negotiate_format, resolve_profile
+from .media import (
+    FileRange,
+    RangeNotSatisfiable,
+    cache_control,
+    content_etag,
+    content_type,
+    if_range_matches,
+    parse_range,
+    resolve_media_path,
+)
+from .pagination import keyset_page, list_payload, list_queryset, parse_list_params
+from .serializers import OptimizedImageSerializer, OptimizationJobSerializer
+from .storage import (
+    clone_image,
+    compute_content_hash,
+    find_duplicate,
+    find_duplicates,
+)
+from .tasks import enqueue_optimization
+from .uploads import (
+    ALLOWED_CONTENT_TYPES,
+    OffsetMismatch,
+    append_chunk,
+    create_session,
+    discard_session,
+    finalize_session,
+    queued_payload,
+    validate_upload,
+)
+from .utils import ensure_variant, ladder_widths, optimize_image, optimize_many
+
 
 
 class ImageUploadView(APIView):
@@ -38,9 +92,13 @@ class ImageUploadView(APIView):
         Processus :
         1. Vérifie qu'un fichier image est fourni
         2. Valide le type de fichier
-        3. Crée une instance OptimizedImage
-        4. Optimise l'image (WebP, thumbnail, blur)
-        5. Retourne les données de l'image optimisée
+        3. Valide le profil d'encodage (champ optionnel `profile`)
+        4. Réutilise les variantes d'un doublon déjà optimisé (même SHA-256
+           et même profil) ou crée une instance OptimizedImage
+        5. Optimise l'image (WebP, thumbnail, blur)
+           ou, en mode asynchrone, met un job en file d'attente
+        6. Retourne les données de l'image optimisée (201)
+           ou l'identifiant du job à suivre (202)
         
         Args:
             request: Objet requête HTTP contenant le fichier dans request.FILES
@@ -50,94 +108,578 @@ class ImageUploadView(APIView):
         """
         # ========== VALIDATION DU FICHIER ==========
         
-        # Vérifie qu'un fichier nommé 'image' est présent dans la requête
-        if 'image' not in request.FILES:
-            return Response(
-                {'error': 'No image file provided'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # Le premier accès à request.FILES lit et découpe le corps multipart
+        with metrics.timed('parse'):
+            files = request.FILES
         
-        # Récupère le fichier uploadé
-        uploaded_file = request.FILES['image']
+        try:
+            uploaded_file, encoding_profile = validate_upload(files, request.data.get('profile'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # ========== VALIDATION DU TYPE DE FICHIER ==========
+        return store_and_optimize(request, uploaded_file, encoding_profile)
+
+
+def _discard_image(optimized_image):
+    """Supprime une image dont l'optimisation a échoué, ainsi que ses fichiers non partagés."""
+    optimized_image.delete()
+
+
+def store_and_optimize(request, uploaded_file, encoding_profile):
+    """
+    Enregistre un fichier uploadé validé puis l'optimise.
+    
+    Étape commune à l'upload classique et à la finalisation d'un upload
+    fragmenté : inspection de l'en-tête, déduplication, création de
+    l'instance, puis optimisation immédiate ou mise en file d'attente
+    (mode asynchrone).
+    
+    Args:
+        request: Requête HTTP (pour construire les URLs absolues)
+        uploaded_file: Fichier uploadé (type déjà validé)
+        encoding_profile: Nom du profil d'encodage (déjà validé)
         
-        # Liste des types MIME acceptés
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp', 'image/gif']
+    Returns:
+        Response: Données de l'image (201), job à suivre (202), fichier
+        invalide (400), image trop grande (413), serveur occupé (503)
+        ou erreur (500)
+    """
+    # ========== INSPECTION DE L'EN-TÊTE ==========
+    
+    # Dimensions lues sans décoder les pixels
+    try:
+        info = inspect_image(uploaded_file)
+    except ImageTooLarge as e:
+        metrics.inc('imageboost_errors_total', stage='validation')
+        return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except (UnidentifiedImageError, OSError):
+        metrics.inc('imageboost_errors_total', stage='validation')
+        return Response({'error': 'Invalid image file'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # ========== DÉDUPLICATION PAR EMPREINTE DE CONTENU ==========
+    
+    # Empreinte SHA-256 calculée pendant la réception du fichier
+    with metrics.timed('hash'):
+        content_hash = compute_content_hash(uploaded_file)
+    
+    # Si le même contenu a déjà été optimisé, réutilise ses fichiers
+    # (aucun nouvel original stocké, aucun ré-encodage)
+    duplicate = find_duplicate(content_hash, encoding_profile)
+    if duplicate:
+        optimized_image = clone_image(duplicate, original_name=uploaded_file.name)
+        metrics.inc('imageboost_uploads_total', outcome='duplicate')
+        serializer = OptimizedImageSerializer(optimized_image, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    if settings.IMAGE_OPTIMIZATION_ASYNC:
+        # L'optimisation aura lieu dans un worker (une image à la fois par processus)
+        return _create_and_optimize(request, uploaded_file, content_hash, encoding_profile)
+    
+    # ========== CONTRÔLE D'ADMISSION ==========
+    
+    # Place réservée avant d'écrire l'original : un refus ne laisse aucun fichier
+    try:
+        with admit(info):
+            return _create_and_optimize(request, uploaded_file, content_hash, encoding_profile)
+    except ServerBusy as e:
+        return _busy_response(e)
+
+
+def _busy_response(error, response_class=Response):
+    """
+    Réponse 503 avec Retry-After : trop de grandes images en cours.
+    
+    `response_class` : Response (vues DRF) ou JsonResponse (vues Django simples).
+    """
+    metrics.inc('imageboost_errors_total', stage='admission')
+    response = response_class(
+        {'error': str(error), 'retry_after': error.retry_after},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def _create_and_optimize(request, uploaded_file, content_hash, encoding_profile):
+    """
+    Crée l'instance d'un nouveau contenu puis l'optimise (ou la met en file d'attente).
+    
+    Args:
+        request: Requête HTTP
+        uploaded_file: Fichier uploadé (validé et inspecté)
+        content_hash: Empreinte SHA-256 du fichier
+        encoding_profile: Nom du profil d'encodage
         
-        # Vérifie que le type du fichier est dans la liste autorisée
-        if uploaded_file.content_type not in allowed_types:
+    Returns:
+        Response: Données de l'image (201), job à suivre (202) ou erreur (500)
+    """
+    # ========== CRÉATION DE L'INSTANCE ==========
+    
+    # Crée une nouvelle instance OptimizedImage avec les données du fichier
+    optimized_image = OptimizedImage(
+        original_name=uploaded_file.name,  # Nom original
+        original_file=uploaded_file,       # Fichier lui-même
+        content_hash=content_hash,         # Empreinte pour la déduplication
+        encoding_profile=encoding_profile  # Profil appliqué à l'optimisation
+    )
+    
+    # Enregistre la taille du fichier original en octets
+    optimized_image.original_size = uploaded_file.size
+    
+    # Sauvegarde l'instance dans la base de données
+    # (le fichier est automatiquement uploadé grâce à upload_to dans le modèle)
+    with metrics.timed('store_original'):
+        optimized_image.save()
+    
+    # ========== MODE ASYNCHRONE : MISE EN FILE D'ATTENTE ==========
+    
+    if settings.IMAGE_OPTIMIZATION_ASYNC:
+        # L'optimisation sera faite par `python manage.py process_images`
+        job = enqueue_optimization(optimized_image)
+        metrics.inc('imageboost_uploads_total', outcome='queued')
+        
+        # Retourne immédiatement avec le code HTTP 202 (Accepted)
+        return Response(
+            queued_payload(request, optimized_image, job),
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    # ========== OPTIMISATION DE L'IMAGE ==========
+    
+    try:
+        # Génère les versions optimisées (WebP, thumbnail, blur placeholder)
+        optimize_image(optimized_image)
+        
+        # Rafraîchit l'instance depuis la DB pour avoir toutes les données
+        optimized_image.refresh_from_db()
+        
+    except Exception as e:
+        # En cas d'erreur lors de l'optimisation, supprime l'instance créée
+        # ainsi que les fichiers déjà écrits
+        _discard_image(optimized_image)
+        metrics.inc('imageboost_uploads_total', outcome='failed')
+        
+        # Retourne une erreur avec le message
+        return Response(
+            {'error': f'Error optimizing image: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    # ========== RETOUR DE LA RÉPONSE ==========
+    
+    metrics.inc('imageboost_uploads_total', outcome='created')
+    
+    # Sérialise l'image optimisée en JSON
+    serializer = OptimizedImageSerializer(optimized_image, context={'request': request})
+    
+    # Retourne les données avec le code HTTP 201 (Created)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ImageBatchUploadView(APIView):
+    """
+    Vue API pour l'upload de plusieurs images en une seule requête.
+    
+    Les fichiers sont tous validés avant tout traitement, les
+    enregistrements sont insérés en une requête (bulk_create), puis les
+    images sont optimisées en parallèle dans un pool borné
+    (UPLOAD_BATCH_WORKERS). Chaque fichier a son propre résultat : un
+    fichier invalide ou impossible à optimiser n'annule pas les autres.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def post(self, request):
+        """
+        Gère la requête POST contenant plusieurs fichiers dans le champ `images`.
+        
+        Args:
+            request: Requête multipart avec un ou plusieurs champs `images`
+            
+        Returns:
+            Response: {"succeeded": [...], "failed": [...]} avec le code
+            201 (ou 202 en mode asynchrone) si tout a réussi, 207 si certains
+            fichiers ont échoué, 400 si aucun n'a pu être traité
+        """
+        with metrics.timed('parse'):
+            files = request.FILES.getlist('images')
+        
+        if not files:
+            return Response({'error': 'No image files provided'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(files) > settings.UPLOAD_BATCH_MAX_FILES:
             return Response(
-                {'error': f'Invalid file type. Allowed: {", ".join(allowed_types)}'}, 
+                {'error': f'Too many files (max {settings.UPLOAD_BATCH_MAX_FILES})'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # ========== CRÉATION DE L'INSTANCE ==========
+        # Un seul profil d'encodage pour tout le lot
+        try:
+            encoding_profile = resolve_profile(request.data.get('profile'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        succeeded = []
+        failed = []
         
-        # Crée une nouvelle instance OptimizedImage avec les données du fichier
-        optimized_image = OptimizedImage(
-            original_name=uploaded_file.name,  # Nom original
-            original_file=uploaded_file        # Fichier lui-même
-        )
+        def fail(index, uploaded_file, error):
+            metrics.inc('imageboost_uploads_total', outcome='failed')
+            failed.append({'index': index, 'filename': uploaded_file.name, 'error': error})
         
-        # Enregistre la taille du fichier original en octets
-        optimized_image.original_size = uploaded_file.size
+        # ========== VALIDATION DE TOUS LES FICHIERS ==========
         
-        # Sauvegarde l'instance dans la base de données
-        # (le fichier est automatiquement uploadé grâce à upload_to dans le modèle)
-        optimized_image.save()
+        accepted = []
+        for index, uploaded_file in enumerate(files):
+            if uploaded_file.content_type not in ALLOWED_CONTENT_TYPES:
+                fail(index, uploaded_file, f'Invalid file type. Allowed: {", ".join(ALLOWED_CONTENT_TYPES)}')
+                continue
+            try:
+                info = inspect_image(uploaded_file)
+            except ImageTooLarge as e:
+                fail(index, uploaded_file, str(e))
+                continue
+            except (UnidentifiedImageError, OSError):
+                fail(index, uploaded_file, 'Invalid image file')
+                continue
+            accepted.append((index, uploaded_file, compute_content_hash(uploaded_file), info))
         
-        # ========== OPTIMISATION DE L'IMAGE ==========
+        # ========== DÉDUPLICATION ==========
         
-        try:
-            # Génère les versions optimisées (WebP, thumbnail, blur placeholder)
-            optimize_image(optimized_image)
+        # Contenus déjà optimisés : une seule requête pour tout le lot
+        existing = find_duplicates(
+            (content_hash for _, _, content_hash, _ in accepted), encoding_profile
+        )
+        
+        new_images = []      # (index, fichier, instance) à insérer et optimiser
+        batch_copies = []    # (index, fichier, empreinte) : doublons au sein du lot
+        representatives = {}
+        busy = None
+        
+        # Places réservées pour les grandes images, relâchées à la fin de la
+        # requête même si un clonage ou une insertion échoue
+        with contextlib.ExitStack() as admission:
+            for index, uploaded_file, content_hash, info in accepted:
+                if content_hash in existing:
+                    clone = clone_image(existing[content_hash], original_name=uploaded_file.name)
+                    succeeded.append((index, uploaded_file, clone, None))
+                elif content_hash in representatives:
+                    # Même contenu qu'un autre fichier du lot : un seul original stocké
+                    batch_copies.append((index, uploaded_file, content_hash))
+                else:
+                    if not settings.IMAGE_OPTIMIZATION_ASYNC:
+                        try:
+                            admission.enter_context(admit(info))
+                        except ServerBusy as e:
+                            busy = e
+                            fail(index, uploaded_file, f'{e}, retry in {e.retry_after} s')
+                            continue
+                    optimized_image = OptimizedImage(
+                        original_name=uploaded_file.name,
+                        original_file=uploaded_file,
+                        original_size=uploaded_file.size,
+                        content_hash=content_hash,
+                        encoding_profile=encoding_profile,
+                    )
+                    representatives[content_hash] = optimized_image
+                    new_images.append((index, uploaded_file, optimized_image))
             
-            # Rafraîchit l'instance depuis la DB pour avoir toutes les données
-            optimized_image.refresh_from_db()
+            # ========== INSERTION GROUPÉE ==========
             
-        except Exception as e:
-            # En cas d'erreur lors de l'optimisation, supprime l'instance créée
-            optimized_image.delete()
+            # Les fichiers originaux sont écrits dans le stockage pendant l'insertion
+            OptimizedImage.objects.bulk_create([image for _, _, image in new_images])
+            invalidate_images(image.pk for _, _, image in new_images)
             
-            # Retourne une erreur avec le message
-            return Response(
-                {'error': f'Error optimizing image: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            if settings.IMAGE_OPTIMIZATION_ASYNC:
+                # ========== MODE ASYNCHRONE : MISE EN FILE D'ATTENTE ==========
+                
+                # Les doublons du lot référencent l'original déjà stocké ; leur
+                # job partage les fichiers du premier une fois celui-ci optimisé
+                copies = []
+                for index, uploaded_file, content_hash in batch_copies:
+                    source = representatives[content_hash]
+                    copies.append((index, uploaded_file, OptimizedImage(
+                        original_name=uploaded_file.name,
+                        original_file=source.original_file.name,
+                        original_size=source.original_size,
+                        content_hash=content_hash,
+                        encoding_profile=encoding_profile,
+                    )))
+                OptimizedImage.objects.bulk_create([image for _, _, image in copies])
+                invalidate_images(image.pk for _, _, image in copies)
+                
+                queued = new_images + copies
+                jobs = OptimizationJob.objects.bulk_create([
+                    OptimizationJob(image=image) for _, _, image in queued
+                ])
+                for (index, uploaded_file, image), job in zip(queued, jobs):
+                    succeeded.append((index, uploaded_file, image, job))
+            else:
+                # ========== OPTIMISATION EN PARALLÈLE ==========
+                
+                errors = optimize_many(
+                    [image for _, _, image in new_images], settings.UPLOAD_BATCH_WORKERS
+                )
+                for index, uploaded_file, image in new_images:
+                    error = errors[image.pk]
+                    if error is None:
+                        succeeded.append((index, uploaded_file, image, None))
+                    else:
+                        _discard_image(image)
+                        representatives.pop(image.content_hash)
+                        fail(index, uploaded_file, f'Error optimizing image: {error}')
+                
+                for index, uploaded_file, content_hash in batch_copies:
+                    source = representatives.get(content_hash)
+                    if source is None:
+                        fail(index, uploaded_file, 'Error optimizing image: identical file in this batch failed')
+                    else:
+                        clone = clone_image(source, original_name=uploaded_file.name)
+                        succeeded.append((index, uploaded_file, clone, None))
         
-        # ========== RETOUR DE LA RÉPONSE ==========
+        # ========== RÉPONSE ==========
         
-        # Sérialise l'image optimisée en JSON
-        serializer = OptimizedImageSerializer(optimized_image, context={'request': request})
+        # Relit les images réussies avec leurs variantes (deux requêtes pour tout le lot)
+        images = OptimizedImage.objects.prefetch_related('variants').in_bulk(
+            [image.pk for _, _, image, _ in succeeded]
+        )
         
-        # Retourne les données avec le code HTTP 201 (Created)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        results = []
+        for index, uploaded_file, image, job in sorted(succeeded, key=lambda entry: entry[0]):
+            metrics.inc('imageboost_uploads_total', outcome='queued' if job is not None else 'created')
+            if job is not None:
+                data = queued_payload(request, image, job)
+            else:
+                data = OptimizedImageSerializer(images[image.pk], context={'request': request}).data
+            results.append({'index': index, 'filename': uploaded_file.name, 'image': data})
+        
+        if not results and busy is not None:
+            # Rien n'a pu être traité faute de place : le client réessaie plus tard
+            return _busy_response(busy)
+        if not results:
+            status_code = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            status_code = status.HTTP_207_MULTI_STATUS
+        elif settings.IMAGE_OPTIMIZATION_ASYNC:
+            status_code = status.HTTP_202_ACCEPTED
+        else:
+            status_code = status.HTTP_201_CREATED
+        
+        return Response(
+            {'succeeded': results, 'failed': sorted(failed, key=lambda entry: entry['index'])},
+            status=status_code
+        )
+
+
+# ========== UPLOAD FRAGMENTÉ ET REPRENABLE ==========
+
+def _get_session(session_id):
+    """Retourne une session d'upload encore valide, ou None (absente ou expirée)."""
+    session = UploadSession.objects.filter(pk=session_id).first()
+    if session is None:
+        return None
+    if (timezone.now() - session.updated_at).total_seconds() > settings.UPLOAD_SESSION_TTL:
+        discard_session(session)
+        return None
+    return session
+
+
+def _session_response(request, session, status_code=status.HTTP_200_OK):
+    """Réponse décrivant l'état d'une session (position dans le JSON et l'en-tête Upload-Offset)."""
+    upload_url = reverse('images:upload-session', kwargs={'session_id': session.pk})
+    finalize_url = reverse('images:upload-session-finalize', kwargs={'session_id': session.pk})
+    response = Response(
+        {
+            'upload_id': str(session.pk),
+            'offset': session.received_bytes,
+            'size': session.total_size,
+            'chunk_size': settings.UPLOAD_CHUNK_SIZE,
+            'upload_url': request.build_absolute_uri(upload_url),
+            'finalize_url': request.build_absolute_uri(finalize_url),
+        },
+        status=status_code
+    )
+    response['Upload-Offset'] = str(session.received_bytes)
+    return response
+
+
+@api_view(['POST'])
+def upload_session_create(request):
+    """
+    Ouvre une session d'upload fragmenté.
+    
+    Corps JSON attendu : {"filename": ..., "size": octets, "content_type": ...,
+    "profile": ... (optionnel)}
+    
+    Args:
+        request: Objet requête HTTP
+        
+    Returns:
+        Response: État de la session (201) avec les URLs d'envoi et de finalisation
+    """
+    filename = str(request.data.get('filename') or '').strip()
+    content_type = request.data.get('content_type')
+    
+    if not filename:
+        return Response({'error': "'filename' is required"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        return Response(
+            {'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_CONTENT_TYPES)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        size = int(request.data.get('size'))
+    except (TypeError, ValueError):
+        return Response({'error': "'size' must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+        return Response(
+            {'error': f"'size' must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        encoding_profile = resolve_profile(request.data.get('profile'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    session = create_session(filename[:255], content_type, size, encoding_profile)
+    return _session_response(request, session, status.HTTP_201_CREATED)
+
+
+class UploadSessionView(APIView):
+    """
+    Vue API d'une session d'upload fragmenté.
+    
+    - GET : position actuelle (pour reprendre après une coupure)
+    - PATCH : envoi d'un morceau brut à la position de l'en-tête Upload-Offset
+    - DELETE : abandon de la session
+    """
+    
+    def get(self, request, session_id):
+        session = _get_session(session_id)
+        if session is None:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        return _session_response(request, session)
+    
+    def patch(self, request, session_id):
+        """
+        Reçoit un morceau du fichier.
+        
+        Le corps de la requête est lu par blocs et écrit directement sur
+        disque : la mémoire utilisée ne dépend pas de la taille du morceau.
+        
+        Args:
+            request: Requête avec l'en-tête Upload-Offset et le morceau en corps brut
+            session_id: Identifiant de la session
+            
+        Returns:
+            Response: Nouvelle position (200), ou position attendue (409)
+        """
+        session = _get_session(session_id)
+        if session is None:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length <= 0:
+            return Response({'error': 'Empty chunk'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            append_chunk(session, offset, request.stream, length)
+        except OffsetMismatch:
+            # Le client reprend à la position indiquée
+            return _session_response(request, session, status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return _session_response(request, session)
+    
+    def delete(self, request, session_id):
+        session = _get_session(session_id)
+        if session is not None:
+            discard_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+def upload_session_finalize(request, session_id):
+    """
+    Termine un upload fragmenté et transmet le fichier au pipeline d'optimisation.
+    
+    L'empreinte SHA-256, calculée au fil des morceaux, sert à la
+    déduplication comme pour un upload classique.
+    
+    Args:
+        request: Objet requête HTTP
+        session_id: Identifiant de la session
+        
+    Returns:
+        Response: Même réponse qu'un upload classique (201, 202 ou 503),
+        ou la position attendue (409) si des octets manquent
+    """
+    session = _get_session(session_id)
+    if session is None:
+        return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        uploaded_file = finalize_session(session)
+    except ValueError:
+        return _session_response(request, session, status.HTTP_409_CONFLICT)
+    
+    try:
+        response = store_and_optimize(request, uploaded_file, session.encoding_profile)
+    finally:
+        uploaded_file.close()
+    
+    # Serveur occupé (503) : la session est conservée, le client relance la finalisation
+    if response.status_code != status.HTTP_503_SERVICE_UNAVAILABLE:
+        discard_session(session)
+    return response
 
 
 @api_view(['GET'])
 def image_list(request):
     """
-    Vue API pour lister toutes les images optimisées.
+    Vue API pour lister les images optimisées, page par page.
+    
+    Les images sont triées de la plus récente à la plus ancienne et
+    paginées par curseur sur (created_at, id) : le coût d'une page ne
+    dépend pas du nombre total d'images.
+    
+    Paramètres de requête :
+    - cursor : curseur `next` de la page précédente (absent = première page)
+    - limit : nombre d'images par page (borné par IMAGE_LIST_MAX_PAGE_SIZE)
+    - fields : champs à retourner, séparés par des virgules (ex: `id,thumbnail_url`)
     
-    Cette fonction retourne la liste complète de toutes les images
-    stockées dans la base de données, triées par date de création.
+    Les pages sont mises en cache (une entrée par URL) jusqu'à la prochaine
+    modification d'une image ; les clients qui interrogent régulièrement la
+    liste reçoivent un 304 si elle n'a pas changé (ETag, Last-Modified).
     
     Args:
         request: Objet requête HTTP
         
     Returns:
-        Response: Réponse JSON avec la liste des images
+        Response: Réponse JSON {"results": [...], "next": URL de la page suivante ou null}
     """
-    # Récupère toutes les images de la base de données
-    # (triées par date décroissante grâce à ordering dans Meta du modèle)
-    images = OptimizedImage.objects.all()
-    
-    # Sérialise toutes les images (many=True pour plusieurs objets)
-    serializer = OptimizedImageSerializer(images, many=True, context={'request': request})
+    return cached_response(request, lambda: _image_list_response(request))
+
+
+def _image_list_response(request):
+    """Calcule une page de la liste (hors cache)."""
+    try:
+        limit, fields = parse_list_params(request.GET)
+        page, next_cursor = keyset_page(list_queryset(fields), request.GET.get('cursor'), limit)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Retourne les données sérialisées
-    return Response(serializer.data)
+    return Response(list_payload(request, page, fields, next_cursor))
 
 
 @api_view(['GET'])
@@ -146,7 +688,8 @@ def image_detail(request, pk):
     Vue API pour obtenir les détails d'une image spécifique.
     
     Cette fonction retourne les informations détaillées d'une image
-    identifiée par son ID (primary key).
+    identifiée par son ID (primary key). La réponse est mise en cache
+    jusqu'à la prochaine modification de cette image.
     
     Args:
         request: Objet requête HTTP
@@ -155,9 +698,14 @@ def image_detail(request, pk):
     Returns:
         Response: Réponse JSON avec les détails de l'image ou erreur 404
     """
+    return cached_response(request, lambda: _image_detail_response(request, pk), image_id=pk)
+
+
+def _image_detail_response(request, pk):
+    """Calcule le détail d'une image (hors cache)."""
     try:
-        # Essaie de récupérer l'image avec l'ID fourni
-        image = OptimizedImage.objects.get(pk=pk)
+        # Essaie de récupérer l'image avec l'ID fourni (et ses variantes)
+        image = OptimizedImage.objects.prefetch_related('variants').get(pk=pk)
         
         # Sérialise l'image
         serializer = OptimizedImageSerializer(image, context={'request': request})
@@ -178,8 +726,9 @@ def image_delete(request, pk):
     """
     Vue API pour supprimer une image.
     
-    Cette fonction supprime une image et tous ses fichiers associés
-    (original, WebP, thumbnail) de la base de données et du système de fichiers.
+    Cette fonction supprime une image de la base de données, ainsi que ses
+    fichiers (original, WebP, thumbnail) s'ils ne sont plus utilisés par
+    aucun autre enregistrement (doublons partageant les mêmes fichiers).
     
     Args:
         request: Objet requête HTTP
@@ -192,8 +741,9 @@ def image_delete(request, pk):
         # Essaie de récupérer l'image avec l'ID fourni
         image = OptimizedImage.objects.get(pk=pk)
         
-        # Supprime l'image (les fichiers sont aussi supprimés automatiquement
-        # grâce à la configuration Django)
+        # Supprime l'enregistrement ; les fichiers qui ne sont plus référencés
+        # par aucune image sont supprimés après le commit, en arrière-plan
+        # (OptimizedImage.delete)
         image.delete()
         
         # Retourne une réponse vide avec le code 204 (No Content)
@@ -207,3 +757,460 @@ def image_delete(request, pk):
             status=status.HTTP_404_NOT_FOUND
         )
 
+
+
+# Critères acceptés par la suppression groupée : clé -> lookup sur OptimizedImage
+BULK_DELETE_FILTERS = {
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+    'format': 'format__iexact',
+}
+
+
+@api_view(['POST'])
+def image_bulk_delete(request):
+    """
+    Vue API pour supprimer plusieurs images en une requête.
+    
+    Corps JSON, l'une des deux formes :
+    - {"ids": [1, 2, 3]} : images désignées par leur ID
+    - {"filter": {"created_after": ..., "created_before": ..., "format": "PNG"}} :
+      images correspondant à tous les critères donnés (au moins un ; dates
+      ISO 8601, `created_before` exclue)
+    
+    Les lignes sont supprimées par une seule suppression de QuerySet (les
+    variantes en cascade), dans une transaction. Les fichiers qui ne sont
+    plus référencés sont supprimés après le commit, en arrière-plan et par
+    lots (OptimizedImageQuerySet.delete).
+    
+    Args:
+        request: Requête JSON
+        
+    Returns:
+        Response: {"deleted": nombre d'images supprimées, "missing": IDs
+        demandés introuvables}, ou erreur 400 (corps invalide, plus de
+        IMAGE_BULK_DELETE_MAX images)
+    """
+    try:
+        images, requested_ids = parse_bulk_delete(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        # Une ligne de plus que le maximum suffit à refuser un filtre trop large
+        found_ids = set(images.values_list('pk', flat=True)[:settings.IMAGE_BULK_DELETE_MAX + 1])
+        if len(found_ids) > settings.IMAGE_BULK_DELETE_MAX:
+            return Response(
+                {'error': f'Filter matches more than {settings.IMAGE_BULK_DELETE_MAX} images'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Les IDs relevés plutôt que le filtre : une image créée entre-temps
+        # n'est pas supprimée sans avoir été comptée
+        _, deleted = OptimizedImage.objects.filter(pk__in=found_ids).delete()
+    
+    return Response({
+        'deleted': deleted.get(OptimizedImage._meta.label, 0),
+        'missing': [pk for pk in requested_ids if pk not in found_ids],
+    })
+
+
+def parse_bulk_delete(data):
+    """
+    Lit le corps d'une suppression groupée.
+    
+    Args:
+        data: Corps JSON décodé (request.data)
+        
+    Returns:
+        tuple: (QuerySet des images visées, IDs demandés dans l'ordre, sans doublon)
+        
+    Raises:
+        ValueError: Corps invalide (400)
+    """
+    if not hasattr(data, 'get') or ('ids' in data) == ('filter' in data):
+        raise ValueError("Provide either 'ids' or 'filter'")
+    
+    if 'ids' in data:
+        ids = data['ids']
+        if (
+            not isinstance(ids, list) or not ids
+            or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids)
+        ):
+            raise ValueError("'ids' must be a non-empty list of integers")
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > settings.IMAGE_BULK_DELETE_MAX:
+            raise ValueError(f'Too many ids (max {settings.IMAGE_BULK_DELETE_MAX})')
+        return OptimizedImage.objects.filter(pk__in=ids), ids
+    
+    criteria = data['filter']
+    if not isinstance(criteria, dict) or not criteria:
+        raise ValueError("'filter' must be a non-empty object")
+    unknown = set(criteria) - set(BULK_DELETE_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+    
+    lookups = {}
+    for key, value in criteria.items():
+        if key == 'format':
+            if not isinstance(value, str) or not value:
+                raise ValueError("'format' must be a non-empty string")
+        else:
+            value = _parse_filter_datetime(key, value)
+        lookups[BULK_DELETE_FILTERS[key]] = value
+    return OptimizedImage.objects.filter(**lookups), []
+
+
+def _parse_filter_datetime(key, value):
+    """Date ou date-heure ISO 8601 (heure locale du serveur si sans fuseau)."""
+    parsed = None
+    if isinstance(value, str):
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None and parse_date(value) is not None:
+                parsed = datetime.combine(parse_date(value), time.min)
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        raise ValueError(f"'{key}' must be an ISO 8601 date or datetime")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@api_view(['GET'])
+def image_status(request, pk):
+    """
+    Vue API pour suivre l'état d'optimisation d'une image.
+    
+    Retourne le statut du dernier job de l'image (pending, processing,
+    done ou failed). Une fois l'optimisation terminée, les données
+    complètes de l'image sont incluses dans la réponse.
+    
+    Args:
+        request: Objet requête HTTP
+        pk: Primary key (ID) de l'image
+        
+    Returns:
+        Response: Réponse JSON avec le statut ou erreur 404
+    """
+    try:
+        image = OptimizedImage.objects.get(pk=pk)
+    except OptimizedImage.DoesNotExist:
+        return Response(
+            {'error': 'Image not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    # Récupère le job le plus récent (une image peut être ré-optimisée)
+    job = image.jobs.order_by('-created_at').first()
+    
+    if job:
+        data = OptimizationJobSerializer(job).data
+    else:
+        # Image optimisée en mode synchrone : aucun job n'existe
+        data = {
+            'job_id': None,
+            'image_id': image.pk,
+            'status': OptimizationJob.STATUS_DONE if image.webp_file else OptimizationJob.STATUS_PENDING,
+        }
+    
+    # Ajoute les données complètes de l'image quand elle est prête
+    if data['status'] == OptimizationJob.STATUS_DONE:
+        data['image'] = OptimizedImageSerializer(image, context={'request': request}).data
+    
+    return Response(data)
+
+
+@api_view(['GET'])
+def image_render(request, pk):
+    """
+    Vue API qui retourne un dérivé redimensionné/transcodé de l'image.
+    
+    Paramètres de requête (tailles et qualités limitées à une liste blanche) :
+    - w, h : largeur et/ou hauteur cible en pixels
+    - fit : contain (défaut), cover ou fill
+    - fmt : webp (défaut), jpeg ou png
+    - q : qualité d'encodage
+    
+    Le dérivé est généré depuis l'original à la première demande puis
+    servi depuis le cache disque (borné en octets, éviction LRU). La
+    génération passe par le contrôle d'admission des grandes images.
+    
+    Args:
+        request: Objet requête HTTP
+        pk: Primary key (ID) de l'image
+        
+    Returns:
+        FileResponse: Le fichier du dérivé, ou une erreur JSON 400/404/413,
+        503 avec Retry-After
+    """
+    try:
+        params = parse_render_params(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        image = OptimizedImage.objects.get(pk=pk)
+    except OptimizedImage.DoesNotExist:
+        return Response(
+            {'error': 'Image not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    def produce():
+        # Appelé uniquement si le dérivé n'est pas déjà en cache
+        with image.original_file.open('rb') as source:
+            return render_derivative(source, params)
+    
+    cache = get_cache()
+    key = params.cache_key(image.original_file.name)
+    extension = FORMATS[params.fmt][2]
+    
+    # Le fichier peut être évincé entre la génération et l'ouverture : un seul nouvel essai
+    try:
+        for attempt in range(2):
+            path, hit = cache.get_or_create(key, extension, produce)
+            try:
+                file = open(path, 'rb')
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+    except ServerBusy as e:
+        # Dérivé absent du cache d'une grande image : même admission que l'upload
+        return _busy_response(e)
+    except ImageTooLarge as e:
+        return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    
+    response = FileResponse(file, content_type=params.content_type)
+    response['Cache-Control'] = 'public, max-age=86400'
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+@require_GET
+def image_serve(request, pk):
+    """
+    Vue qui sert une image dans le meilleur format accepté par le client.
+    
+    Le format est choisi d'après l'en-tête `Accept` : AVIF (si activé),
+    puis WebP, puis JPEG. La réponse porte `Vary: Accept` pour que les
+    caches HTTP conservent une copie par format.
+    
+    Vue Django simple (et non DRF) : la négociation de contenu de DRF
+    refuserait (406) un en-tête Accept ne listant que des types d'image.
+    
+    Une animation est servie en WebP animé (AVIF compris), ou en GIF
+    d'origine aux clients sans WebP ; sinon en JPEG fixe (première image).
+    
+    Paramètre de requête optionnel :
+    - w : largeur de l'échelle responsive (défaut : pleine taille)
+    
+    Args:
+        request: Objet requête HTTP
+        pk: Primary key (ID) de l'image
+        
+    Returns:
+        FileResponse: Le fichier dans le format négocié, ou une erreur JSON
+        400/404/413, 503 avec Retry-After (génération d'une grande image)
+    """
+    try:
+        image = OptimizedImage.objects.get(pk=pk)
+    except OptimizedImage.DoesNotExist:
+        return JsonResponse({'error': 'Image not found'}, status=404)
+    
+    if not image.webp_file:
+        return JsonResponse({'error': 'Image not optimized yet'}, status=404)
+    
+    # ========== VALIDATION DE LA LARGEUR ==========
+    
+    if image.is_animated:
+        # Animation : WebP animé à la taille d'origine seulement (pas d'échelle)
+        allowed_widths = [image.width]
+    else:
+        allowed_widths = ladder_widths(image.width) + [image.width]
+    try:
+        width = int(request.GET.get('w') or image.width)
+    except ValueError:
+        width = None
+    if width not in allowed_widths:
+        return JsonResponse(
+            {'error': f"'w' must be one of: {', '.join(map(str, allowed_widths))}"},
+            status=400
+        )
+    
+    # ========== CHOIX DU FORMAT ET DU FICHIER ==========
+    
+    fmt = negotiate_format(request.META.get('HTTP_ACCEPT', ''))
+    handle = None
+    
+    if image.is_animated:
+        if fmt == 'avif':
+            # Pas d'AVIF animé : le WebP animé est servi
+            fmt = 'webp'
+        elif fmt == 'jpeg' and image.format == 'GIF':
+            # Client sans WebP : le GIF d'origine garde l'animation
+            fmt = 'gif'
+            handle = image.original_file.open('rb')
+    
+    if fmt == 'avif':
+        variant = image.variants.filter(format='AVIF', width=width).first()
+        if variant is None and encoder_settings('avif').get('lazy', True):
+            # Génération à la première demande (coûteuse, puis conservée)
+            try:
+                variant = ensure_variant(image, 'avif', width)
+            except ServerBusy:
+                # Pas de place pour une grande image : le WebP existe déjà
+                variant = None
+        if variant is not None:
+            handle = variant.file.open('rb')
+        else:
+            # AVIF pas encore généré : repli sur le WebP
+            fmt = 'webp'
+    
+    try:
+        if fmt == 'webp':
+            if width == image.width:
+                handle = image.webp_file.open('rb')
+            else:
+                variant = image.variants.filter(format='WEBP', width=width).first()
+                if variant is None:
+                    # Ligne de l'échelle absente (image antérieure à l'échelle,
+                    # écriture échouée) : générée comme l'AVIF à la demande
+                    variant = ensure_variant(image, 'webp', width)
+                handle = variant.file.open('rb')
+        
+        if fmt == 'jpeg':
+            if width == image.width and image.format == 'JPEG':
+                # L'original n'est servi tel quel que s'il a les dimensions de
+                # l'échelle : réduite au budget de pixels, l'image enregistrée
+                # est plus petite que son original
+                original = image.original_file.open('rb')
+                info = inspect_image(original)
+                if (info.width, info.height) == (image.width, image.height):
+                    handle = original
+                else:
+                    original.close()
+            if handle is None:
+                # Transcodage JPEG mis en cache avec les dérivés à la demande
+                params = RenderParams(
+                    width=width,
+                    height=0,
+                    fit='contain',
+                    fmt='jpeg',
+                    quality=encoder_settings('jpeg').get('quality', 85),
+                )
+                
+                def produce():
+                    with image.original_file.open('rb') as source:
+                        return render_derivative(source, params)
+                
+                path, _ = get_cache().get_or_create(
+                    params.cache_key(image.original_file.name), FORMATS['jpeg'][2], produce
+                )
+                handle = open(path, 'rb')
+    except ServerBusy as e:
+        # Génération d'une grande image : même admission que l'upload
+        return _busy_response(e, JsonResponse)
+    except ImageTooLarge as e:
+        return JsonResponse({'error': str(e)}, status=413)
+    
+    response = FileResponse(handle, content_type=f'image/{fmt}')
+    
+    # Une copie par format dans les caches HTTP
+    patch_vary_headers(response, ['Accept'])
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+@require_safe
+def media_serve(request, path):
+    """
+    Vue qui sert les fichiers de MEDIA_ROOT (originaux, WebP, miniatures, variantes).
+    
+    - ETag fort (taille, date de modification et inode) et Last-Modified :
+      les requêtes conditionnelles reçoivent un 304
+    - Requêtes de plage (`Range: bytes=...`, une seule plage) : 206 avec
+      Content-Range, 416 si la plage est hors du fichier ; If-Range respecté
+    - Fichiers nommés par un UUID : `Cache-Control: immutable` (un an),
+      les navigateurs et les CDN ne les revalident plus
+    - Le fichier est transmis par FileResponse : avec gunicorn, l'envoi
+      se fait par sendfile (zéro-copie), plages comprises
+    
+    Args:
+        request: Objet requête HTTP (GET ou HEAD)
+        path: Chemin du fichier relatif à MEDIA_ROOT
+        
+    Returns:
+        FileResponse: Le fichier (200) ou la plage demandée (206), ou 304/404/412/416
+    """
+    file_path = resolve_media_path(path)
+    if file_path is None:
+        raise Http404('File not found')
+    
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        # Fichier libéré entre la résolution du chemin et sa lecture
+        raise Http404('File not found')
+    etag = content_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    
+    # ========== REQUÊTES CONDITIONNELLES (304, 412) ==========
+    
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    
+    if response is None:
+        # ========== PLAGE D'OCTETS ==========
+        
+        size = stat.st_size
+        byte_range = None
+        if request.META.get('HTTP_RANGE') and if_range_matches(
+            request.META.get('HTTP_IF_RANGE'), etag, last_modified
+        ):
+            try:
+                byte_range = parse_range(request.META['HTTP_RANGE'], size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+        
+        if response is None:
+            start, end = byte_range or (0, size - 1)
+            length = max(end - start + 1, 0)
+            
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=content_type(path))
+            else:
+                try:
+                    handle = open(file_path, 'rb')
+                except FileNotFoundError:
+                    raise Http404('File not found')
+                if byte_range:
+                    handle = FileRange(handle, start, length)
+                response = FileResponse(handle, content_type=content_type(path))
+            
+            response['Content-Length'] = length
+            if byte_range:
+                response.status_code = 206
+                response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = cache_control(path)
+    return response
+
+
+@require_GET
+def prometheus_metrics(request):
+    """
+    Expose les métriques de tous les processus au format texte Prometheus.
+    
+    Args:
+        request: Objet requête HTTP
+        
+    Returns:
+        HttpResponse: Exposition texte (version 0.0.4)
+    """
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -17,6 +17,21 @@ import ImageUploader from './components/ImageUploader';  // Composant pour uploa
 import ImageGallery from './components/ImageGallery';    // Composant pour afficher la galerie
 // Note: SmartImage est importé mais non utilisé directement ici (utilisé dans ImageGallery)
 
+/**
+ * Champs demandés à l'API pour la galerie (?fields=)
+ * Les champs non affichés (variantes détaillées, dates...) ne sont pas transférés
+ */
+const GALLERY_FIELDS = [
+  'id', 'original_name', 'original_size', 'width', 'height', 'format',
+  'original_url', 'webp_url', 'thumbnail_url', 'blurhash',
+  'size_reduction', 'render_url', 'srcset',
+].join(',');
+
+/**
+ * URL de la première page de la liste des images
+ */
+const IMAGES_URL = `http://localhost:8000/api/images/?fields=${GALLERY_FIELDS}`;
+
 /**
  * Composant App - Point d'entrée de l'application
  * 
@@ -38,6 +53,16 @@ function App() {
    * État : Indique si les images sont en cours de chargement depuis l'API
    */
   const [loading, setLoading] = useState(false);
+  
+  /**
+   * État : URL de la page suivante (curseur fourni par l'API), null s'il n'y en a plus
+   */
+  const [nextUrl, setNextUrl] = useState(null);
+  
+  /**
+   * État : Indique si une page supplémentaire est en cours de chargement
+   */
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // ========== EFFET : CHARGEMENT INITIAL ==========
   
@@ -52,10 +77,10 @@ function App() {
   // ========== FONCTIONS ==========
   
   /**
-   * Charge la liste des images depuis l'API backend
+   * Charge la première page de la liste des images depuis l'API backend
    * 
-   * Cette fonction fait une requête GET vers l'endpoint /api/images/
-   * pour récupérer toutes les images optimisées stockées.
+   * Cette fonction fait une requête GET vers l'endpoint /api/images/.
+   * L'API répond par pages : { results: [...], next: URL de la page suivante }
    */
   const fetchImages = async () => {
     try {
@@ -63,14 +88,15 @@ function App() {
       setLoading(true);
       
       // Fait une requête GET vers l'API Django
-      const response = await fetch('http://localhost:8000/api/images/');
+      const response = await fetch(IMAGES_URL);
       
       // Vérifie que la réponse est OK (status 200)
       if (response.ok) {
         // Parse la réponse JSON
         const data = await response.json();
-        // Met à jour l'état avec les images reçues
-        setImages(data);
+        // Met à jour l'état avec les images reçues et le curseur suivant
+        setImages(data.results);
+        setNextUrl(data.next);
       }
     } catch (error) {
       // En cas d'erreur (réseau, serveur, etc.), affiche dans la console
@@ -81,6 +107,28 @@ function App() {
     }
   };
 
+  /**
+   * Charge la page suivante et l'ajoute à la fin de la liste
+   */
+  const fetchMoreImages = async () => {
+    if (!nextUrl) return;
+    
+    try {
+      setLoadingMore(true);
+      const response = await fetch(nextUrl);
+      
+      if (response.ok) {
+        const data = await response.json();
+        setImages(previous => [...previous, ...data.results]);
+        setNextUrl(data.next);
+      }
+    } catch (error) {
+      console.error('Error fetching more images:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   /**
    * Gestionnaire appelé après un upload réussi d'image
    * 
@@ -132,6 +180,15 @@ function App() {
             onImageDeleted={handleImageDeleted}  // Callback appelé après suppression
           />
         )}
+        
+        {/* Bouton de chargement de la page suivante (pagination par curseur) */}
+        {!loading && nextUrl && (
+          <div className="load-more">
+            <button onClick={fetchMoreImages} disabled={loadingMore}>
+              {loadingMore ? 'Chargement...' : 'Charger plus d\'images'}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );
@@ -116,9 +116,13 @@ const ImageGallery = ({ images, onImageDeleted }) => {
               {/* Composant SmartImage pour affichage optimisé avec lazy loading */}
               <SmartImage
                 src={image.webp_url || image.original_url}  // Utilise WebP si disponible, sinon original
-                blurPlaceholder={image.blur_placeholder}     // Placeholder flou pour chargement
+                blurPlaceholder={image.blur_placeholder}     // Placeholder flou (data URI, si demandé)
+                blurhash={image.blurhash}                    // Placeholder compact (BlurHash)
                 alt={image.original_name}                    // Texte alternatif
                 thumbnailUrl={image.thumbnail_url}           // URL de la miniature (fallback)
+                renderUrl={image.frame_count > 1 ? undefined : image.render_url}  // Rendu à la taille affichée (fixe : pas pour les animations)
+                srcSet={image.srcset}                        // Variantes responsives pré-générées
+                sizes="(max-width: 768px) 100vw, 400px"      // Largeur d'une carte de la grille
                 className="gallery-image"
               />
             </div>
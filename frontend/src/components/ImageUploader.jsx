@@ -15,6 +15,32 @@ import axios from 'axios';
 // Import des styles CSS du composant
 import './ImageUploader.css';
 
+/**
+ * Au-delà de cette taille, le fichier est envoyé par morceaux (upload reprenable)
+ * Les fichiers plus petits sont envoyés en une seule requête multipart
+ */
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+
+/**
+ * Nombre de reprises tentées après une erreur réseau pendant l'envoi d'un morceau
+ */
+const MAX_CHUNK_RETRIES = 5;
+
+/**
+ * Nombre de nouvelles tentatives quand le serveur est occupé (503 + Retry-After)
+ */
+const MAX_BUSY_RETRIES = 3;
+
+/**
+ * Profils d'encodage proposés (IMAGE_ENCODING_PROFILES côté backend)
+ */
+const ENCODING_PROFILES = [
+  { value: 'standard', label: 'Standard' },
+  { value: 'fast', label: 'Rapide' },
+  { value: 'balanced', label: 'Équilibré' },
+  { value: 'max-compression', label: 'Compression maximale' },
+];
+
 /**
  * Composant ImageUploader
  * 
@@ -45,6 +71,11 @@ const ImageUploader = ({ onUploadSuccess }) => {
    * État : Indique si une zone de drag & drop est active (souris dessus)
    */
   const [dragActive, setDragActive] = useState(false);
+  
+  /**
+   * État : Profil d'encodage appliqué aux prochains uploads
+   */
+  const [profile, setProfile] = useState('standard');
 
   // ========== FONCTIONS UTILITAIRES ==========
   
@@ -123,13 +154,197 @@ const ImageUploader = ({ onUploadSuccess }) => {
     }
   };
 
+  // ========== SUIVI DE L'OPTIMISATION EN ARRIÈRE-PLAN ==========
+  
+  /**
+   * Attend la fin d'une optimisation asynchrone (réponse HTTP 202)
+   * 
+   * Interroge l'endpoint de statut jusqu'à ce que le job soit terminé
+   * ("done") ou en échec ("failed").
+   * 
+   * @param {string} statusUrl - URL de l'endpoint /api/images/<id>/status/
+   * @returns {Object} Objet image complet une fois optimisé
+   */
+  const waitForOptimization = async (statusUrl) => {
+    while (true) {
+      // Attend 1 seconde entre deux vérifications
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      
+      const { data } = await axios.get(statusUrl);
+      
+      if (data.status === 'done') {
+        return data.image;
+      }
+      if (data.status === 'failed') {
+        throw new Error(data.error || 'Optimisation échouée');
+      }
+    }
+  };
+
+  /**
+   * Envoie une requête et la relance si le serveur est occupé
+   * 
+   * Le backend refuse les grandes images (503) quand il en optimise déjà
+   * trop : la requête est relancée après le délai de l'en-tête Retry-After.
+   * 
+   * @param {Function} send - Fonction qui envoie la requête (retourne une promesse axios)
+   * @returns {Object} Réponse axios
+   */
+  const retryWhenBusy = async (send) => {
+    for (let attempt = 0; ; attempt += 1) {
+      try {
+        return await send();
+      } catch (error) {
+        if (error.response?.status !== 503 || attempt >= MAX_BUSY_RETRIES) {
+          throw error;
+        }
+        const delay = Number(error.response.headers['retry-after']) || 5;
+        await new Promise(resolve => setTimeout(resolve, delay * 1000));
+      }
+    }
+  };
+
+  // ========== UPLOAD FRAGMENTÉ ET REPRENABLE ==========
+  
+  /**
+   * Envoie un gros fichier par morceaux
+   * 
+   * 1. Ouvre une session (POST /api/images/uploads/)
+   * 2. Envoie chaque morceau (PATCH avec l'en-tête Upload-Offset)
+   * 3. Après une erreur réseau, relit la position côté serveur et reprend
+   *    à cet endroit au lieu de tout renvoyer
+   * 4. Finalise (POST .../finalize/) : même réponse qu'un upload classique
+   * 
+   * @param {File} file - Fichier à envoyer
+   * @param {Function} onProgress - Reçoit le pourcentage envoyé
+   * @returns {Object} Réponse axios de la finalisation
+   */
+  const uploadInChunks = async (file, onProgress) => {
+    const { data: session } = await axios.post(
+      'http://localhost:8000/api/images/uploads/',
+      { filename: file.name, size: file.size, content_type: file.type, profile }
+    );
+    
+    let offset = session.offset;
+    let retries = 0;
+    
+    while (offset < file.size) {
+      const chunk = file.slice(offset, offset + session.chunk_size);
+      try {
+        const { data } = await axios.patch(session.upload_url, chunk, {
+          headers: {
+            'Content-Type': 'application/offset+octet-stream',
+            'Upload-Offset': String(offset),
+          },
+        });
+        offset = data.offset;
+        retries = 0;
+      } catch (error) {
+        // 409 : le serveur indique la position à laquelle reprendre
+        if (error.response?.status === 409) {
+          offset = error.response.data.offset;
+          continue;
+        }
+        // Erreur réseau : attend puis relit la position côté serveur
+        if (!error.response && retries < MAX_CHUNK_RETRIES) {
+          retries += 1;
+          await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+          try {
+            const { data } = await axios.get(session.upload_url);
+            offset = data.offset;
+          } catch (statusError) {
+            // Serveur toujours injoignable : nouvelle tentative au tour suivant
+          }
+          continue;
+        }
+        throw error;
+      }
+      onProgress(Math.round((offset * 100) / file.size));
+    }
+    
+    return retryWhenBusy(() => axios.post(session.finalize_url));
+  };
+
+  // ========== UPLOAD GROUPÉ ==========
+  
+  /**
+   * Envoie plusieurs petits fichiers en une seule requête
+   * 
+   * Le backend les optimise en parallèle et renvoie un résultat par
+   * fichier : les fichiers réussis sont ajoutés à la galerie, les échecs
+   * sont signalés sans bloquer les autres.
+   * 
+   * @param {File[]} files - Fichiers à envoyer
+   */
+  const uploadBatch = async (files) => {
+    const formData = new FormData();
+    // Chaque fichier est ajouté sous la clé "images" (attendu par l'API)
+    files.forEach(file => formData.append('images', file));
+    formData.append('profile', profile);
+    
+    const setProgress = (percent) => {
+      setUploadProgress(prev => {
+        const next = { ...prev };
+        files.forEach(file => { next[file.name] = percent; });
+        return next;
+      });
+    };
+    setProgress(0);
+    
+    let data;
+    try {
+      const response = await axios.post(
+        'http://localhost:8000/api/images/upload/batch/',
+        formData,
+        {
+          headers: {
+            'Content-Type': 'multipart/form-data',
+          },
+          onUploadProgress: (progressEvent) => {
+            setProgress(Math.round((progressEvent.loaded * 100) / progressEvent.total));
+          },
+        }
+      );
+      data = response.data;
+    } catch (error) {
+      // 400 : aucun fichier n'a pu être traité, le détail est dans "failed"
+      if (!error.response?.data?.failed) {
+        console.error('Error uploading batch:', error);
+        alert(`Erreur lors de l'upload: ${error.response?.data?.error || error.message}`);
+        return;
+      }
+      data = error.response.data;
+    }
+    
+    for (const result of data.succeeded) {
+      try {
+        // Mode asynchrone : l'image est en file d'attente, attend le résultat
+        const image = result.image.status_url
+          ? await waitForOptimization(result.image.status_url)
+          : result.image;
+        if (onUploadSuccess) {
+          onUploadSuccess(image);
+        }
+      } catch (error) {
+        data.failed.push({ filename: result.filename, error: error.message });
+      }
+    }
+    
+    if (data.failed.length > 0) {
+      const details = data.failed.map(entry => `- ${entry.filename}: ${entry.error}`).join('\n');
+      alert(`Erreur lors de l'upload de ${data.failed.length} fichier(s) :\n${details}`);
+    }
+  };
+
   // ========== FONCTION D'UPLOAD ==========
   
   /**
    * Upload tous les fichiers sélectionnés vers l'API backend
    * 
-   * Pour chaque fichier :
+   * Les petits fichiers sont envoyés ensemble (voir uploadBatch).
+   * Pour chaque fichier restant :
    * 1. Crée un FormData avec le fichier
+   *    (les gros fichiers sont envoyés par morceaux, voir uploadInChunks)
    * 2. Envoie une requête POST à l'API
    * 3. Affiche la progression
    * 4. Notifie le parent en cas de succès
@@ -141,44 +356,62 @@ const ImageUploader = ({ onUploadSuccess }) => {
     // Active l'état d'upload
     setUploading(true);
     
-    // Parcourt chaque fichier sélectionné
-    for (const file of selectedFiles) {
+    // Plusieurs petits fichiers : une seule requête groupée
+    const smallFiles = selectedFiles.filter(file => file.size <= CHUNKED_UPLOAD_THRESHOLD);
+    let remainingFiles = selectedFiles;
+    if (smallFiles.length > 1) {
+      await uploadBatch(smallFiles);
+      remainingFiles = selectedFiles.filter(file => file.size > CHUNKED_UPLOAD_THRESHOLD);
+    }
+    
+    // Parcourt chaque fichier restant
+    for (const file of remainingFiles) {
       // Crée un FormData pour envoyer le fichier
       const formData = new FormData();
       // Ajoute le fichier avec la clé "image" (attendu par l'API)
       formData.append('image', file);
+      formData.append('profile', profile);
 
       try {
         // Initialise la progression à 0% pour ce fichier
         setUploadProgress(prev => ({ ...prev, [file.name]: 0 }));
         
-        // Envoie la requête POST à l'endpoint d'upload
-        const response = await axios.post(
-          'http://localhost:8000/api/images/upload/',
-          formData,
-          {
-            // Headers pour indiquer qu'on envoie un fichier
-            headers: {
-              'Content-Type': 'multipart/form-data',
-            },
-            // Callback pour suivre la progression de l'upload
-            onUploadProgress: (progressEvent) => {
-              // Calcule le pourcentage uploadé
-              const percentCompleted = Math.round(
-                (progressEvent.loaded * 100) / progressEvent.total
-              );
-              // Met à jour la progression pour ce fichier
-              setUploadProgress(prev => ({
-                ...prev,
-                [file.name]: percentCompleted
-              }));
-            },
-          }
-        );
+        // Gros fichier : envoi par morceaux reprenable ; sinon requête unique
+        const response = file.size > CHUNKED_UPLOAD_THRESHOLD
+          ? await uploadInChunks(file, (percent) => {
+              setUploadProgress(prev => ({ ...prev, [file.name]: percent }));
+            })
+          : await retryWhenBusy(() => axios.post(
+            'http://localhost:8000/api/images/upload/',
+            formData,
+            {
+              // Headers pour indiquer qu'on envoie un fichier
+              headers: {
+                'Content-Type': 'multipart/form-data',
+              },
+              // Callback pour suivre la progression de l'upload
+              onUploadProgress: (progressEvent) => {
+                // Calcule le pourcentage uploadé
+                const percentCompleted = Math.round(
+                  (progressEvent.loaded * 100) / progressEvent.total
+                );
+                // Met à jour la progression pour ce fichier
+                setUploadProgress(prev => ({
+                  ...prev,
+                  [file.name]: percentCompleted
+                }));
+              },
+            }
+          ));
+
+        // Code 202 = optimisation en file d'attente : attend le résultat
+        const image = response.status === 202
+          ? await waitForOptimization(response.data.status_url)
+          : response.data;
 
         // Si le callback est défini, notifie le parent du succès
         if (onUploadSuccess) {
-          onUploadSuccess(response.data);
+          onUploadSuccess(image);
         }
       } catch (error) {
         // En cas d'erreur, affiche un message à l'utilisateur
@@ -276,6 +509,20 @@ const ImageUploader = ({ onUploadSuccess }) => {
             ))}
           </div>
           
+          {/* Choix du profil d'encodage */}
+          <label className="profile-select">
+            Profil d'encodage :
+            <select
+              value={profile}
+              onChange={(e) => setProfile(e.target.value)}
+              disabled={uploading}
+            >
+              {ENCODING_PROFILES.map(option => (
+                <option key={option.value} value={option.value}>{option.label}</option>
+              ))}
+            </select>
+          </label>
+          
           {/* Bouton d'upload */}
           <button
             className="upload-btn"
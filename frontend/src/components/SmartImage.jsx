@@ -4,34 +4,167 @@
  * Ce composant implémente plusieurs optimisations pour améliorer les performances :
  * - Lazy loading : Charge l'image uniquement quand elle entre dans le viewport
  * - Blur placeholder : Affiche une version floue pendant le chargement
+ *   (data URI JPEG, ou BlurHash décodé dans le navigateur)
  * - Progressive loading : Transition fluide vers l'image finale
  * - Gestion d'erreurs : Affiche un message si le chargement échoue
  */
 
 // Imports React pour les hooks (état, effets, références)
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect, useRef, useMemo } from 'react';
 // Import des styles CSS du composant
 import './SmartImage.css';
 
+/**
+ * Largeurs acceptées par l'endpoint de rendu du backend
+ * (doit correspondre à RENDER_ALLOWED_WIDTHS dans settings.py)
+ */
+const RENDER_WIDTHS = [64, 128, 200, 320, 480, 640, 960, 1280, 1920];
+
+/**
+ * Choisit la plus petite largeur de rendu qui couvre la largeur affichée
+ * 
+ * @param {number} displayWidth - Largeur affichée en pixels CSS
+ * @returns {number} Largeur à demander au backend
+ */
+const pickRenderWidth = (displayWidth) => {
+  // Tient compte de la densité de l'écran (écrans Retina = 2x plus de pixels)
+  const needed = displayWidth * (window.devicePixelRatio || 1);
+  return RENDER_WIDTHS.find((w) => w >= needed) || RENDER_WIDTHS[RENDER_WIDTHS.length - 1];
+};
+
+// ========== DÉCODAGE BLURHASH ==========
+
+/**
+ * Alphabet base 83 de la spécification BlurHash (https://blurha.sh)
+ */
+const BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~';
+
+/**
+ * Taille (en pixels) de l'image décodée : étirée et floutée par le CSS
+ */
+const BLURHASH_SIZE = 32;
+
+const decode83 = (text) => [...text].reduce((value, char) => value * 83 + BASE83.indexOf(char), 0);
+
+const srgbToLinear = (value) => {
+  const v = value / 255;
+  return v <= 0.04045 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+};
+
+const linearToSrgb = (value) => {
+  const v = Math.max(0, Math.min(1, value));
+  return v <= 0.0031308
+    ? Math.trunc(v * 12.92 * 255 + 0.5)
+    : Math.trunc((1.055 * Math.pow(v, 1 / 2.4) - 0.055) * 255 + 0.5);
+};
+
+const signSquare = (value) => Math.sign(value) * value * value;
+
+/**
+ * Décode un BlurHash en pixels RGBA
+ * 
+ * @param {string} hash - Chaîne BlurHash (champ `blurhash` de l'API)
+ * @param {number} size - Largeur et hauteur de l'image décodée
+ * @returns {Uint8ClampedArray|null} Pixels RGBA, ou null si la chaîne est invalide
+ */
+const decodeBlurhash = (hash, size) => {
+  if (!hash || hash.length < 6) {
+    return null;
+  }
+  const sizeFlag = decode83(hash[0]);
+  const numX = (sizeFlag % 9) + 1;
+  const numY = Math.floor(sizeFlag / 9) + 1;
+  if (hash.length !== 4 + 2 * numX * numY) {
+    return null;
+  }
+  
+  // Composantes : DC (couleur moyenne) puis AC (variations), en RGB linéaire
+  const maximum = (decode83(hash[1]) + 1) / 166;
+  const colors = [];
+  for (let i = 0; i < numX * numY; i += 1) {
+    if (i === 0) {
+      const value = decode83(hash.substring(2, 6));
+      colors.push([srgbToLinear(value >> 16), srgbToLinear((value >> 8) & 255), srgbToLinear(value & 255)]);
+    } else {
+      const value = decode83(hash.substring(4 + i * 2, 6 + i * 2));
+      colors.push([
+        signSquare((Math.floor(value / 361) - 9) / 9) * maximum,
+        signSquare((Math.floor(value / 19) % 19 - 9) / 9) * maximum,
+        signSquare((value % 19 - 9) / 9) * maximum,
+      ]);
+    }
+  }
+  
+  const pixels = new Uint8ClampedArray(size * size * 4);
+  for (let y = 0; y < size; y += 1) {
+    for (let x = 0; x < size; x += 1) {
+      let r = 0;
+      let g = 0;
+      let b = 0;
+      for (let j = 0; j < numY; j += 1) {
+        for (let i = 0; i < numX; i += 1) {
+          const basis = Math.cos((Math.PI * x * i) / size) * Math.cos((Math.PI * y * j) / size);
+          const color = colors[i + j * numX];
+          r += color[0] * basis;
+          g += color[1] * basis;
+          b += color[2] * basis;
+        }
+      }
+      const offset = 4 * (x + y * size);
+      pixels[offset] = linearToSrgb(r);
+      pixels[offset + 1] = linearToSrgb(g);
+      pixels[offset + 2] = linearToSrgb(b);
+      pixels[offset + 3] = 255;
+    }
+  }
+  return pixels;
+};
+
+/**
+ * Convertit un BlurHash en data URL PNG utilisable comme image de fond
+ * 
+ * @param {string} hash - Chaîne BlurHash
+ * @returns {string|null} Data URL, ou null si la chaîne est invalide
+ */
+const blurhashToDataUrl = (hash) => {
+  const pixels = decodeBlurhash(hash, BLURHASH_SIZE);
+  if (!pixels) {
+    return null;
+  }
+  const canvas = document.createElement('canvas');
+  canvas.width = BLURHASH_SIZE;
+  canvas.height = BLURHASH_SIZE;
+  canvas.getContext('2d').putImageData(new ImageData(pixels, BLURHASH_SIZE, BLURHASH_SIZE), 0, 0);
+  return canvas.toDataURL('image/png');
+};
+
 /**
  * Composant SmartImage
  * 
  * @param {string} src - URL de l'image principale à afficher
  * @param {string} blurPlaceholder - Image floue encodée en base64 pour placeholder
+ * @param {string} blurhash - Placeholder BlurHash (utilisé si blurPlaceholder est absent)
  * @param {string} alt - Texte alternatif pour l'accessibilité
  * @param {string} className - Classes CSS supplémentaires
  * @param {number} width - Largeur de l'image (optionnel)
  * @param {number} height - Hauteur de l'image (optionnel)
  * @param {string} thumbnailUrl - URL de la miniature (fallback)
+ * @param {string} renderUrl - URL de l'endpoint de rendu à la demande (optionnel)
+ * @param {string} srcSet - Variantes responsives pré-générées (attribut srcset, optionnel)
+ * @param {string} sizes - Largeur d'affichage pour le choix dans srcSet (attribut sizes)
  */
 const SmartImage = ({ 
   src, 
   blurPlaceholder, 
+  blurhash,
   alt = '', 
   className = '',
   width,
   height,
-  thumbnailUrl 
+  thumbnailUrl,
+  renderUrl,
+  srcSet,
+  sizes = '100vw'
 }) => {
   // ========== ÉTATS DU COMPOSANT ==========
   
@@ -115,14 +248,35 @@ const SmartImage = ({
 
   // ========== LOGIQUE DE DÉCISION ==========
   
+  /**
+   * Calcule l'URL de l'image à charger une fois dans le viewport
+   * 
+   * Si l'endpoint de rendu est disponible, demande exactement la largeur
+   * affichée au lieu de télécharger la version WebP pleine taille.
+   */
+  const getImageSrc = () => {
+    const displayWidth = containerRef.current?.clientWidth;
+    if (renderUrl && displayWidth) {
+      return `${renderUrl}?w=${pickRenderWidth(displayWidth)}`;
+    }
+    return src || thumbnailUrl;
+  };
+
   // Détermine quelle image utiliser (lazy loading)
-  // Si l'image est dans le viewport, utilise src ou thumbnailUrl
+  // Si l'image est dans le viewport, calcule l'URL à charger
   // Sinon, null = pas de chargement
-  const imageSrc = inView ? (src || thumbnailUrl) : null;
+  const imageSrc = inView ? getImageSrc() : null;
+  
+  // Placeholder BlurHash décodé une seule fois (s'il n'y a pas de data URI)
+  const blurhashUrl = useMemo(
+    () => (!blurPlaceholder && blurhash ? blurhashToDataUrl(blurhash) : null),
+    [blurPlaceholder, blurhash]
+  );
   
   // Détermine si on doit afficher le blur placeholder
   // Affiche uniquement si : placeholder disponible, image pas encore chargée, pas d'erreur
-  const showBlur = blurPlaceholder && !imageLoaded && !error;
+  const placeholderUrl = blurPlaceholder || blurhashUrl;
+  const showBlur = placeholderUrl && !imageLoaded && !error;
 
   // ========== RENDU DU COMPOSANT ==========
   
@@ -142,7 +296,9 @@ const SmartImage = ({
         <div 
           className="smart-image-blur"
           style={{
-            backgroundImage: `url(${blurPlaceholder})`,
+            backgroundImage: `url(${placeholderUrl})`,
+            // Le BlurHash est décodé en carré : il est étiré aux proportions de l'image
+            backgroundSize: blurhashUrl ? '100% 100%' : undefined,
           }}
         />
       )}
@@ -153,6 +309,8 @@ const SmartImage = ({
         <img
           ref={imgRef}
           src={imageSrc}
+          srcSet={srcSet || undefined}  // Le navigateur choisit la variante adaptée
+          sizes={srcSet ? sizes : undefined}
           alt={alt}
           className={`smart-image ${imageLoaded ? 'loaded' : 'loading'}`}
           onLoad={handleImageLoad}